@@ -1,8 +1,14 @@
+import asyncio
 from typing import Optional, Dict, Any
 
 from fastapi import Header, HTTPException
 
-from backend.firebase_admin_client import verify_id_token
+from backend.firebase_admin_client import refresh_signing_keys, verify_id_token
+from backend.singleflight import async_single_flight
+from backend.token_cache import token_cache, token_key
+
+# Concurrent requests carrying the same uncached token share one verification
+_verify_flight = async_single_flight("firebase_token_verify")
 
 
 def _extract_bearer_token(authorization: Optional[str]) -> Optional[str]:
@@ -17,17 +23,35 @@ def _extract_bearer_token(authorization: Optional[str]) -> Optional[str]:
     return token.strip() or None
 
 
+async def _verify_and_cache(token: str) -> Dict[str, Any]:
+    # Signature checks and certificate fetches stay off the event loop.
+    decoded = await asyncio.to_thread(verify_id_token, token)
+    if "uid" in decoded:
+        token_cache.set(token, decoded)
+    return decoded
+
+
+async def refresh_signing_keys_periodically(interval_seconds: float) -> None:
+    """Background task: keep the token signing certificates fresh (see refresh_signing_keys)."""
+    while True:
+        await asyncio.to_thread(refresh_signing_keys)
+        await asyncio.sleep(interval_seconds)
+
+
 async def require_firebase_user(authorization: Optional[str] = Header(default=None)) -> Dict[str, Any]:
     """
     FastAPI dependency that validates Firebase ID token from:
       Authorization: Bearer <FirebaseIdToken>
     Returns decoded token dict with `uid` as the canonical user id.
+    Verified tokens are cached until they expire (see backend.token_cache).
     """
     token = _extract_bearer_token(authorization)
     if not token:
         raise HTTPException(status_code=401, detail="Missing Authorization Bearer token")
     try:
-        decoded = verify_id_token(token)
+        decoded = token_cache.get(token)
+        if decoded is None:
+            decoded = await _verify_flight.do(token_key(token), _verify_and_cache, token)
         if "uid" not in decoded:
             raise HTTPException(status_code=401, detail="Invalid token (missing uid)")
         return decoded
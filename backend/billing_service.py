@@ -6,7 +6,8 @@ from typing import Optional, Dict, Any
 import stripe
 
 from backend.config import settings
-from backend.firebase_admin_client import get_db
+from backend.credits_service import invalidate_user_profile
+from backend.storage import get_storage
 
 
 @dataclass(frozen=True)
@@ -24,10 +25,6 @@ PLANS: Dict[str, Plan] = {
 }
 
 
-def _user_ref(uid: str):
-    return get_db().collection("users").document(uid)
-
-
 def ensure_stripe() -> None:
     if not settings.has_stripe:
         raise RuntimeError("Stripe not configured. Set STRIPE_SECRET_KEY.")
@@ -47,7 +44,8 @@ def create_checkout_session(uid: str, plan_id: str) -> str:
     ensure_stripe()
 
     # Store selected plan so webhook can apply it.
-    _user_ref(uid).set({"pending_plan_id": plan_id}, merge=True)
+    get_storage().merge_user(uid, {"pending_plan_id": plan_id})
+    invalidate_user_profile(uid)
 
     session = stripe.checkout.Session.create(
         mode="subscription",
@@ -62,7 +60,8 @@ def create_checkout_session(uid: str, plan_id: str) -> str:
 
 def _apply_plan(uid: str, plan_id: str) -> None:
     plan = PLANS.get(plan_id) or PLANS["free"]
-    _user_ref(uid).set(
+    get_storage().merge_user(
+        uid,
         {
             "plan_id": plan.id,
             "is_premium": plan.is_premium,
@@ -71,8 +70,8 @@ def _apply_plan(uid: str, plan_id: str) -> None:
             "credits_remaining": plan.daily_credits,
             "pending_plan_id": None,
         },
-        merge=True,
     )
+    invalidate_user_profile(uid)
 
 
 def handle_webhook(payload: bytes, sig_header: str) -> Dict[str, Any]:
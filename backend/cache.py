@@ -0,0 +1,306 @@
+"""
+Caching primitives shared by the backend services.
+
+A cache is made of an in-process LRU tier and an optional on-disk SQLite tier.
+The SQLite database runs in WAL mode so every gunicorn/uvicorn worker on the
+host can read and write the same file concurrently.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import settings
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    value: Any
+    stored_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+
+def _entry_size(value: Any) -> int:
+    """Approximate size of a cached value: its length as stored by SQLiteCache (JSON)."""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+
+class MemoryCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live, bounded by entry
+    count and, when `max_bytes` is set, by the total size of its values.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_bytes: Optional[int] = None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[CacheEntry, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _pop(self, key: str) -> None:
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self.total_bytes -= item[1]
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry = item[0]
+            if entry.age > self.ttl_seconds:
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        size = _entry_size(entry.value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._pop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Would evict everything else and still not fit; leave it to the disk tier.
+                return
+            self._entries[key] = (entry, size)
+            self.total_bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.total_bytes > self.max_bytes
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    Size-bounded, TTL-aware key/value store on top of SQLite (WAL mode).
+    Values are stored as JSON; least recently used rows are evicted once the
+    namespace grows past `max_bytes`.
+    """
+
+    def __init__(self, path: str, namespace: str, ttl_seconds: float, max_bytes: int):
+        self.path = path
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_entries_lru ON cache_entries (namespace, accessed_at)"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, stored_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        value, stored_at = row
+        now = time.time()
+        if now - stored_at > self.ttl_seconds:
+            self.delete(key)
+            return None
+        conn.execute(
+            "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+            (now, self.namespace, key),
+        )
+        return CacheEntry(value=json.loads(value), stored_at=stored_at)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        payload = json.dumps(entry.value, separators=(",", ":"))
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (namespace, key, value, size, stored_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self.namespace, key, payload, len(payload), entry.stored_at, time.time()),
+        )
+        self._evict(conn)
+
+    def delete(self, key: str) -> None:
+        self._conn().execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+        )
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND stored_at < ?",
+            (self.namespace, time.time() - self.ttl_seconds),
+        )
+        (total,) = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY accessed_at ASC",
+            (self.namespace,),
+        )
+        doomed: List[str] = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append(key)
+            total -= size
+        conn.executemany(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+            [(self.namespace, key) for key in doomed],
+        )
+
+    def __len__(self) -> int:
+        (count,) = self._conn().execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        return count
+
+
+class TieredCache:
+    """In-process LRU in front of an optional shared SQLite tier, with hit/miss counters."""
+
+    def __init__(self, name: str, memory: MemoryCache, disk: Optional[SQLiteCache] = None):
+        self.name = name
+        self.memory = memory
+        self.disk = disk
+        self._stats_lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            self._count("memory_hits")
+            return entry
+        if self.disk is not None:
+            try:
+                entry = self.disk.get(key)
+            except sqlite3.Error as e:
+                print(f"Cache '{self.name}' disk read failed: {e}")
+                entry = None
+            if entry is not None:
+                self.memory.set(key, entry)
+                self._count("disk_hits")
+                return entry
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None) -> None:
+        entry = CacheEntry(value=value, stored_at=stored_at if stored_at is not None else time.time())
+        self.memory.set(key, entry)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, entry)
+            except sqlite3.Error as e:
+                print(f"Cache '{self.name}' disk write failed: {e}")
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.disk is not None:
+            try:
+                self.disk.delete(key)
+            except sqlite3.Error as e:
+                print(f"Cache '{self.name}' disk delete failed: {e}")
+
+    def _count(self, field: str) -> None:
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "name": self.name,
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.total_bytes,
+            "disk_enabled": self.disk is not None,
+        }
+
+
+_caches: List[TieredCache] = []
+
+
+def build_cache(name: str, ttl_seconds: float, max_entries: int, max_bytes: int,
+                persistent: bool = True) -> TieredCache:
+    """
+    Create a two-tier cache configured from settings and register it for stats.
+    Falls back to memory only when the disk tier is disabled or unavailable
+    (e.g. read-only filesystems on serverless platforms), or when
+    `persistent` is False (personal data, or values other processes change).
+    """
+    disk: Optional[SQLiteCache] = None
+    if persistent and settings.CACHE_DISK_ENABLED:
+        try:
+            disk = SQLiteCache(
+                path=os.path.join(settings.CACHE_DIR, "cache.sqlite3"),
+                namespace=name,
+                ttl_seconds=ttl_seconds,
+                max_bytes=max_bytes,
+            )
+        except (OSError, sqlite3.Error) as e:
+            print(f"Cache '{name}' disk tier disabled: {e}")
+    # The memory tier gets the same byte budget as the disk tier (none when it is 0).
+    memory = MemoryCache(max_entries=max_entries, ttl_seconds=ttl_seconds, max_bytes=max_bytes or None)
+    cache = TieredCache(name, memory, disk)
+    _caches.append(cache)
+    return cache
+
+
+def cache_stats() -> List[Dict[str, Any]]:
+    """Hit/miss statistics for every cache created through build_cache."""
+    return [cache.stats() for cache in _caches]
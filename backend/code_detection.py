@@ -0,0 +1,124 @@
+"""
+Code-content detection for transcripts.
+
+Word indicators are matched with a tokenized set lookup: the transcript's
+distinct whitespace-separated tokens are collected once and intersected with
+the indicator index, so the cost is one pass over the text no matter how many
+indicators there are. Because whole tokens are compared, short indicators like
+`go`, `api` or `let` no longer fire inside ordinary words ("good", "capital",
+"letter"). The few phrase indicators (`console.log`, `print(`, `if (`) are
+precompiled patterns, each a single linear scan.
+"""
+
+from __future__ import annotations
+
+import re
+import string
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Pattern, Tuple
+
+# A transcript is treated as a code tutorial once its weighted score reaches this.
+CODE_SCORE_THRESHOLD = 3.0
+
+# category -> {indicator: weight}. Each distinct indicator counts once; words that
+# are common in ordinary speech carry a lower weight.
+INDICATORS: Dict[str, Dict[str, float]] = {
+    "language": {
+        "javascript": 1.0, "python": 1.0, "java": 1.0, "react": 1.0, "node": 0.75, "node.js": 1.0,
+        "html": 1.0, "css": 1.0, "typescript": 1.0, "angular": 1.0, "vue": 1.0, "php": 1.0,
+        "ruby": 1.0, "go": 0.25, "golang": 1.0, "rust": 0.75,
+    },
+    "syntax": {
+        "function": 0.5, "class": 0.5, "import": 0.75, "export": 0.5, "console.log": 1.0, "print(": 1.0,
+        "def": 0.75, "var": 0.75, "let": 0.25, "const": 1.0, "if (": 1.0, "for (": 1.0, "while (": 1.0,
+    },
+    "tooling": {
+        "git": 1.0, "github": 1.0, "npm": 1.0, "yarn": 1.0, "pip": 1.0, "docker": 1.0,
+        "kubernetes": 1.0, "api": 1.0, "database": 0.75, "sql": 1.0, "mongodb": 1.0, "postgresql": 1.0,
+    },
+    "tutorial": {
+        "tutorial": 1.0, "coding": 1.0, "programming": 1.0, "development": 0.5, "build": 0.5,
+        "create": 0.5, "install": 1.0, "setup": 0.75, "set up": 0.75, "configure": 1.0, "deploy": 1.0,
+    },
+}
+
+_WORD = re.compile(r"\w+")
+_EDGE_PUNCTUATION = string.punctuation + "“”‘’"
+
+
+@dataclass(frozen=True)
+class CodeDetection:
+    scores: Dict[str, float]
+    matched: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def total(self) -> float:
+        return sum(self.scores.values())
+
+    @property
+    def is_code(self) -> bool:
+        return self.total >= CODE_SCORE_THRESHOLD
+
+
+def _phrase_pattern(indicator: str) -> Pattern[str]:
+    """`console.log` -> console\\s*\\.\\s*log, `set up` -> set\\s+up, `if (` -> if\\s*\\("""
+    parts = re.findall(r"\w+|[^\w\s]", indicator)
+    pattern = re.escape(parts[0])
+    for previous, part in zip(parts, parts[1:]):
+        separator = r"\s+" if _WORD.fullmatch(previous) and _WORD.fullmatch(part) else r"\s*"
+        pattern += separator + re.escape(part)
+    if _WORD.fullmatch(parts[-1]):
+        pattern += r"\b"
+    return re.compile(pattern)
+
+
+def _build_indexes() -> Tuple[Dict[str, Tuple[str, float]], List[Tuple[Pattern[str], str, str, float]]]:
+    words: Dict[str, Tuple[str, float]] = {}
+    phrases: List[Tuple[Pattern[str], str, str, float]] = []
+    for category, indicators in INDICATORS.items():
+        for indicator, weight in indicators.items():
+            if _WORD.fullmatch(indicator):
+                words[indicator] = (category, weight)
+            else:
+                phrases.append((_phrase_pattern(indicator), indicator, category, weight))
+    return words, phrases
+
+
+_WORD_INDEX, _PHRASES = _build_indexes()
+
+
+def _contains_phrase(pattern: Pattern[str], text: str) -> bool:
+    # Patterns start with a literal so the regex engine can use its fast prefix
+    # scan; the leading word boundary ("blueprint(" is not "print(") is checked here.
+    pos = 0
+    while True:
+        match = pattern.search(text, pos)
+        if match is None:
+            return False
+        start = match.start()
+        if start == 0 or not (text[start - 1].isalnum() or text[start - 1] == "_"):
+            return True
+        pos = start + 1
+
+
+def analyze_code_content(transcript: Optional[str]) -> CodeDetection:
+    """Score a transcript per indicator category (language, syntax, tooling, tutorial)."""
+    scores = {category: 0.0 for category in INDICATORS}
+    matched: Dict[str, List[str]] = {category: [] for category in INDICATORS}
+    if not transcript:
+        return CodeDetection(scores=scores, matched=matched)
+
+    text = transcript.lower()
+    # Deduplicate before stripping punctuation so per-token work is per distinct word.
+    vocabulary = {token.strip(_EDGE_PUNCTUATION) for token in set(text.split())}
+
+    found = [(indicator, *_WORD_INDEX[indicator]) for indicator in vocabulary & _WORD_INDEX.keys()]
+    found.extend(
+        (indicator, category, weight)
+        for pattern, indicator, category, weight in _PHRASES
+        if _contains_phrase(pattern, text)
+    )
+    for indicator, category, weight in found:
+        scores[category] += weight
+        matched[category].append(indicator)
+    return CodeDetection(scores=scores, matched=matched)
@@ -3,6 +3,7 @@ Configuration settings for the YouTube to Blog Converter API
 """
 
 import os
+import tempfile
 from typing import Optional
 from dotenv import load_dotenv
 from pathlib import Path
@@ -27,6 +28,7 @@ class Settings:
     YOUTUBE_API_KEY: Optional[str] = os.getenv("YOUTUBE_API_KEY")
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     NEBIUS_API_KEY: Optional[str] = os.getenv("NEBIUS_API_KEY")
+    NEBIUS_BASE_URL: str = os.getenv("NEBIUS_BASE_URL", "https://api.studio.nebius.ai/v1/")
 
     # Firebase (frontend config - used to render pricing/login pages if needed)
     FIREBASE_API_KEY: Optional[str] = os.getenv("FIREBASE_API_KEY")
@@ -47,6 +49,116 @@ class Settings:
     STRIPE_PRICE_STARTER: Optional[str] = os.getenv("STRIPE_PRICE_STARTER")
     STRIPE_PRICE_PRO: Optional[str] = os.getenv("STRIPE_PRICE_PRO")
     
+    # Caching (in-process LRU plus a SQLite tier shared by all workers on the host)
+    CACHE_DIR: str = os.getenv("CACHE_DIR", os.path.join(tempfile.gettempdir(), "yt2blog-cache"))
+    CACHE_DISK_ENABLED: bool = os.getenv("CACHE_DISK_ENABLED", "True").lower() == "true"
+    TRANSCRIPT_CACHE_TTL_SECONDS: int = int(os.getenv("TRANSCRIPT_CACHE_TTL_SECONDS", "86400"))
+    TRANSCRIPT_CACHE_MAX_ENTRIES: int = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "256"))
+    TRANSCRIPT_CACHE_MAX_BYTES: int = int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    METADATA_CACHE_FRESH_SECONDS: int = int(os.getenv("METADATA_CACHE_FRESH_SECONDS", "3600"))
+    METADATA_CACHE_STALE_SECONDS: int = int(os.getenv("METADATA_CACHE_STALE_SECONDS", str(7 * 86400)))
+    METADATA_CACHE_MAX_ENTRIES: int = int(os.getenv("METADATA_CACHE_MAX_ENTRIES", "1024"))
+    METADATA_CACHE_MAX_BYTES: int = int(os.getenv("METADATA_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    # Generated blogs: "global" shares results across users, "user" keeps them per user, "off" disables
+    BLOG_CACHE_SCOPE: str = os.getenv("BLOG_CACHE_SCOPE", "global").lower()
+    BLOG_CACHE_TTL_SECONDS: int = int(os.getenv("BLOG_CACHE_TTL_SECONDS", str(7 * 86400)))
+    BLOG_CACHE_MAX_ENTRIES: int = int(os.getenv("BLOG_CACHE_MAX_ENTRIES", "512"))
+    BLOG_CACHE_MAX_BYTES: int = int(os.getenv("BLOG_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+    
+    # Background generation jobs ("memory" for a single process, "sqlite" to share across workers)
+    JOB_QUEUE_BACKEND: str = os.getenv("JOB_QUEUE_BACKEND", "memory").lower()
+    JOB_QUEUE_DB_PATH: str = os.getenv("JOB_QUEUE_DB_PATH", os.path.join(CACHE_DIR, "jobs.sqlite3"))
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_QUEUE_MAX_DEPTH: int = int(os.getenv("JOB_QUEUE_MAX_DEPTH", "100"))
+    JOB_RESULT_TTL_SECONDS: int = int(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+    # SQLite queue: a running job is reclaimed once its worker stops renewing
+    # this lease (renewed every third of it), e.g. after the process crashed
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+    
+    # Bulk conversion
+    BATCH_MAX_URLS: int = int(os.getenv("BATCH_MAX_URLS", "200"))
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    # Projects per bulk save/fetch request (a Firestore batch holds at most 500 writes)
+    PROJECTS_BATCH_MAX_ITEMS: int = int(os.getenv("PROJECTS_BATCH_MAX_ITEMS", "100"))
+    
+    # LLM client: process-wide cap on in-flight completions, pooled keep-alive
+    # connections, and explicit connect/read timeouts (seconds)
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_CONNECT_TIMEOUT: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    LLM_READ_TIMEOUT: float = float(os.getenv("LLM_READ_TIMEOUT", "120"))
+    LLM_POOL_MAX_CONNECTIONS: int = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "20"))
+    LLM_POOL_KEEPALIVE_SECONDS: float = float(os.getenv("LLM_POOL_KEEPALIVE_SECONDS", "60"))
+    
+    # LLM endpoints: JSON list of {"name", "base_url", "api_key", "model"} objects for
+    # OpenAI-compatible servers (defaults to Nebius with NEBIUS_API_KEY). Requests go to
+    # the endpoint with the lowest latency/error EWMA; failing endpoints are ejected by a
+    # circuit breaker, and slow requests can be hedged to a second endpoint.
+    LLM_ENDPOINTS: Optional[str] = os.getenv("LLM_ENDPOINTS")
+    LLM_ROUTER_EWMA_ALPHA: float = float(os.getenv("LLM_ROUTER_EWMA_ALPHA", "0.3"))
+    LLM_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "3"))
+    LLM_BREAKER_COOLDOWN_SECONDS: float = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "False").lower() == "true"
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "1"))
+    
+    # Users, credits and projects: "firestore" (default) or "sqlite" for a local
+    # database file shared by all workers on the host (self-hosting, offline benchmarks)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "firestore").lower()
+    STORAGE_DB_PATH: str = os.getenv("STORAGE_DB_PATH", str(project_root / "data" / "storage.sqlite3"))
+    
+    # Compression of large text fields in stored projects: "zlib" (default),
+    # "zstd" (needs the zstandard package; zlib is used without it) or "none"
+    PROJECT_COMPRESSION_CODEC: str = os.getenv("PROJECT_COMPRESSION_CODEC", "zlib").lower()
+    PROJECT_COMPRESSION_MIN_BYTES: int = int(os.getenv("PROJECT_COMPRESSION_MIN_BYTES", "1024"))
+    
+    # User documents (credits, plan) cached in memory with write-through on every change
+    USER_PROFILE_CACHE_TTL_SECONDS: int = int(os.getenv("USER_PROFILE_CACHE_TTL_SECONDS", "60"))
+    USER_PROFILE_CACHE_MAX_ENTRIES: int = int(os.getenv("USER_PROFILE_CACHE_MAX_ENTRIES", "10000"))
+    
+    # Credit leasing: reserve blocks of CREDIT_LEASE_SIZE credits per user in one transaction
+    # and spend them from memory (0 = one transaction per charge). Unused credits return to
+    # storage after CREDIT_LEASE_TTL_SECONDS and on shutdown. Users whose balance was seen
+    # too low within CREDIT_ZERO_BALANCE_TTL_SECONDS are rejected without a storage call
+    # (so a plan bought through another worker can take this long to apply everywhere).
+    CREDIT_LEASE_SIZE: int = int(os.getenv("CREDIT_LEASE_SIZE", "0"))
+    CREDIT_LEASE_TTL_SECONDS: float = float(os.getenv("CREDIT_LEASE_TTL_SECONDS", "120"))
+    CREDIT_ZERO_BALANCE_TTL_SECONDS: float = float(os.getenv("CREDIT_ZERO_BALANCE_TTL_SECONDS", "10"))
+    
+    # Verified Firebase ID tokens are cached until they expire (0 disables the cache);
+    # Google's signing certificates are re-fetched in the background this often.
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000"))
+    FIREBASE_CERT_REFRESH_SECONDS: float = float(os.getenv("FIREBASE_CERT_REFRESH_SECONDS", "3600"))
+    
+    # Retries for failed LLM calls: at most LLM_RETRY_MAX_ATTEMPTS attempts with full-jitter
+    # exponential backoff, all within LLM_RETRY_BUDGET_SECONDS. When they are exhausted the
+    # "summary" template falls back to a local extractive summary (marked degraded).
+    LLM_RETRY_MAX_ATTEMPTS: int = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "3"))
+    LLM_RETRY_BASE_DELAY_SECONDS: float = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "0.5"))
+    LLM_RETRY_MAX_DELAY_SECONDS: float = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "8"))
+    LLM_RETRY_BUDGET_SECONDS: float = float(os.getenv("LLM_RETRY_BUDGET_SECONDS", "150"))
+    DEGRADED_SUMMARY_MAX_TOKENS: int = int(os.getenv("DEGRADED_SUMMARY_MAX_TOKENS", "400"))
+    
+    # Per-template generation overrides (JSON). Keys: "*", "<template>", "*:<lang>",
+    # "<template>:<lang>"; values: {"model", "max_tokens", "temperature"}. Defaults
+    # come from the "generation" blocks of the template files.
+    LLM_GENERATION_OVERRIDES: Optional[str] = os.getenv("LLM_GENERATION_OVERRIDES")
+    
+    # Long transcripts: "truncate" keeps the head of the source, "extractive" keeps the
+    # highest-ranked sentences from the whole transcript, "map_reduce" summarizes
+    # token-budgeted chunks in parallel and feeds the notes to the template prompt.
+    LONG_INPUT_STRATEGY: str = os.getenv("LONG_INPUT_STRATEGY", "truncate").lower()
+    PROMPT_SOURCE_MAX_TOKENS: int = int(os.getenv("PROMPT_SOURCE_MAX_TOKENS", "1000"))
+    LONG_INPUT_SOURCE_MAX_TOKENS: int = int(os.getenv("LONG_INPUT_SOURCE_MAX_TOKENS", "6000"))
+    MAP_REDUCE_CHUNK_TOKENS: int = int(os.getenv("MAP_REDUCE_CHUNK_TOKENS", "3000"))
+    MAP_REDUCE_CONCURRENCY: int = int(os.getenv("MAP_REDUCE_CONCURRENCY", "4"))
+    
+    # Prompt templates (JSON files); hot reload picks up edits without a restart
+    PROMPT_TEMPLATES_DIR: str = os.getenv(
+        "PROMPT_TEMPLATES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_templates")
+    )
+    PROMPT_TEMPLATES_HOT_RELOAD: bool = os.getenv("PROMPT_TEMPLATES_HOT_RELOAD", "False").lower() == "true"
+    PROMPT_TEMPLATES_RELOAD_INTERVAL: float = float(os.getenv("PROMPT_TEMPLATES_RELOAD_INTERVAL", "2"))
+    
     # CORS settings
     CORS_ORIGINS: list = [
         "http://localhost:3000",
@@ -83,6 +195,11 @@ class Settings:
         """Check if Nebius API key is configured"""
         return self.NEBIUS_API_KEY is not None and len(self.NEBIUS_API_KEY.strip()) > 0
 
+    @property
+    def has_llm_endpoints(self) -> bool:
+        """Check if an LLM endpoint (Nebius or LLM_ENDPOINTS) is configured"""
+        return self.has_nebius_api or bool(self.LLM_ENDPOINTS and self.LLM_ENDPOINTS.strip())
+
     @property
     def has_firebase_project(self) -> bool:
         """Check if Firebase project is configured"""
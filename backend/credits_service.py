@@ -1,17 +1,39 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
-from firebase_admin import firestore as fb_firestore
-
-from backend.firebase_admin_client import get_db
+from backend.cache import build_cache
+from backend.config import settings
+from backend.storage import InsufficientCreditsError, get_storage
 
 
 # For the college/demo project, give plenty of free credits so no payment is needed.
 FREE_DAILY_CREDITS = 100
 
+# User documents, written through on every change made by this process. Kept
+# in memory only: they hold emails and balances, and a shared disk tier could
+# not be invalidated by other processes. Other processes may display a balance
+# up to the TTL old; charges re-read the document inside their transaction.
+_profiles = build_cache(
+    "user_profiles",
+    ttl_seconds=settings.USER_PROFILE_CACHE_TTL_SECONDS,
+    max_entries=settings.USER_PROFILE_CACHE_MAX_ENTRIES,
+    max_bytes=0,
+    persistent=False,
+)
+
+# uid -> time.monotonic() of the last withdrawal refused for lack of credits.
+# Drives the zero-balance fast path; cleared when this process sees the balance
+# change (a plan applied, a refund, a fresh read). A plan applied by another
+# process only takes effect here once the entry ages out, after at most
+# CREDIT_ZERO_BALANCE_TTL_SECONDS.
+_refused_at: Dict[str, float] = {}
+
 
 @dataclass(frozen=True)
 class CreditsSnapshot:
@@ -21,111 +43,283 @@ class CreditsSnapshot:
     plan_id: str
     updated_at: str
 
+    @classmethod
+    def from_profile(cls, data: Dict[str, Any]) -> "CreditsSnapshot":
+        return cls(
+            credits_remaining=int(data.get("credits_remaining", FREE_DAILY_CREDITS)),
+            credits_total=int(data.get("credits_total", FREE_DAILY_CREDITS)),
+            is_premium=bool(data.get("is_premium", False)),
+            plan_id=str(data.get("plan_id", "free")),
+            updated_at=str(data.get("updated_at", _now_iso())),
+        )
+
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _user_doc(uid: str) -> fb_firestore.DocumentReference:
-    db = get_db()
-    return db.collection("users").document(uid)
+def _new_user(uid: str, email: Optional[str]) -> Dict[str, Any]:
+    now = _now_iso()
+    return {
+        "uid": uid,
+        "email": email,
+        "plan_id": "free",
+        "is_premium": False,
+        "credits_remaining": FREE_DAILY_CREDITS,
+        "credits_total": FREE_DAILY_CREDITS,
+        "created_at": now,
+        "updated_at": now,
+    }
 
 
-def ensure_user_exists(uid: str, email: str | None = None) -> None:
-    ref = _user_doc(uid)
-    snap = ref.get()
-    if snap.exists:
+def _remember(uid: str, data: Dict[str, Any]) -> None:
+    # Only plain fields are cached (the disk tier stores JSON; Firestore may return timestamps).
+    _profiles.set(uid, {k: v for k, v in data.items() if isinstance(v, (str, int, float, bool, type(None)))})
+
+
+def invalidate_user_profile(uid: str) -> None:
+    """Drop the cached user document (and any refusal) after a write made outside this module."""
+    _profiles.delete(uid)
+    _refused_at.pop(uid, None)
+
+
+def get_user_profile(uid: str, email: str | None = None) -> Dict[str, Any]:
+    """
+    The user document, creating it on first sight. Served from the profile
+    cache when possible; otherwise one read, plus one write only when the
+    user is new or their email is missing.
+    """
+    cached = _profiles.get(uid)
+    # Users on the fast path are re-read, so a payment made via another process shows up.
+    if cached is not None and (not email or cached.value.get("email")) and uid not in _refused_at:
+        return cached.value
+
+    storage = get_storage()
+    data = storage.get_user(uid)
+    if data is not None:
         # opportunistically store email if missing
-        if email:
-            data = snap.to_dict() or {}
-            if not data.get("email"):
-                ref.set({"email": email, "updated_at": _now_iso()}, merge=True)
-        return
+        if email and not data.get("email"):
+            data["email"] = email
+            data["updated_at"] = _now_iso()
+            storage.merge_user(uid, {"email": email, "updated_at": data["updated_at"]})
+    else:
+        data = _new_user(uid, email)
+        storage.merge_user(uid, data)
+    _remember(uid, data)
+    _refused_at.pop(uid, None)
+    return data
 
-    ref.set(
-        {
-            "uid": uid,
-            "email": email,
-            "plan_id": "free",
-            "is_premium": False,
-            "credits_remaining": FREE_DAILY_CREDITS,
-            "credits_total": FREE_DAILY_CREDITS,
-            "created_at": _now_iso(),
-            "updated_at": _now_iso(),
-        },
-        merge=True,
-    )
-
-
-def get_credits(uid: str) -> CreditsSnapshot:
-    ref = _user_doc(uid)
-    snap = ref.get()
-    if not snap.exists:
-        ensure_user_exists(uid)
-        snap = ref.get()
-
-    data: Dict[str, Any] = snap.to_dict() or {}
-    return CreditsSnapshot(
-        credits_remaining=int(data.get("credits_remaining", FREE_DAILY_CREDITS)),
-        credits_total=int(data.get("credits_total", FREE_DAILY_CREDITS)),
-        is_premium=bool(data.get("is_premium", False)),
-        plan_id=str(data.get("plan_id", "free")),
-        updated_at=str(data.get("updated_at", _now_iso())),
-    )
-
-
-def consume_credits(uid: str, amount: int = 1) -> CreditsSnapshot:
-    if amount <= 0:
-        return get_credits(uid)
-
-    db = get_db()
-    ref = _user_doc(uid)
-
-    @fb_firestore.transactional
-    def _txn(txn: fb_firestore.Transaction) -> Dict[str, Any]:
-        snap = ref.get(transaction=txn)
-        if not snap.exists:
-            txn.set(
-                ref,
-                {
-                    "uid": uid,
-                    "plan_id": "free",
-                    "is_premium": False,
-                    "credits_remaining": FREE_DAILY_CREDITS,
-                    "credits_total": FREE_DAILY_CREDITS,
-                    "created_at": _now_iso(),
-                    "updated_at": _now_iso(),
-                },
-                merge=True,
-            )
-            snap = ref.get(transaction=txn)
-
-        data: Dict[str, Any] = snap.to_dict() or {}
-        remaining = int(data.get("credits_remaining", FREE_DAILY_CREDITS))
-        total = int(data.get("credits_total", FREE_DAILY_CREDITS))
-        is_premium = bool(data.get("is_premium", False))
-        plan_id = str(data.get("plan_id", "free"))
-
-        if remaining < amount:
-            raise ValueError("INSUFFICIENT_CREDITS")
-
-        remaining -= amount
-        txn.update(ref, {"credits_remaining": remaining, "updated_at": _now_iso()})
+
+def ensure_user_exists(uid: str, email: str | None = None) -> None:
+    get_user_profile(uid, email)
+
+
+def get_credits(uid: str, email: str | None = None) -> CreditsSnapshot:
+    data = dict(get_user_profile(uid, email))
+    # Credits leased by this process are still the user's.
+    data["credits_remaining"] = int(data.get("credits_remaining", FREE_DAILY_CREDITS)) + credit_leases.held(uid)
+    return CreditsSnapshot.from_profile(data)
+
+
+def _known_insufficient(uid: str, amount: int) -> bool:
+    """Read-only fast path: a withdrawal was refused recently and the balance seen then cannot cover `amount`."""
+    refused_at = _refused_at.get(uid)
+    if refused_at is None:
+        return False
+    if time.monotonic() - refused_at > settings.CREDIT_ZERO_BALANCE_TTL_SECONDS:
+        _refused_at.pop(uid, None)
+        return False
+    cached = _profiles.get(uid)
+    if cached is None:
+        return False
+    return int(cached.value.get("credits_remaining", FREE_DAILY_CREDITS)) + credit_leases.held(uid) < amount
+
+
+def _withdraw(uid: str, need: int, want: int, email: str | None = None) -> Tuple[Dict[str, Any], int]:
+    """
+    Deduct at least `need` and at most max(need, `want`) credits in one
+    transaction, creating the user document if it does not exist yet.
+    Returns the updated document and the number of credits taken.
+    """
+    try:
+        data, taken = get_storage().withdraw_credits(
+            uid, need, want, new_user=_new_user(uid, email), email=email,
+            default_credits=FREE_DAILY_CREDITS, updated_at=_now_iso(),
+        )
+    except InsufficientCreditsError as e:
+        # Remembered so that retries are rejected by the fast path.
+        _remember(uid, e.profile)
+        _refused_at[uid] = time.monotonic()
+        raise
+    _remember(uid, data)
+    return data, taken
+
+
+def _return_credits(uid: str, amount: int) -> None:
+    updated_at = _now_iso()
+    get_storage().increment_credits(uid, amount, updated_at)
+    _refused_at.pop(uid, None)
+    cached = _profiles.get(uid)
+    if cached is not None:
+        # Write through without a read; a concurrent change elsewhere is picked up after the TTL.
+        data = dict(cached.value)
+        data["credits_remaining"] = int(data.get("credits_remaining", FREE_DAILY_CREDITS)) + amount
+        data["updated_at"] = updated_at
+        _remember(uid, data)
+
+
+@dataclass
+class _Lease:
+    credits: int = 0
+    expires_at: float = 0.0
+    # The user document as of the last reservation, for snapshots of local spends
+    profile: Dict[str, Any] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class CreditLeases:
+    """
+    Credits reserved from storage in blocks and spent from memory.
+
+    A charge the lease cannot cover runs one transaction that takes the
+    charge plus up to `size` credits for later charges. Refunds go back into
+    the lease. Unused credits return to storage once the lease is `ttl`
+    seconds old (see release_expired) and on shutdown (release_all). While a
+    lease is held, other processes see the user's balance without it, and a
+    crashed process forfeits its leased credits, so keep `size` small.
+    """
+
+    def __init__(self, size: int, ttl_seconds: float):
+        self.size = max(0, size)
+        self.ttl = ttl_seconds
+        self._leases: Dict[str, _Lease] = {}
+        self._lock = threading.Lock()
+        self.reservations = 0
+        self.local_charges = 0
+        self.returned = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def _lease(self, uid: str) -> _Lease:
+        with self._lock:
+            return self._leases.setdefault(uid, _Lease())
+
+    def held(self, uid: str) -> int:
+        lease = self._leases.get(uid)
+        return lease.credits if lease is not None else 0
+
+    def _snapshot(self, lease: _Lease) -> CreditsSnapshot:
+        data = dict(lease.profile)
+        data["credits_remaining"] = int(data.get("credits_remaining", 0)) + lease.credits
+        return CreditsSnapshot.from_profile(data)
+
+    def consume(self, uid: str, amount: int, email: str | None = None) -> CreditsSnapshot:
+        while True:
+            lease = self._lease(uid)
+            with lease.lock:
+                if self._leases.get(uid) is not lease:
+                    continue  # released while we waited for the lock
+                if lease.credits >= amount and time.monotonic() < lease.expires_at:
+                    lease.credits -= amount
+                    self.local_charges += 1
+                    return self._snapshot(lease)
+                # An expired lease's leftover is folded into the new one rather than returned first.
+                data, taken = _withdraw(uid, need=max(0, amount - lease.credits),
+                                        want=amount - lease.credits + self.size, email=email)
+                lease.credits += taken - amount
+                lease.profile = data
+                lease.expires_at = time.monotonic() + self.ttl
+                self.reservations += 1
+                return self._snapshot(lease)
+
+    def refund(self, uid: str, amount: int) -> bool:
+        """Put credits back into an unexpired lease. False when there is none."""
+        lease = self._leases.get(uid)
+        if lease is None:
+            return False
+        with lease.lock:
+            if self._leases.get(uid) is not lease or time.monotonic() >= lease.expires_at:
+                return False
+            lease.credits += amount
+            return True
+
+    def release_expired(self, force: bool = False) -> int:
+        """Return unused credits of expired leases (every lease with `force`). Returns the credits returned."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = list(self._leases.items())
+        returned = 0
+        for uid, lease in candidates:
+            with lease.lock:
+                if not force and now < lease.expires_at:
+                    continue
+                amount, lease.credits = lease.credits, 0
+                with self._lock:
+                    self._leases.pop(uid, None)
+                if amount:
+                    try:
+                        _return_credits(uid, amount)
+                    except Exception as e:
+                        lease.credits = amount
+                        with self._lock:
+                            self._leases.setdefault(uid, lease)
+                        print(f"Returning {amount} leased credits for {uid} failed: {e}")
+                        continue
+                    returned += amount
+        self.returned += returned
+        return returned
+
+    def release_all(self) -> int:
+        return self.release_expired(force=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            leases = list(self._leases.values())
         return {
-            "credits_remaining": remaining,
-            "credits_total": total,
-            "is_premium": is_premium,
-            "plan_id": plan_id,
-            "updated_at": _now_iso(),
+            "enabled": self.enabled,
+            "lease_size": self.size,
+            "active_leases": len(leases),
+            "credits_held": sum(lease.credits for lease in leases),
+            "reservations": self.reservations,
+            "local_charges": self.local_charges,
+            "returned": self.returned,
         }
 
-    txn = db.transaction()
-    result = _txn(txn)
-    return CreditsSnapshot(
-        credits_remaining=int(result["credits_remaining"]),
-        credits_total=int(result["credits_total"]),
-        is_premium=bool(result["is_premium"]),
-        plan_id=str(result["plan_id"]),
-        updated_at=str(result["updated_at"]),
-    )
 
+credit_leases = CreditLeases(settings.CREDIT_LEASE_SIZE, settings.CREDIT_LEASE_TTL_SECONDS)
+
+
+async def release_expired_leases_periodically(interval_seconds: float) -> None:
+    """Background task: return credits of expired leases to storage."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await asyncio.to_thread(credit_leases.release_expired)
+
+
+def consume_credits(uid: str, amount: int = 1, email: str | None = None) -> CreditsSnapshot:
+    """
+    Deduct credits, creating the user document if it does not exist yet, so
+    callers need no separate ensure_user_exists. Users recently seen without
+    enough credits are rejected without touching storage. With
+    CREDIT_LEASE_SIZE set, most charges are served from a local lease
+    (see CreditLeases) instead of a transaction each.
+    """
+    if amount <= 0:
+        return get_credits(uid, email)
+    if _known_insufficient(uid, amount):
+        raise ValueError("INSUFFICIENT_CREDITS")
+    if credit_leases.enabled:
+        return credit_leases.consume(uid, amount, email)
+    data, _ = _withdraw(uid, need=amount, want=amount, email=email)
+    return CreditsSnapshot.from_profile(data)
+
+
+def refund_credits(uid: str, amount: int) -> None:
+    """Return credits that were consumed for work that never ran."""
+    if amount <= 0:
+        return
+    if credit_leases.enabled and credit_leases.refund(uid, amount):
+        return
+    _return_credits(uid, amount)
@@ -0,0 +1,164 @@
+"""
+Extractive compression of transcripts into a prompt budget.
+
+Sentences are ranked with TextRank over TF-IDF vectors and the best ones are
+kept, in their original order, until the character budget is full. The
+sentence-similarity graph is never materialized: with L2-normalized TF-IDF
+rows X, the similarity matrix is X·Xᵀ, so each power-iteration step is two
+sparse mat-vec products and the whole ranking is linear in the number of
+words. NumPy is used when installed; otherwise an equivalent pure-Python
+implementation runs (same ranking, slower).
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import Dict, List, Sequence, Tuple
+
+from backend.prompt_budget import split_sentences
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+# Auto-generated captions often have no punctuation, so long "sentences" are
+# cut into windows of this many words to give the ranker units to choose from.
+MAX_UNIT_WORDS = 40
+DAMPING = 0.85
+ITERATIONS = 30
+
+_WORD = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by do for from has have he her his i if in into is it its just "
+    "like me my not of on or our really right so that the their them then there these they "
+    "this to uh um up was we were what when which who will with you your".split()
+)
+
+
+def split_units(text: str) -> List[str]:
+    """Sentences, with overly long ones cut into MAX_UNIT_WORDS word windows."""
+    units: List[str] = []
+    for sentence in split_sentences(text):
+        words = sentence.split()
+        if len(words) <= MAX_UNIT_WORDS:
+            units.append(sentence)
+            continue
+        for start in range(0, len(words), MAX_UNIT_WORDS):
+            units.append(" ".join(words[start:start + MAX_UNIT_WORDS]))
+    return units
+
+
+def _term_matrix(units: Sequence[str]) -> Tuple[List[int], List[int], List[float], int]:
+    """Sparse (row, col, count) triplets of content-word counts per unit."""
+    vocabulary: Dict[str, int] = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    counts: List[float] = []
+    for row, unit in enumerate(units):
+        bag: Dict[int, int] = {}
+        for word in _WORD.findall(unit.lower()):
+            if word in _STOPWORDS or len(word) < 2:
+                continue
+            col = vocabulary.setdefault(word, len(vocabulary))
+            bag[col] = bag.get(col, 0) + 1
+        for col, count in bag.items():
+            rows.append(row)
+            cols.append(col)
+            counts.append(float(count))
+    return rows, cols, counts, len(vocabulary)
+
+
+def _rank_numpy(rows: List[int], cols: List[int], counts: List[float], n_units: int, n_terms: int) -> List[float]:
+    r = np.asarray(rows, dtype=np.int64)
+    c = np.asarray(cols, dtype=np.int64)
+    # Sublinear TF times smoothed IDF, then L2-normalize each row.
+    df = np.bincount(c, minlength=n_terms)
+    values = (1.0 + np.log(np.asarray(counts))) * (np.log((1.0 + n_units) / (1.0 + df)) + 1.0)[c]
+    norms = np.sqrt(np.bincount(r, weights=values * values, minlength=n_units))
+    values = values / np.where(norms > 0, norms, 1.0)[r]
+    has_terms = norms > 0
+
+    def similarity_times(vector):
+        # (X·Xᵀ - I) v without building X·Xᵀ; the diagonal is 1 for non-empty rows.
+        projected = np.bincount(c, weights=values * vector[r], minlength=n_terms)
+        return np.bincount(r, weights=values * projected[c], minlength=n_units) - vector * has_terms
+
+    degree = similarity_times(np.ones(n_units))
+    inverse_degree = np.where(degree > 1e-12, 1.0 / np.maximum(degree, 1e-12), 0.0)
+    scores = np.full(n_units, 1.0 / n_units)
+    for _ in range(ITERATIONS):
+        scores = (1.0 - DAMPING) / n_units + DAMPING * similarity_times(scores * inverse_degree)
+    return scores.tolist()
+
+
+def _rank_python(rows: List[int], cols: List[int], counts: List[float], n_units: int, n_terms: int) -> List[float]:
+    df = [0] * n_terms
+    for col in cols:
+        df[col] += 1
+    idf = [math.log((1.0 + n_units) / (1.0 + d)) + 1.0 for d in df]
+    values = [(1.0 + math.log(count)) * idf[col] for col, count in zip(cols, counts)]
+    norms = [0.0] * n_units
+    for row, value in zip(rows, values):
+        norms[row] += value * value
+    norms = [math.sqrt(n) for n in norms]
+    values = [value / norms[row] for row, value in zip(rows, values)]
+    entries = list(zip(rows, cols, values))
+
+    def similarity_times(vector: List[float]) -> List[float]:
+        projected = [0.0] * n_terms
+        for row, col, value in entries:
+            projected[col] += value * vector[row]
+        result = [-v if norms[i] > 0 else 0.0 for i, v in enumerate(vector)]
+        for row, col, value in entries:
+            result[row] += value * projected[col]
+        return result
+
+    degree = similarity_times([1.0] * n_units)
+    inverse_degree = [1.0 / d if d > 1e-12 else 0.0 for d in degree]
+    scores = [1.0 / n_units] * n_units
+    for _ in range(ITERATIONS):
+        spread = similarity_times([s * inv for s, inv in zip(scores, inverse_degree)])
+        scores = [(1.0 - DAMPING) / n_units + DAMPING * s for s in spread]
+    return scores
+
+
+def rank_units(units: Sequence[str]) -> List[float]:
+    """TextRank score of each unit (higher is more central to the transcript)."""
+    if not units:
+        return []
+    rows, cols, counts, n_terms = _term_matrix(units)
+    if not rows:
+        return [0.0] * len(units)
+    rank = _rank_numpy if np is not None else _rank_python
+    return rank(rows, cols, counts, len(units), n_terms)
+
+
+def compress_extractive(text: str, max_chars: int) -> str:
+    """
+    Keep the highest-ranked sentences of `text`, in original order, within
+    `max_chars`. Text that already fits is returned unchanged.
+    """
+    if len(text) <= max_chars:
+        return text
+    return " ".join(select_units(text, max_chars))
+
+
+def select_units(text: str, max_chars: int) -> List[str]:
+    """The highest-ranked units of `text`, in original order, whose joined length fits `max_chars`."""
+    units = split_units(text)
+    scores = rank_units(units)
+    keep: List[int] = []
+    seen = set()
+    used = 0
+    for index in sorted(range(len(units)), key=scores.__getitem__, reverse=True):
+        cost = len(units[index]) + (1 if keep else 0)
+        # Repeated sentences share a score; keeping one copy leaves room for other content.
+        fingerprint = " ".join(_WORD.findall(units[index].lower()))
+        if used + cost > max_chars or fingerprint in seen:
+            continue
+        keep.append(index)
+        seen.add(fingerprint)
+        used += cost
+    return [units[i] for i in sorted(keep)]
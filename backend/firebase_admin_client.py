@@ -49,3 +49,22 @@ def verify_id_token(id_token: str) -> Dict[str, Any]:
     init_firebase()
     return auth.verify_id_token(id_token)
 
+
+def refresh_signing_keys() -> bool:
+    """
+    Re-fetch Google's ID token signing certificates into the verifier's HTTP
+    cache, so token verification never waits on the fetch. This goes through
+    firebase_admin internals, so it is best effort: on any failure the SDK
+    keeps fetching the certificates on demand. Returns True on success.
+    """
+    try:
+        init_firebase()
+        from firebase_admin import _token_gen
+
+        request = auth._get_client(_app)._token_verifier.request
+        # no-cache bypasses the cached copy and stores the fresh response.
+        request(_token_gen.ID_TOKEN_CERT_URI, method="GET", headers={"cache-control": "no-cache"})
+        return True
+    except Exception as e:
+        print(f"Signing key refresh failed: {type(e).__name__}: {e}")
+        return False
@@ -0,0 +1,106 @@
+"""
+Per-template generation settings and token usage accounting.
+
+A GenerationProfile holds the model, output token budget and temperature for
+a completion. Any field left unset falls back to the LLMService defaults.
+Profiles are layered in this order, later layers winning:
+
+1. the template file's "generation" block,
+2. the template file's "generation_by_language" entry for the language,
+3. LLM_GENERATION_OVERRIDES (JSON), whose keys are "*", "<template>",
+   "*:<language>" and "<template>:<language>", in that order.
+
+Usage (prompt and completion tokens reported by the provider) is recorded per
+usage tag (the template id) and per model.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import asdict, dataclass, replace
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional
+
+from backend.config import settings
+
+if TYPE_CHECKING:
+    from backend.prompt_registry import PromptRegistry
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    model: Optional[str] = None
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, data: Optional[Mapping[str, Any]]) -> "GenerationProfile":
+        if not data:
+            return cls()
+        return cls(
+            model=data.get("model"),
+            max_tokens=int(data["max_tokens"]) if data.get("max_tokens") is not None else None,
+            temperature=float(data["temperature"]) if data.get("temperature") is not None else None,
+        )
+
+    def merged(self, other: "GenerationProfile") -> "GenerationProfile":
+        """This profile with every field that `other` sets replaced."""
+        changes = {name: value for name, value in asdict(other).items() if value is not None}
+        return replace(self, **changes) if changes else self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@lru_cache(maxsize=1)
+def _overrides() -> Dict[str, GenerationProfile]:
+    if not settings.LLM_GENERATION_OVERRIDES:
+        return {}
+    return {
+        key: GenerationProfile.from_dict(value)
+        for key, value in json.loads(settings.LLM_GENERATION_OVERRIDES).items()
+    }
+
+
+def resolve_profile(registry: "PromptRegistry", template_id: str, language: str) -> GenerationProfile:
+    profile = registry.generation_profile(template_id, language)
+    overrides = _overrides()
+    for key in ("*", template_id, f"*:{language}", f"{template_id}:{language}"):
+        if key in overrides:
+            profile = profile.merged(overrides[key])
+    return profile
+
+
+class UsageTracker:
+    """Thread-safe token counters per usage tag and model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_tag: Dict[str, Dict[str, int]] = {}
+        self._by_model: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def _add(bucket: Dict[str, int], prompt_tokens: int, completion_tokens: int, reported: bool) -> None:
+        bucket["requests"] = bucket.get("requests", 0) + 1
+        bucket["unreported"] = bucket.get("unreported", 0) + (0 if reported else 1)
+        bucket["prompt_tokens"] = bucket.get("prompt_tokens", 0) + prompt_tokens
+        bucket["completion_tokens"] = bucket.get("completion_tokens", 0) + completion_tokens
+
+    def record(self, tag: Optional[str], model: str, usage: Any) -> None:
+        """Record a response's `usage` (None when the provider did not report it)."""
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        with self._lock:
+            self._add(self._by_tag.setdefault(tag or "untagged", {}), prompt_tokens, completion_tokens, usage is not None)
+            self._add(self._by_model.setdefault(model, {}), prompt_tokens, completion_tokens, usage is not None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "by_template": {tag: dict(bucket) for tag, bucket in self._by_tag.items()},
+                "by_model": {model: dict(bucket) for model, bucket in self._by_model.items()},
+            }
+
+
+usage_tracker = UsageTracker()
@@ -0,0 +1,419 @@
+"""
+Background generation jobs.
+
+`POST /api/jobs` enqueues a job and returns immediately; a bounded pool of
+asyncio workers runs the generation pipeline and `GET /api/jobs/{id}` polls the
+status or result. The queue backend is pluggable: an in-memory queue for a
+single process, or a SQLite queue that every worker process on the host shares
+(and that survives restarts).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from backend.config import settings
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class Job:
+    id: str
+    user_id: str
+    payload: Dict[str, Any]
+    status: str = JOB_QUEUED
+    created_at: str = ""
+    updated_at: str = ""
+    finished_at: float = 0.0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def to_public_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueueBackend(ABC):
+    """Storage and ordering for jobs; implementations must be thread-safe."""
+
+    # True when queued jobs outlive the process, so a job interrupted by
+    # shutdown can be requeued instead of failed.
+    durable = False
+
+    @abstractmethod
+    def enqueue(self, job: Job, max_depth: int) -> None:
+        """Store a queued job, raising QueueFullError if `max_depth` jobs are already waiting."""
+
+    @abstractmethod
+    def claim(self) -> Optional[Job]:
+        """Atomically move the oldest queued job to running and return it."""
+
+    def renew(self, job_id: str) -> None:
+        """Extend this process's claim on a running job (durable backends only)."""
+
+    def requeue(self, job_id: str) -> None:
+        """Return a running job claimed by this process to the queue (durable backends only)."""
+
+    @abstractmethod
+    def finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def fail(self, job_id: str, error: str) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    def depth(self) -> int:
+        """Number of jobs waiting to be claimed."""
+
+    @abstractmethod
+    def prune(self, older_than_seconds: float) -> None:
+        """Forget finished jobs older than the retention window."""
+
+
+class InMemoryJobQueue(JobQueueBackend):
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Deque[str] = deque()
+        self._lock = threading.Lock()
+
+    def enqueue(self, job: Job, max_depth: int) -> None:
+        with self._lock:
+            if len(self._queue) >= max_depth:
+                raise QueueFullError("Job queue is full")
+            self._jobs[job.id] = job
+            self._queue.append(job.id)
+
+    def claim(self) -> Optional[Job]:
+        with self._lock:
+            if not self._queue:
+                return None
+            job = self._jobs[self._queue.popleft()]
+            job.status = JOB_RUNNING
+            job.updated_at = _now_iso()
+            return job
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._complete(job_id, JOB_SUCCEEDED, result=result)
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._complete(job_id, JOB_FAILED, error=error)
+
+    def _complete(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+                  error: Optional[str] = None) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.status = status
+            job.result = result
+            job.error = error
+            job.updated_at = _now_iso()
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def prune(self, older_than_seconds: float) -> None:
+        cutoff = time.time() - older_than_seconds
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+                del self._jobs[job_id]
+
+
+class SQLiteJobQueue(JobQueueBackend):
+    """
+    Job queue in a SQLite file (WAL mode) shared by all worker processes on the
+    host. A claimed job carries its claimant and a lease that the claimant
+    renews while the job runs; a job whose lease has lapsed (its process
+    crashed) is claimed again, while jobs held by live processes are left alone.
+    """
+
+    durable = True
+
+    def __init__(self, path: str, lease_seconds: float = 60.0):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                finished_at REAL NOT NULL DEFAULT 0,
+                claimed_by TEXT,
+                lease_expires_at REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        # Queue files created before leases existed
+        if "claimed_by" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN claimed_by TEXT")
+        if "lease_expires_at" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN lease_expires_at REAL NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, job: Job, max_depth: int) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            (depth,) = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (JOB_QUEUED,)).fetchone()
+            if depth >= max_depth:
+                raise QueueFullError("Job queue is full")
+            conn.execute(
+                "INSERT INTO jobs (id, user_id, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, job.user_id, json.dumps(job.payload), job.status, job.created_at, job.updated_at),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def claim(self) -> Optional[Job]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            # Queued jobs, or running jobs whose claimant stopped renewing its lease
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? OR (status = ? AND lease_expires_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (JOB_QUEUED, JOB_RUNNING, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, claimed_by = ?, lease_expires_at = ? WHERE id = ?",
+                (JOB_RUNNING, _now_iso(), self.owner, now + self.lease_seconds, row[0]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row[0])
+
+    def renew(self, job_id: str) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND status = ? AND claimed_by = ?",
+            (time.time() + self.lease_seconds, job_id, JOB_RUNNING, self.owner),
+        )
+
+    def requeue(self, job_id: str) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, updated_at = ?, claimed_by = NULL, lease_expires_at = 0 "
+            "WHERE id = ? AND status = ? AND claimed_by = ?",
+            (JOB_QUEUED, _now_iso(), job_id, JOB_RUNNING, self.owner),
+        )
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._complete(job_id, JOB_SUCCEEDED, result=json.dumps(result), error=None)
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._complete(job_id, JOB_FAILED, result=None, error=error)
+
+    def _complete(self, job_id: str, status: str, result: Optional[str], error: Optional[str]) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+            (status, result, error, _now_iso(), time.time(), job_id),
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._conn().execute(
+            "SELECT id, user_id, payload, status, result, error, created_at, updated_at, finished_at "
+            "FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        return Job(
+            id=row[0],
+            user_id=row[1],
+            payload=json.loads(row[2]),
+            status=row[3],
+            result=json.loads(row[4]) if row[4] else None,
+            error=row[5],
+            created_at=row[6],
+            updated_at=row[7],
+            finished_at=row[8],
+        )
+
+    def depth(self) -> int:
+        (depth,) = self._conn().execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (JOB_QUEUED,)).fetchone()
+        return depth
+
+    def prune(self, older_than_seconds: float) -> None:
+        self._conn().execute(
+            "DELETE FROM jobs WHERE finished_at > 0 AND finished_at < ?", (time.time() - older_than_seconds,)
+        )
+
+
+JobRunner = Callable[[Job], Awaitable[Dict[str, Any]]]
+
+
+class JobManager:
+    """Runs queued jobs on a bounded pool of asyncio worker tasks."""
+
+    def __init__(self, backend: JobQueueBackend, runner: JobRunner, workers: int, max_depth: int,
+                 result_ttl_seconds: float, poll_interval: float = 1.0):
+        self.backend = backend
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.max_depth = max(1, max_depth)
+        self.result_ttl_seconds = result_ttl_seconds
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        print(f"Job workers started: {self.workers} (queue limit {self.max_depth})")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def has_capacity(self) -> bool:
+        return self.backend.depth() < self.max_depth
+
+    def submit(self, user_id: str, payload: Dict[str, Any]) -> Job:
+        now = _now_iso()
+        job = Job(id=uuid.uuid4().hex, user_id=user_id, payload=payload, created_at=now, updated_at=now)
+        self.backend.prune(self.result_ttl_seconds)
+        self.backend.enqueue(job, self.max_depth)
+        if self._loop is not None and self._wakeup is not None:
+            # submit() usually runs in a worker thread and asyncio.Event is not thread-safe.
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.backend.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "workers": self.workers,
+            "queue_depth": self.backend.depth(),
+            "max_depth": self.max_depth,
+        }
+
+    async def _worker(self, index: int) -> None:
+        assert self._wakeup is not None
+        while True:
+            try:
+                job = await asyncio.to_thread(self.backend.claim)
+            except Exception as e:
+                print(f"Job worker {index} failed to claim a job: {e}")
+                job = None
+            if job is None:
+                # Woken by submit() for in-process jobs; the timeout picks up
+                # jobs enqueued by other processes sharing a SQLite queue.
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            print(f"Job {job.id} started on worker {index}")
+            heartbeat = asyncio.create_task(self._renew_lease(job.id))
+            try:
+                result = await self.runner(job)
+            except asyncio.CancelledError:
+                if self.backend.durable:
+                    # Another process (or this one after a restart) runs it; the credit stays charged.
+                    await asyncio.to_thread(self.backend.requeue, job.id)
+                    print(f"Job {job.id} requeued by server shutdown")
+                else:
+                    await asyncio.to_thread(self.backend.fail, job.id, "Job cancelled by server shutdown")
+                raise
+            except Exception as e:
+                detail = getattr(e, "detail", None) or str(e)
+                print(f"Job {job.id} failed: {type(e).__name__}: {detail}")
+                await asyncio.to_thread(self.backend.fail, job.id, str(detail))
+            else:
+                await asyncio.to_thread(self.backend.finish, job.id, result)
+                print(f"Job {job.id} finished")
+            finally:
+                heartbeat.cancel()
+
+    async def _renew_lease(self, job_id: str) -> None:
+        interval = getattr(self.backend, "lease_seconds", 0) / 3
+        if interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.backend.renew, job_id)
+            except Exception as e:
+                print(f"Failed to renew the lease on job {job_id}: {e}")
+
+
+def create_job_queue_backend() -> JobQueueBackend:
+    if settings.JOB_QUEUE_BACKEND == "sqlite":
+        return SQLiteJobQueue(settings.JOB_QUEUE_DB_PATH, lease_seconds=settings.JOB_LEASE_SECONDS)
+    return InMemoryJobQueue()
@@ -0,0 +1,173 @@
+"""
+Process-wide cap on in-flight LLM completions.
+
+Completions are started both from worker threads (the synchronous client used
+by jobs, map-reduce and the thread pool) and from the event loop (the async
+client), so the limiter is a FIFO semaphore that both can wait on: threads
+block on an Event, coroutines await a Future, and a released slot is handed
+directly to the oldest waiter of either kind. Every acquisition records how
+long it queued, so `stats()` shows whether workers are waiting on the cap
+(raise LLM_MAX_CONCURRENCY) or the provider (lower it to stay under the
+rate limit).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional
+
+from backend.config import settings
+
+# Wait times kept for the percentile in stats()
+WAIT_SAMPLES = 1024
+
+
+class _Waiter:
+    __slots__ = ("wake", "granted")
+
+    def __init__(self, wake: Callable[[], None]):
+        self.wake = wake
+        self.granted = False
+
+
+class ConcurrencyLimiter:
+    """FIFO semaphore shared by threads and coroutines, with queueing stats."""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.acquired = 0
+        self.abandoned = 0
+        self.max_queue_depth = 0
+        self.max_wait = 0.0
+
+    def _try_acquire(self, wake: Callable[[], None]) -> Optional[_Waiter]:
+        """Take a free slot (returns None) or enqueue a waiter (returns it). Caller holds the lock."""
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return None
+        waiter = _Waiter(wake)
+        self._waiters.append(waiter)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        return waiter
+
+    def _record(self, started: float) -> None:
+        waited = time.monotonic() - started
+        with self._lock:
+            self.acquired += 1
+            self._waits.append(waited)
+            self.max_wait = max(self.max_wait, waited)
+
+    def _withdraw(self, waiter: _Waiter) -> bool:
+        """Dequeue a waiter that gave up. False if a slot was handed to it in the meantime."""
+        with self._lock:
+            if waiter.granted:
+                return False
+            self._waiters.remove(waiter)
+            self.abandoned += 1
+            return True
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """Block the calling thread until a slot is free. Raises TimeoutError."""
+        started = time.monotonic()
+        event = threading.Event()
+        with self._lock:
+            waiter = self._try_acquire(event.set)
+        if waiter is not None and not event.wait(timeout) and self._withdraw(waiter):
+            raise TimeoutError(f"Timed out waiting for a '{self.name}' slot")
+        self._record(started)
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now; never queues."""
+        with self._lock:
+            if self._in_flight >= self.limit or self._waiters:
+                return False
+            self._in_flight += 1
+        self._record(time.monotonic())
+        return True
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> None:
+        """Wait on the event loop until a slot is free. Raises TimeoutError."""
+        if timeout is not None:
+            try:
+                # Cancelling the wait withdraws the waiter (or returns a slot granted meanwhile).
+                await asyncio.wait_for(self.acquire_async(), timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Timed out waiting for a '{self.name}' slot") from None
+            return
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake() -> None:
+            try:
+                loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+            except RuntimeError:
+                # The waiter's loop has closed; pass the slot on instead of leaking it.
+                self.release()
+
+        with self._lock:
+            waiter = self._try_acquire(wake)
+        if waiter is not None:
+            try:
+                await future
+            except asyncio.CancelledError:
+                if not self._withdraw(waiter):
+                    self.release()
+                raise
+        self._record(started)
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                # Hand the slot straight to the oldest waiter; in_flight is unchanged.
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+            else:
+                self._in_flight -= 1
+                return
+        waiter.wake()
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[None]:
+        self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def async_slot(self, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        await self.acquire_async(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                "name": self.name,
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "max_queue_depth": self.max_queue_depth,
+                "acquired": self.acquired,
+                "abandoned": self.abandoned,
+            }
+        stats["avg_wait_ms"] = round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0
+        stats["p95_wait_ms"] = round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 2) if waits else 0.0
+        stats["max_wait_ms"] = round(self.max_wait * 1000, 2)
+        return stats
+
+
+llm_limiter = ConcurrencyLimiter("llm_completions", settings.LLM_MAX_CONCURRENCY)
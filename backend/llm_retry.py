@@ -0,0 +1,124 @@
+"""
+Bounded retries for LLM calls.
+
+A failed attempt is retried after a full-jitter exponential backoff (uniform
+between 0 and min(LLM_RETRY_MAX_DELAY_SECONDS, base * 2^attempt)) while the
+error is transient, fewer than LLM_RETRY_MAX_ATTEMPTS attempts have been made
+and the next attempt can still start inside the total latency budget,
+LLM_RETRY_BUDGET_SECONDS. Attempts receive the budget's deadline so their own
+timeouts (limiter wait, HTTP read) end with it; for a stream that covers
+opening it, up to the first byte, not reading its body. When the policy gives up, the
+caller gets an LLMUnavailableError rather than error text posing as content.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+import openai
+
+from backend.config import settings
+from backend.llm_router import NoHealthyEndpointError
+
+T = TypeVar("T")
+
+# HTTP statuses worth another attempt: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS = frozenset({408, 409, 429})
+
+
+class LLMUnavailableError(RuntimeError):
+    """No completion could be obtained within the retry policy."""
+
+    def __init__(self, message: str, attempts: int = 0):
+        super().__init__(message)
+        self.attempts = attempts
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+    budget: float
+
+    @classmethod
+    def from_settings(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=max(1, settings.LLM_RETRY_MAX_ATTEMPTS),
+            base_delay=settings.LLM_RETRY_BASE_DELAY_SECONDS,
+            max_delay=settings.LLM_RETRY_MAX_DELAY_SECONDS,
+            budget=settings.LLM_RETRY_BUDGET_SECONDS,
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay after the `attempt`-th failure (1-based)."""
+        return random.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+def is_transient(error: BaseException) -> bool:
+    """True for failures another attempt may not hit (network, timeouts, 429, 5xx)."""
+    if isinstance(error, NoHealthyEndpointError):
+        # Every breaker is open; retrying inside the cooldown cannot succeed.
+        return False
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return isinstance(error, (openai.APIConnectionError, httpx.TransportError, TimeoutError, ConnectionError))
+
+
+def remaining(deadline: float) -> float:
+    return max(0.0, deadline - time.monotonic())
+
+
+def _next_delay(policy: RetryPolicy, attempt: int, deadline: float, error: Exception) -> Optional[float]:
+    if attempt >= policy.max_attempts or not is_transient(error):
+        return None
+    delay = policy.backoff(attempt)
+    if time.monotonic() + delay >= deadline:
+        return None
+    return delay
+
+
+def _give_up(label: str, attempt: int, error: Exception) -> LLMUnavailableError:
+    print(f"{label} failed after {attempt} attempt(s): {type(error).__name__}: {error}")
+    return LLMUnavailableError(f"{label} failed after {attempt} attempt(s): {error}", attempts=attempt)
+
+
+def call_with_retries(fn: Callable[[float], T], label: str = "LLM request",
+                      policy: Optional[RetryPolicy] = None) -> T:
+    """Run `fn(deadline)` under the retry policy; `deadline` is a `time.monotonic()` value."""
+    policy = policy or RetryPolicy.from_settings()
+    deadline = time.monotonic() + policy.budget
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return fn(deadline)
+        except Exception as e:
+            delay = _next_delay(policy, attempt, deadline, e)
+            if delay is None:
+                raise _give_up(label, attempt, e) from e
+            print(f"{label} attempt {attempt} failed ({type(e).__name__}); retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+
+async def acall_with_retries(fn: Callable[[float], Awaitable[T]], label: str = "LLM request",
+                             policy: Optional[RetryPolicy] = None) -> T:
+    """Async `call_with_retries`."""
+    policy = policy or RetryPolicy.from_settings()
+    deadline = time.monotonic() + policy.budget
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return await fn(deadline)
+        except Exception as e:
+            delay = _next_delay(policy, attempt, deadline, e)
+            if delay is None:
+                raise _give_up(label, attempt, e) from e
+            print(f"{label} attempt {attempt} failed ({type(e).__name__}); retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
@@ -0,0 +1,374 @@
+"""
+Latency-aware routing across OpenAI-compatible LLM endpoints.
+
+Each endpoint keeps an EWMA of its completion latency and error rate, and a
+request goes to the endpoint with the lowest expected time to a successful
+answer (latency / (1 - error rate)). Endpoints that have never been used score
+zero, so each one is tried early, and a small share of requests goes to a
+random healthy endpoint so that stale estimates get refreshed. Only
+transient errors count as failures; a request the endpoint rejects (400, 404,
+422) says nothing about its health. After LLM_BREAKER_FAILURE_THRESHOLD
+consecutive failures an endpoint's circuit breaker opens and it is skipped
+for LLM_BREAKER_COOLDOWN_SECONDS. Then the next request is sent to it as a
+probe (half-open): success closes the breaker and clears its error history,
+failure opens it again.
+
+With hedging enabled, a request still running after the recent p95 latency
+is duplicated to the next-best endpoint, and whichever answers first wins.
+That trades a few percent of extra calls for a much shorter tail. The
+duplicate needs its own slot from the concurrency limiter, taken only if one
+is free (hedging never queues), and holds it until both requests have ended,
+so a losing request still running in the background counts against the cap.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, TypeVar
+
+from backend.config import settings
+from backend.llm_limiter import ConcurrencyLimiter
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Latency samples kept for the hedging percentile
+LATENCY_SAMPLES = 256
+# Hedging starts once this many latencies have been observed
+HEDGE_MIN_SAMPLES = 20
+# Share of requests routed to a random healthy endpoint instead of the best one
+EXPLORE_PROBABILITY = 0.05
+
+
+class NoHealthyEndpointError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class EndpointConfig:
+    name: str
+    base_url: str
+    api_key: str
+    model: Optional[str] = None
+
+
+class Endpoint:
+    """Routing state of one endpoint. Mutated only under the router's lock."""
+
+    def __init__(self, config: EndpointConfig):
+        self.config = config
+        self.name = config.name
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        # Per-endpoint clients are attached by the caller (see LLMService)
+        self.clients: Dict[str, Any] = {}
+
+    def expected_latency(self) -> float:
+        if self.latency_ewma is None:
+            return 0.0
+        return self.latency_ewma / max(0.05, 1.0 - self.error_ewma)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "base_url": self.config.base_url,
+            "model": self.config.model,
+            "state": self.state,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "error_rate_ewma": round(self.error_ewma, 3),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+class LLMRouter:
+    """Pick, track and fail over between endpoints; see the module docstring."""
+
+    def __init__(self, endpoints: Sequence[EndpointConfig], ewma_alpha: Optional[float] = None,
+                 failure_threshold: Optional[int] = None, cooldown_seconds: Optional[float] = None,
+                 hedge: Optional[bool] = None, hedge_percentile: Optional[float] = None,
+                 hedge_min_delay: Optional[float] = None, limiter: Optional[ConcurrencyLimiter] = None):
+        if not endpoints:
+            raise ValueError("At least one LLM endpoint is required")
+        self.endpoints = [Endpoint(config) for config in endpoints]
+        self.alpha = settings.LLM_ROUTER_EWMA_ALPHA if ewma_alpha is None else ewma_alpha
+        self.failure_threshold = (
+            settings.LLM_BREAKER_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        )
+        self.cooldown = settings.LLM_BREAKER_COOLDOWN_SECONDS if cooldown_seconds is None else cooldown_seconds
+        self.hedge = settings.LLM_HEDGE_ENABLED if hedge is None else hedge
+        self.hedge_percentile = settings.LLM_HEDGE_PERCENTILE if hedge_percentile is None else hedge_percentile
+        self.hedge_min_delay = settings.LLM_HEDGE_MIN_DELAY_SECONDS if hedge_min_delay is None else hedge_min_delay
+        # Callers hold one slot per call; a hedge takes a second one from here.
+        self.limiter = limiter
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ---- selection and bookkeeping ----
+
+    def _available(self, endpoint: Endpoint, now: float) -> bool:
+        if endpoint.state == CLOSED:
+            return True
+        if endpoint.state == OPEN and now - endpoint.opened_at >= self.cooldown:
+            endpoint.state = HALF_OPEN
+            endpoint.probing = False
+        return endpoint.state == HALF_OPEN and not endpoint.probing
+
+    def acquire(self, exclude: Sequence[Endpoint] = ()) -> Endpoint:
+        """Choose the endpoint with the lowest expected latency and mark a request started."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e not in exclude and self._available(e, now)]
+            if not candidates:
+                raise NoHealthyEndpointError("All LLM endpoints are unavailable (circuit open)")
+            probes = [e for e in candidates if e.state == HALF_OPEN]
+            if probes:
+                endpoint = probes[0]
+                endpoint.probing = True
+            elif len(candidates) > 1 and random.random() < EXPLORE_PROBABILITY:
+                endpoint = random.choice(candidates)
+            else:
+                # Ties (e.g. untried endpoints) go to the least loaded one.
+                endpoint = min(candidates, key=lambda e: (e.expected_latency(), e.in_flight))
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _ewma(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else current + self.alpha * (sample - current)
+
+    def record_success(self, endpoint: Endpoint, latency: Optional[float] = None) -> None:
+        """Finish a request. Pass `latency=None` when the duration is not comparable (streams)."""
+        with self._lock:
+            endpoint.in_flight -= 1
+            if endpoint.state != CLOSED:
+                print(f"LLM endpoint '{endpoint.name}' recovered")
+                endpoint.error_ewma = 0.0
+            endpoint.error_ewma = self._ewma(endpoint.error_ewma, 0.0)
+            endpoint.consecutive_failures = 0
+            endpoint.state = CLOSED
+            endpoint.probing = False
+            if latency is not None:
+                endpoint.latency_ewma = self._ewma(endpoint.latency_ewma, latency)
+                self._latencies.append(latency)
+
+    def record_failure(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.failures += 1
+            endpoint.error_ewma = self._ewma(endpoint.error_ewma, 1.0)
+            endpoint.consecutive_failures += 1
+            if endpoint.state == HALF_OPEN or endpoint.consecutive_failures >= self.failure_threshold:
+                if endpoint.state != OPEN:
+                    print(f"LLM endpoint '{endpoint.name}' ejected for {self.cooldown:.0f}s")
+                endpoint.state = OPEN
+                endpoint.opened_at = time.monotonic()
+                endpoint.probing = False
+
+    def record_cancelled(self, endpoint: Endpoint) -> None:
+        """A hedged request lost the race; it says nothing about the endpoint's health."""
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.probing = False
+
+    def record_error(self, endpoint: Endpoint, error: BaseException) -> None:
+        """
+        Finish a request that raised. Only transient errors (network, timeouts,
+        429, 5xx) count against the endpoint; a request it rejected (400, 404,
+        422) was answered, so it neither trips the breaker nor fails a probe.
+        """
+        # llm_retry imports this module for NoHealthyEndpointError.
+        from backend.llm_retry import is_transient
+
+        if is_transient(error):
+            self.record_failure(endpoint)
+        else:
+            self.record_cancelled(endpoint)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off or there is no baseline yet."""
+        if not self.hedge or len(self.endpoints) < 2:
+            return None
+        with self._lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            samples = sorted(self._latencies)
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_percentile / 100.0))
+        return max(self.hedge_min_delay, samples[index])
+
+    # ---- calling ----
+
+    def _hedge_slot(self) -> bool:
+        """Take a limiter slot for a hedged request if one is free right now."""
+        return self.limiter is None or self.limiter.try_acquire()
+
+    def _release_when_done(self, futures: Sequence[Any]) -> None:
+        """Release the hedge's slot once every attempt has ended, winner or loser."""
+        if self.limiter is None:
+            return
+        pending = [len(futures)]
+        lock = threading.Lock()
+
+        def done(_future: Any) -> None:
+            with lock:
+                pending[0] -= 1
+                last = pending[0] == 0
+            if last:
+                self.limiter.release()
+
+        for future in futures:
+            future.add_done_callback(done)
+
+    def _attempt(self, endpoint: Endpoint, fn: Callable[[Endpoint], T]) -> T:
+        started = time.monotonic()
+        try:
+            result = fn(endpoint)
+        except Exception as e:
+            self.record_error(endpoint, e)
+            raise
+        self.record_success(endpoint, time.monotonic() - started)
+        return result
+
+    def call(self, fn: Callable[[Endpoint], T]) -> T:
+        """Run `fn(endpoint)` on the best endpoint, hedging to a second one past the p95."""
+        primary = self.acquire()
+        delay = self.hedge_delay()
+        if delay is None:
+            return self._attempt(primary, fn)
+
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+        first = self._executor.submit(self._attempt, primary, fn)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        if not self._hedge_slot():
+            return first.result()
+        try:
+            backup = self.acquire(exclude=[primary])
+        except NoHealthyEndpointError:
+            if self.limiter is not None:
+                self.limiter.release()
+            return first.result()
+        self.hedged += 1
+        print(f"Hedging LLM request to '{backup.name}' after {delay:.2f}s")
+        second = self._executor.submit(self._attempt, backup, fn)
+        self._release_when_done([first, second])
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self.hedge_wins += 1
+                    # The slower call finishes in the background; its result is discarded.
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def acall(self, fn: Callable[[Endpoint], Awaitable[T]]) -> T:
+        """Async `call`: the losing hedged request is cancelled instead of left running."""
+        primary = self.acquire()
+
+        async def attempt(endpoint: Endpoint) -> T:
+            started = time.monotonic()
+            try:
+                result = await fn(endpoint)
+            except asyncio.CancelledError:
+                self.record_cancelled(endpoint)
+                raise
+            except Exception as e:
+                self.record_error(endpoint, e)
+                raise
+            self.record_success(endpoint, time.monotonic() - started)
+            return result
+
+        delay = self.hedge_delay()
+        if delay is None:
+            return await attempt(primary)
+
+        tasks = [asyncio.ensure_future(attempt(primary))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self._hedge_slot():
+                try:
+                    backup = self.acquire(exclude=[primary])
+                except NoHealthyEndpointError:
+                    if self.limiter is not None:
+                        self.limiter.release()
+                    return await tasks[0]
+                self.hedged += 1
+                print(f"Hedging LLM request to '{backup.name}' after {delay:.2f}s")
+                tasks.append(asyncio.ensure_future(attempt(backup)))
+                self._release_when_done(tasks)
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Also runs when the caller is cancelled, so no attempt is left behind.
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = [endpoint.stats() for endpoint in self.endpoints]
+        delay = self.hedge_delay()
+        return {
+            "endpoints": endpoints,
+            "hedging": self.hedge,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+def endpoint_configs_from_settings() -> List[EndpointConfig]:
+    """
+    LLM_ENDPOINTS is a JSON list of {"name", "base_url", "api_key", "model"?}
+    objects; an endpoint's "model" is used for every request it serves, in
+    place of the template's model. Without it, the single Nebius endpoint from NEBIUS_API_KEY is used.
+    """
+    if settings.LLM_ENDPOINTS:
+        return [
+            EndpointConfig(
+                name=item.get("name") or item["base_url"],
+                base_url=item["base_url"],
+                api_key=item["api_key"],
+                model=item.get("model"),
+            )
+            for item in json.loads(settings.LLM_ENDPOINTS)
+        ]
+    return [EndpointConfig(name="nebius", base_url=settings.NEBIUS_BASE_URL, api_key=settings.NEBIUS_API_KEY or "")]
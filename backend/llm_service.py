@@ -1,55 +1,330 @@
+import asyncio
+import hashlib
+import json
 import os
-from openai import OpenAI
-from typing import Optional
+import httpx
+from openai import AsyncOpenAI, OpenAI
+from typing import Any, AsyncIterator, Iterator, List, Dict, Optional
 from backend.config import settings
+from backend.llm_limiter import llm_limiter
+from backend.llm_router import Endpoint, LLMRouter, endpoint_configs_from_settings
+from backend.generation_profiles import GenerationProfile, usage_tracker
+from backend.llm_retry import LLMUnavailableError, acall_with_retries, call_with_retries, remaining
+from backend.singleflight import async_single_flight, single_flight
+
+
+def _http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=settings.LLM_CONNECT_TIMEOUT,
+        read=settings.LLM_READ_TIMEOUT,
+        write=settings.LLM_CONNECT_TIMEOUT,
+        pool=settings.LLM_READ_TIMEOUT,
+    )
+
+
+def _http_limits() -> httpx.Limits:
+    # Keep enough warm connections for every permitted in-flight completion.
+    return httpx.Limits(
+        max_connections=max(settings.LLM_POOL_MAX_CONNECTIONS, settings.LLM_MAX_CONCURRENCY),
+        max_keepalive_connections=max(settings.LLM_POOL_MAX_CONNECTIONS, settings.LLM_MAX_CONCURRENCY),
+        keepalive_expiry=settings.LLM_POOL_KEEPALIVE_SECONDS,
+    )
+
+
+def _attempt_timeout(deadline: float) -> httpx.Timeout:
+    """The configured timeouts, cut short so an attempt ends with the retry budget."""
+    left = max(0.001, remaining(deadline))
+    return httpx.Timeout(
+        connect=min(settings.LLM_CONNECT_TIMEOUT, left),
+        read=min(settings.LLM_READ_TIMEOUT, left),
+        write=min(settings.LLM_CONNECT_TIMEOUT, left),
+        pool=left,
+    )
+
+
+def _release_read_timeout(stream: Any) -> None:
+    """
+    Give an opened stream's body reads the configured read timeout again.
+    The retry deadline bounds connecting and the first byte only; httpcore
+    reads the request's timeout dict on every body read.
+    """
+    response = getattr(stream, "response", None)
+    timeout = response.request.extensions.get("timeout") if response is not None else None
+    if isinstance(timeout, dict):
+        timeout["read"] = settings.LLM_READ_TIMEOUT
 
 class LLMService:
     """
-    A service to interact with a Large Language Model via the Nebius AI Studio API.
+    A service to interact with a Large Language Model via the Nebius AI Studio API
+    (or any OpenAI-compatible endpoints listed in LLM_ENDPOINTS, see LLMRouter).
     """
     def __init__(self):
         """
         Initializes the LLM service client.
-        Raises ValueError if the NEBIUS_API_KEY is not configured.
+        Raises ValueError if neither NEBIUS_API_KEY nor LLM_ENDPOINTS is configured.
         """
-        if not settings.has_nebius_api:
+        if not settings.has_llm_endpoints:
             print("ERROR: NEBIUS_API_KEY is not configured in the .env file.")
             raise ValueError("NEBIUS_API_KEY is not configured.")
         
-        self.client = OpenAI(
-            base_url="https://api.studio.nebius.ai/v1/",
-            api_key=settings.NEBIUS_API_KEY,
-        )
+        self.router = LLMRouter(endpoint_configs_from_settings(), limiter=llm_limiter)
         # Model specified in the user's example
         self.model = "meta-llama/Llama-3.3-70B-Instruct"
+        self.temperature = 0.7  # A bit of creativity
+        self.max_tokens = 3072  # Generous token limit for detailed blogs
+        self._flight = single_flight("llm_completions")
+        self._async_flight = async_single_flight("llm_completions_async")
         print("LLM Service initialized successfully with Nebius AI Studio.")
 
-    def generate_content(self, system_prompt: str, user_prompt: str) -> str:
+    def generate_content(self, system_prompt: str, user_prompt: str, max_tokens: Optional[int] = None,
+                         profile: Optional[GenerationProfile] = None, usage_tag: Optional[str] = None) -> str:
         """
         Generates content using the configured LLM.
 
         Args:
             system_prompt: The instructions for the AI's role and behavior.
             user_prompt: The specific request or data for the AI to process.
+            max_tokens: Output token limit for this call (overrides the profile).
+            profile: Model, max_tokens and temperature for this call; unset fields
+                use the service defaults.
+            usage_tag: Label the token usage is recorded under (the template id).
 
         Returns:
-            The generated content as a string, or an error message if generation fails.
+            The generated content as a string.
+
+        Raises:
+            LLMUnavailableError: if no attempt succeeded within the retry policy
+                (see backend.llm_retry).
+        """
+        params = self._resolve(profile, max_tokens)
+        # Identical prompts in flight at the same time share one completion
+        key = self._completion_key(system_prompt, user_prompt, params)
+        return self._flight.do(key, self._complete, system_prompt, user_prompt, params, usage_tag)
+
+    async def agenerate_content(self, system_prompt: str, user_prompt: str, max_tokens: Optional[int] = None,
+                                profile: Optional[GenerationProfile] = None, usage_tag: Optional[str] = None) -> str:
+        """
+        Async counterpart of `generate_content` for use on the event loop.
+        The request waits on the shared connection pool instead of occupying a thread.
+        """
+        params = self._resolve(profile, max_tokens)
+        key = self._completion_key(system_prompt, user_prompt, params)
+        return await self._async_flight.do(key, self._acomplete, system_prompt, user_prompt, params, usage_tag)
+
+    def _resolve(self, profile: Optional[GenerationProfile], max_tokens: Optional[int] = None) -> GenerationProfile:
+        """Fill in service defaults. The model stays None when unset so endpoint defaults apply."""
+        profile = profile or GenerationProfile()
+        return GenerationProfile(
+            model=profile.model,
+            max_tokens=max_tokens or profile.max_tokens or self.max_tokens,
+            temperature=self.temperature if profile.temperature is None else profile.temperature,
+        )
+
+    def _completion_key(self, system_prompt: str, user_prompt: str, params: GenerationProfile) -> str:
+        return hashlib.sha256(
+            json.dumps([self.model, params.to_dict(), system_prompt, user_prompt]).encode("utf-8")
+        ).hexdigest()
+
+    def _messages(self, system_prompt: str, user_prompt: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+    def _client(self, endpoint: Endpoint) -> OpenAI:
+        client = endpoint.clients.get("sync")
+        if client is None:
+            client = endpoint.clients.setdefault("sync", OpenAI(
+                base_url=endpoint.config.base_url,
+                api_key=endpoint.config.api_key,
+                timeout=_http_timeout(),
+                # Failover and retries are decided by the router, which must see every failure.
+                max_retries=0,
+                http_client=httpx.Client(timeout=_http_timeout(), limits=_http_limits()),
+            ))
+        return client
+
+    def _async_client(self, endpoint: Endpoint) -> AsyncOpenAI:
+        # Created on first use so it binds to the running event loop
+        client = endpoint.clients.get("async")
+        if client is None:
+            client = endpoint.clients.setdefault("async", AsyncOpenAI(
+                base_url=endpoint.config.base_url,
+                api_key=endpoint.config.api_key,
+                timeout=_http_timeout(),
+                # Failover and retries are decided by the router, which must see every failure.
+                max_retries=0,
+                http_client=httpx.AsyncClient(timeout=_http_timeout(), limits=_http_limits()),
+            ))
+        return client
+
+    def _model_for(self, endpoint: Endpoint, params: GenerationProfile) -> str:
+        # An endpoint pinned to a model (LLM_ENDPOINTS "model") may not serve the
+        # template's model, so the pin wins; templates choose on unpinned endpoints.
+        return endpoint.config.model or params.model or self.model
+
+    def _request(self, endpoint: Endpoint, system_prompt: str, user_prompt: str,
+                 params: GenerationProfile, deadline: Optional[float] = None) -> Dict[str, Any]:
+        request = {
+            "model": self._model_for(endpoint, params),
+            "messages": self._messages(system_prompt, user_prompt),
+            "temperature": params.temperature,
+            "max_tokens": params.max_tokens,
+        }
+        if deadline is not None:
+            request["timeout"] = _attempt_timeout(deadline)
+        return request
+
+    def _complete(self, system_prompt: str, user_prompt: str, params: GenerationProfile,
+                  usage_tag: Optional[str] = None) -> str:
+        def attempt(deadline: float):
+            # The slot is released between attempts so backoff does not hold capacity.
+            with llm_limiter.slot(timeout=remaining(deadline)):
+                return self.router.call(lambda endpoint: self._client(endpoint).chat.completions.create(
+                    **self._request(endpoint, system_prompt, user_prompt, params, deadline)
+                ))
+
+        print(f"Sending prompt to LLM ('{params.model or self.model}')...")
+        completion = call_with_retries(attempt, "LLM generation")
+        print("LLM response received.")
+        usage_tracker.record(usage_tag, completion.model or params.model or self.model, completion.usage)
+        return completion.choices[0].message.content or ""
+
+    async def _acomplete(self, system_prompt: str, user_prompt: str, params: GenerationProfile,
+                         usage_tag: Optional[str] = None) -> str:
+        async def attempt(deadline: float):
+            async with llm_limiter.async_slot(timeout=remaining(deadline)):
+                return await self.router.acall(lambda endpoint: self._async_client(endpoint).chat.completions.create(
+                    **self._request(endpoint, system_prompt, user_prompt, params, deadline)
+                ))
+
+        print(f"Sending prompt to LLM ('{params.model or self.model}', async)...")
+        completion = await acall_with_retries(attempt, "LLM generation")
+        print("LLM response received.")
+        usage_tracker.record(usage_tag, completion.model or params.model or self.model, completion.usage)
+        return completion.choices[0].message.content or ""
+
+    def stream_content(self, system_prompt: str, user_prompt: str, profile: Optional[GenerationProfile] = None,
+                       usage_tag: Optional[str] = None) -> Iterator[str]:
         """
+        Streams generated content as it arrives from the LLM.
+
+        Yields:
+            Text deltas in generation order. Errors are raised rather than
+            returned as content so the caller can report them out of band.
+            Opening the stream is retried under the retry policy (raising
+            LLMUnavailableError when it gives up); once text has been
+            yielded, a failure is raised as is.
+        """
+        params = self._resolve(profile)
+        print(f"Streaming prompt to LLM ('{params.model or self.model}')...")
+
+        def open_stream(deadline: float):
+            # Each attempt waits for its own slot within the budget; the slot of the
+            # attempt that opens the stream is held until the stream is read or closed.
+            llm_limiter.acquire(timeout=remaining(deadline))
+            try:
+                endpoint = self.router.acquire()
+                try:
+                    stream = self._client(endpoint).chat.completions.create(
+                        **self._request(endpoint, system_prompt, user_prompt, params, deadline), stream=True
+                    )
+                except Exception as e:
+                    self.router.record_error(endpoint, e)
+                    raise
+            except BaseException:
+                llm_limiter.release()
+                raise
+            _release_read_timeout(stream)
+            return endpoint, stream
+
+        # Streams are not hedged, and their duration is not a latency sample, only a health signal.
+        endpoint, stream = call_with_retries(open_stream, "LLM stream")
         try:
-            print(f"Sending prompt to LLM ('{self.model}')...")
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.7,  # A bit of creativity
-                max_tokens=3072, # Generous token limit for detailed blogs
-            )
-            print("LLM response received.")
-            return completion.choices[0].message.content
-        except Exception as e:
-            error_message = f"LLM generation failed: {e}"
-            print(error_message)
-            # Return a user-friendly error message in Markdown format
-            return f"## Error During Blog Generation\n\nAn error occurred while communicating with the AI model:\n\n`{str(e)}`" 
\ No newline at end of file
+            try:
+                usage = None
+                try:
+                    for chunk in stream:
+                        # Providers that report usage on streams send it on the final chunk.
+                        usage = getattr(chunk, "usage", None) or usage
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            yield delta
+                    print("LLM stream finished.")
+                    usage_tracker.record(usage_tag, self._model_for(endpoint, params), usage)
+                finally:
+                    stream.close()
+            except GeneratorExit:
+                self.router.record_cancelled(endpoint)
+                raise
+            except Exception as e:
+                self.router.record_error(endpoint, e)
+                raise
+            self.router.record_success(endpoint)
+        finally:
+            llm_limiter.release()
+
+    async def astream_content(self, system_prompt: str, user_prompt: str,
+                              profile: Optional[GenerationProfile] = None,
+                              usage_tag: Optional[str] = None) -> AsyncIterator[str]:
+        """Async counterpart of `stream_content`; errors are raised, not returned."""
+        params = self._resolve(profile)
+        print(f"Streaming prompt to LLM ('{params.model or self.model}', async)...")
+
+        async def open_stream(deadline: float):
+            await llm_limiter.acquire_async(timeout=remaining(deadline))
+            try:
+                endpoint = self.router.acquire()
+                try:
+                    stream = await self._async_client(endpoint).chat.completions.create(
+                        **self._request(endpoint, system_prompt, user_prompt, params, deadline), stream=True
+                    )
+                except asyncio.CancelledError:
+                    self.router.record_cancelled(endpoint)
+                    raise
+                except Exception as e:
+                    self.router.record_error(endpoint, e)
+                    raise
+            except BaseException:
+                llm_limiter.release()
+                raise
+            _release_read_timeout(stream)
+            return endpoint, stream
+
+        endpoint, stream = await acall_with_retries(open_stream, "LLM stream")
+        try:
+            try:
+                usage = None
+                try:
+                    async for chunk in stream:
+                        usage = getattr(chunk, "usage", None) or usage
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            yield delta
+                    print("LLM stream finished.")
+                    usage_tracker.record(usage_tag, self._model_for(endpoint, params), usage)
+                finally:
+                    await stream.close()
+            except (GeneratorExit, asyncio.CancelledError):
+                self.router.record_cancelled(endpoint)
+                raise
+            except Exception as e:
+                self.router.record_error(endpoint, e)
+                raise
+            self.router.record_success(endpoint)
+        finally:
+            llm_limiter.release()
+
+    async def aclose(self) -> None:
+        """Close pooled connections (called on application shutdown)."""
+        for endpoint in self.router.endpoints:
+            client = endpoint.clients.pop("async", None)
+            if client is not None:
+                await client.close()
+            client = endpoint.clients.pop("sync", None)
+            if client is not None:
+                client.close()
@@ -1,11 +1,13 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi import Request
 from pydantic import BaseModel, HttpUrl
 import asyncio
-from typing import Optional, Dict, Any
+import json
+from typing import Optional, Dict, Any, List, Set, Tuple
 import sys
 import os
 
@@ -16,10 +18,19 @@ sys.path.append(parent_dir)
 
 from backend.youtube_service import YouTubeService
 from backend.config import settings
+from backend.cache import cache_stats
+from backend.singleflight import single_flight_stats
+from backend.llm_limiter import llm_limiter
+from backend.generation_profiles import usage_tracker
+from backend.jobs import Job, JobManager, QueueFullError, create_job_queue_backend
+from backend.llm_service import LLMUnavailableError
 from utils.blog_generator import BlogGenerator
-from backend.auth_dependencies import require_firebase_user
-from backend.credits_service import ensure_user_exists, get_credits, consume_credits
-from backend.projects_service import save_project as save_project_fs, list_projects as list_projects_fs, get_project as get_project_fs
+from backend.auth_dependencies import refresh_signing_keys_periodically, require_firebase_user
+from backend.token_cache import token_cache
+from backend.credits_service import CreditsSnapshot, ensure_user_exists, get_credits, consume_credits, refund_credits
+from backend.credits_service import credit_leases, release_expired_leases_periodically
+from backend.projects_service import save_project as save_project_fs, list_project_summaries, get_project as get_project_fs
+from backend.projects_service import MAX_PROJECTS_PAGE_SIZE, save_projects as save_projects_fs, get_projects as get_projects_fs
 from backend.billing_service import create_checkout_session, handle_webhook
 from pathlib import Path
 
@@ -57,9 +68,26 @@ class VideoRequest(BaseModel):
     language: str = "en"
     fact_cleanup: bool = True
     humanize: bool = True
+    # Bypass the generated-blog cache and produce a fresh result
+    regenerate: bool = False
     # Deprecated. User identity is derived from Firebase ID token.
     user_id: Optional[str] = None
 
+class BatchRequest(BaseModel):
+    urls: List[HttpUrl]
+    template: str = "article"
+    language: str = "en"
+    fact_cleanup: bool = True
+    humanize: bool = True
+    regenerate: bool = False
+
+class ProjectBatchSaveRequest(BaseModel):
+    # Items are validated one by one so a bad item fails alone, not the request
+    projects: List[Any]
+
+class ProjectBatchGetRequest(BaseModel):
+    ids: List[str]
+
 class VideoResponse(BaseModel):
     title: str
     description: str
@@ -80,6 +108,147 @@ class BlogResponse(BaseModel):
     credits_used: int = 1
     credits_remaining: int = 4
     is_code_tutorial: bool = False
+    # True when the LLM was unavailable and `content` is a local extractive summary
+    degraded: bool = False
+
+async def _run_job(job: Job) -> Dict[str, Any]:
+    try:
+        request = VideoRequest(**job.payload)
+        video_id = youtube_service.extract_video_id(str(request.url))
+        if not video_id:
+            raise ValueError("Invalid YouTube URL")
+        result = await _run_generation(request, job.user_id, video_id)
+    except asyncio.CancelledError:
+        # Shutdown: a durable queue reruns the job, otherwise it is lost with the process.
+        if not job_manager.backend.durable:
+            await asyncio.to_thread(refund_credits, job.user_id, 1)
+        raise
+    except Exception:
+        # Failed jobs are not retried, so whatever the cause (LLM unavailable,
+        # no transcript, a bad payload) the credit charged at submit is returned.
+        await asyncio.to_thread(refund_credits, job.user_id, 1)
+        raise
+    if result["degraded"]:
+        await asyncio.to_thread(refund_credits, job.user_id, 1)
+    return result
+
+job_manager = JobManager(
+    backend=create_job_queue_backend(),
+    runner=_run_job,
+    workers=settings.JOB_WORKERS,
+    max_depth=settings.JOB_QUEUE_MAX_DEPTH,
+    result_ttl_seconds=settings.JOB_RESULT_TTL_SECONDS,
+)
+
+_signing_key_refresh: Optional[asyncio.Task] = None
+# Running batch conversions, referenced so they are not garbage-collected mid-run
+_batch_runners: Set[asyncio.Task] = set()
+_lease_reaper: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_job_workers():
+    job_manager.start()
+
+@app.on_event("startup")
+async def start_signing_key_refresh():
+    global _signing_key_refresh
+    if settings.has_firebase_admin and settings.FIREBASE_CERT_REFRESH_SECONDS > 0:
+        _signing_key_refresh = asyncio.create_task(
+            refresh_signing_keys_periodically(settings.FIREBASE_CERT_REFRESH_SECONDS)
+        )
+
+@app.on_event("startup")
+async def start_credit_lease_reaper():
+    global _lease_reaper
+    if credit_leases.enabled:
+        _lease_reaper = asyncio.create_task(
+            release_expired_leases_periodically(min(30.0, settings.CREDIT_LEASE_TTL_SECONDS / 2))
+        )
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    if _signing_key_refresh is not None:
+        _signing_key_refresh.cancel()
+    await job_manager.stop()
+    if _lease_reaper is not None:
+        _lease_reaper.cancel()
+    if credit_leases.enabled:
+        # After the job workers stop, so no charge races the release.
+        returned = await asyncio.to_thread(credit_leases.release_all)
+        print(f"Returned {returned} leased credits")
+    if blog_generator.llm_service:
+        await blog_generator.llm_service.aclose()
+
+async def _fetch_video_and_transcript(video_id: str) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Fetch video metadata and transcript concurrently without blocking the event loop."""
+    return await asyncio.gather(
+        asyncio.to_thread(youtube_service.get_video_metadata, video_id),
+        asyncio.to_thread(youtube_service.get_transcript, video_id),
+    )
+
+async def _charge_credits(uid: str, amount: int, email: Optional[str] = None) -> CreditsSnapshot:
+    """
+    Consume credits off the event loop, mapping an empty balance to HTTP 402.
+    The transaction creates the user document if needed (no ensure_user_exists).
+    """
+    try:
+        return await asyncio.to_thread(consume_credits, uid, amount=amount, email=email)
+    except ValueError as e:
+        if str(e) == "INSUFFICIENT_CREDITS":
+            raise HTTPException(status_code=402, detail="Insufficient credits. Please upgrade.")
+        raise
+
+async def _run_generation(request: VideoRequest, uid: str, video_id: str) -> Dict[str, Any]:
+    """
+    The generation pipeline shared by the synchronous, job and batch endpoints:
+    metadata and transcript (concurrently), code detection, then the LLM.
+    Credits are handled by the caller; degraded results (see BlogResult) are
+    not charged, so callers refund them.
+    """
+    # Get video metadata and transcript
+    video_data, transcript = await _fetch_video_and_transcript(video_id)
+    
+    # Detect if it's a code tutorial
+    is_code_tutorial = blog_generator.detect_code_content(transcript) if transcript else False
+    
+    # Generate blog content with new features (the completion is awaited on the async client)
+    result = await blog_generator.agenerate_blog(
+        video_data=video_data,
+        template=request.template,
+        transcript=transcript,
+        language=request.language,
+        fact_cleanup=request.fact_cleanup,
+        humanize=request.humanize,
+        is_code_tutorial=is_code_tutorial,
+        user_id=uid,
+        regenerate=request.regenerate
+    )
+    blog_content = result.content
+    
+    # Calculate word count and reading time
+    word_count = len(blog_content.split())
+    reading_time = max(1, word_count // 200)  # Average reading speed: 200 words/minute
+    
+    return {
+        "content": blog_content,
+        "template": request.template,
+        "language": request.language,
+        "word_count": word_count,
+        "reading_time": reading_time,
+        "is_code_tutorial": is_code_tutorial,
+        "degraded": result.degraded,
+    }
+
+def _llm_unavailable(e: LLMUnavailableError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=f"LLM Service Unavailable: {e}. No credits were used; please retry shortly.",
+        headers={"Retry-After": "30"},
+    )
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 @app.get("/")
 async def serve_frontend():
@@ -173,13 +342,11 @@ async def get_video_info(request: VideoRequest):
         if not video_id:
             raise HTTPException(status_code=400, detail="Invalid YouTube URL")
         
-        # Simulate API processing delay for better UX
-        await asyncio.sleep(1)
-        
-        video_data = youtube_service.get_video_metadata(video_id)
+        # Metadata and transcript are independent, blocking fetches: run them
+        # concurrently in worker threads so the event loop stays free.
+        video_data, transcript = await _fetch_video_and_transcript(video_id)
         
         # Get transcript to detect if it's a code tutorial
-        transcript = youtube_service.get_transcript(video_id)
         is_code_tutorial = blog_generator.detect_code_content(transcript) if transcript else False
         
         return VideoResponse(**video_data, is_code_tutorial=is_code_tutorial)
@@ -200,54 +367,27 @@ async def generate_blog(request: VideoRequest, user: Dict[str, Any] = Depends(re
 
     try:
         uid = user["uid"]
-        ensure_user_exists(uid=uid, email=user.get("email"))
 
         # Consume credits first (fail fast if insufficient)
-        try:
-            credit_snapshot = consume_credits(uid, amount=1)
-        except ValueError as e:
-            if str(e) == "INSUFFICIENT_CREDITS":
-                raise HTTPException(status_code=402, detail="Insufficient credits. Please upgrade.")
-            raise
+        credit_snapshot = await _charge_credits(uid, amount=1, email=user.get("email"))
 
         video_id = youtube_service.extract_video_id(str(request.url))
         if not video_id:
             raise HTTPException(status_code=400, detail="Invalid YouTube URL")
         
-        # Simulate processing delay for better UX
-        await asyncio.sleep(2)
-        
-        # Get video metadata and transcript
-        video_data = youtube_service.get_video_metadata(video_id)
-        transcript = youtube_service.get_transcript(video_id)
-        
-        # Detect if it's a code tutorial
-        is_code_tutorial = blog_generator.detect_code_content(transcript) if transcript else False
-        
-        # Generate blog content with new features
-        blog_content = blog_generator.generate_blog(
-            video_data=video_data,
-            template=request.template,
-            transcript=transcript,
-            language=request.language,
-            fact_cleanup=request.fact_cleanup,
-            humanize=request.humanize,
-            is_code_tutorial=is_code_tutorial
-        )
-        
-        # Calculate word count and reading time
-        word_count = len(blog_content.split())
-        reading_time = max(1, word_count // 200)  # Average reading speed: 200 words/minute
-        
+        try:
+            result = await _run_generation(request, uid, video_id)
+        except LLMUnavailableError as e:
+            await asyncio.to_thread(refund_credits, uid, 1)
+            raise _llm_unavailable(e)
+        credits_used = 1
+        if result["degraded"]:
+            await asyncio.to_thread(refund_credits, uid, 1)
+            credits_used = 0
         return BlogResponse(
-            content=blog_content,
-            template=request.template,
-            language=request.language,
-            word_count=word_count,
-            reading_time=reading_time,
-            credits_used=1,
-            credits_remaining=credit_snapshot.credits_remaining,
-            is_code_tutorial=is_code_tutorial
+            **result,
+            credits_used=credits_used,
+            credits_remaining=credit_snapshot.credits_remaining + 1 - credits_used
         )
         
     except HTTPException:
@@ -255,54 +395,286 @@ async def generate_blog(request: VideoRequest, user: Dict[str, Any] = Depends(re
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating blog: {str(e)}")
 
+@app.post("/api/generate-blog/stream")
+async def generate_blog_stream(request: VideoRequest, user: Dict[str, Any] = Depends(require_firebase_user)):
+    """
+    Generate blog content and stream progress as Server-Sent Events.
+
+    Each message is `event: <name>` followed by a JSON `data:` line:
+      - `stage`:    {"stage": "metadata" | "transcript" | "generating"}
+      - `metadata`: the video information (same fields as /api/video-info)
+      - `token`:    {"text": "<generated text delta>"}
+      - `done`:     final content plus word_count, reading_time, `degraded` and the credit snapshot
+      - `error`:    {"detail": "<message>"}; the stream ends after it
+    If the LLM is unavailable before any text was streamed, the summary template
+    sends a local extractive summary with `degraded: true`; degraded results and
+    LLM outages are not charged.
+    Authentication, credit and URL errors are returned as regular HTTP errors
+    before the stream starts.
+    """
+    if not blog_generator.llm_enabled:
+        raise HTTPException(
+            status_code=503, 
+            detail="LLM Service Unavailable: NEBIUS_API_KEY is not configured on the server."
+        )
+
+    uid = user["uid"]
+    video_id = youtube_service.extract_video_id(str(request.url))
+    if not video_id:
+        raise HTTPException(status_code=400, detail="Invalid YouTube URL")
+
+    credit_snapshot = await _charge_credits(uid, amount=1, email=user.get("email"))
+
+    async def events():
+        try:
+            yield _sse_event("stage", {"stage": "metadata"})
+            transcript_task = asyncio.create_task(asyncio.to_thread(youtube_service.get_transcript, video_id))
+            try:
+                video_data = await asyncio.to_thread(youtube_service.get_video_metadata, video_id)
+                yield _sse_event("metadata", video_data)
+
+                yield _sse_event("stage", {"stage": "transcript"})
+                transcript = await transcript_task
+            finally:
+                transcript_task.cancel()
+            is_code_tutorial = blog_generator.detect_code_content(transcript) if transcript else False
+
+            yield _sse_event("stage", {"stage": "generating"})
+            cache_key = blog_generator.result_cache_key(
+                video_data, request.template, transcript, request.language,
+                request.fact_cleanup, request.humanize, is_code_tutorial, uid
+            )
+            blog_content = None if request.regenerate else await asyncio.to_thread(
+                blog_generator.get_cached_blog, cache_key
+            )
+            degraded = False
+            if blog_content is not None:
+                yield _sse_event("token", {"text": blog_content})
+            else:
+                parts = []
+                try:
+                    system_prompt, user_prompt = await asyncio.to_thread(
+                        blog_generator.build_prompts, video_data, request.template, transcript,
+                        request.language, request.fact_cleanup, request.humanize, is_code_tutorial
+                    )
+                    async for delta in blog_generator.astream_blog(
+                        system_prompt, user_prompt, request.template, request.language, is_code_tutorial
+                    ):
+                        parts.append(delta)
+                        yield _sse_event("token", {"text": delta})
+                except LLMUnavailableError as e:
+                    if parts:
+                        raise
+                    fallback = await asyncio.to_thread(
+                        blog_generator.degraded_blog, video_data, request.template, transcript, e
+                    )
+                    blog_content, degraded = fallback.content, True
+                    await asyncio.to_thread(refund_credits, uid, 1)
+                    yield _sse_event("token", {"text": blog_content})
+                else:
+                    blog_content = await asyncio.to_thread(blog_generator.finalize_blog, "".join(parts), cache_key)
+
+            word_count = len(blog_content.split())
+            yield _sse_event("done", {
+                "content": blog_content,
+                "template": request.template,
+                "language": request.language,
+                "word_count": word_count,
+                "reading_time": max(1, word_count // 200),
+                "credits_used": 0 if degraded else 1,
+                "credits_remaining": credit_snapshot.credits_remaining + (1 if degraded else 0),
+                "is_code_tutorial": is_code_tutorial,
+                "degraded": degraded,
+            })
+        except LLMUnavailableError as e:
+            print(f"Streaming generation failed: LLM unavailable: {e}")
+            await asyncio.to_thread(refund_credits, uid, 1)
+            yield _sse_event("error", {"detail": _llm_unavailable(e).detail})
+        except Exception as e:
+            print(f"Streaming generation failed: {type(e).__name__}: {e}")
+            yield _sse_event("error", {"detail": f"Error generating blog: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/api/generate-blog/batch")
+async def generate_blog_batch(request: BatchRequest, user: Dict[str, Any] = Depends(require_firebase_user)):
+    """
+    Convert many videos in one request, streaming NDJSON as each one finishes.
+
+    Credits for every valid URL are reserved in a single transaction up front;
+    conversions run with at most BATCH_CONCURRENCY in flight. Each line is
+    {"type": "result", "index", "url", "status": "ok" | "error", ...}, and a
+    final {"type": "summary"} line reports the totals. Credits for items that
+    fail, never run or come back degraded (a local fallback summary) are refunded.
+    The conversions run in their own task, which settles the refund however the
+    response ends; a client that disconnects cancels the unfinished ones.
+    """
+    if not blog_generator.llm_enabled:
+        raise HTTPException(
+            status_code=503, 
+            detail="LLM Service Unavailable: NEBIUS_API_KEY is not configured on the server."
+        )
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="No URLs provided")
+    if len(request.urls) > settings.BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_MAX_URLS} URLs per batch")
+
+    uid = user["uid"]
+    items = [(index, str(url), youtube_service.extract_video_id(str(url))) for index, url in enumerate(request.urls)]
+    valid = [item for item in items if item[2]]
+    invalid = [item for item in items if not item[2]]
+
+    if valid:
+        credit_snapshot = await _charge_credits(uid, amount=len(valid), email=user.get("email"))
+    else:
+        credit_snapshot = await asyncio.to_thread(get_credits, uid, user.get("email"))
+
+    semaphore = asyncio.Semaphore(max(1, settings.BATCH_CONCURRENCY))
+    options = {
+        "template": request.template,
+        "language": request.language,
+        "fact_cleanup": request.fact_cleanup,
+        "humanize": request.humanize,
+        "regenerate": request.regenerate,
+    }
+
+    async def convert(index: int, url: str, video_id: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                result = await _run_generation(VideoRequest(url=url, **options), uid, video_id)
+                return {"type": "result", "index": index, "url": url, "status": "ok", **result}
+            except Exception as e:
+                detail = getattr(e, "detail", None) or str(e)
+                return {"type": "result", "index": index, "url": url, "status": "error", "error": str(detail)}
+
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def run_conversions() -> None:
+        tasks = [asyncio.create_task(convert(*item)) for item in valid]
+        charged = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                line = await next_done
+                if line["status"] == "ok" and not line["degraded"]:
+                    charged += 1
+                results.put_nowait(line)
+        finally:
+            for task in tasks:
+                task.cancel()
+            unused = len(valid) - charged
+            if unused:
+                try:
+                    await asyncio.to_thread(refund_credits, uid, unused)
+                except Exception as e:
+                    print(f"Failed to refund {unused} batch credits to {uid}: {type(e).__name__}: {e}")
+            results.put_nowait(None)
+
+    runner = asyncio.create_task(run_conversions())
+    _batch_runners.add(runner)
+    runner.add_done_callback(_batch_runners.discard)
+
+    async def stop_conversions() -> None:
+        # A coroutine so Starlette runs it on the loop (Task.cancel is not thread-safe).
+        runner.cancel()
+
+    async def lines():
+        succeeded = 0
+        charged = 0
+        try:
+            for index, url, _ in invalid:
+                yield json.dumps({"type": "result", "index": index, "url": url, "status": "error",
+                                  "error": "Invalid YouTube URL"}) + "\n"
+            while True:
+                line = await results.get()
+                if line is None:
+                    break
+                if line["status"] == "ok":
+                    succeeded += 1
+                    charged += 0 if line["degraded"] else 1
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+            yield json.dumps({
+                "type": "summary",
+                "total": len(items),
+                "succeeded": succeeded,
+                "failed": len(items) - succeeded,
+                "credits_used": charged,
+                "credits_remaining": credit_snapshot.credits_remaining + (len(valid) - charged),
+            }) + "\n"
+        finally:
+            # A no-op once the conversions have finished (the refund has run by then).
+            runner.cancel()
+
+    # The background task also covers a client that disconnects before the stream starts.
+    return StreamingResponse(lines(), media_type="application/x-ndjson", background=BackgroundTask(stop_conversions))
+
+@app.post("/api/jobs", status_code=202)
+async def create_generation_job(request: VideoRequest, user: Dict[str, Any] = Depends(require_firebase_user)):
+    """
+    Queue a blog generation and return its job ID immediately.
+    Poll GET /api/jobs/{job_id} for the status and result. One credit is
+    consumed when the job is accepted and returned if it fails; a full queue
+    returns 429.
+    """
+    if not blog_generator.llm_enabled:
+        raise HTTPException(
+            status_code=503, 
+            detail="LLM Service Unavailable: NEBIUS_API_KEY is not configured on the server."
+        )
+    if not youtube_service.extract_video_id(str(request.url)):
+        raise HTTPException(status_code=400, detail="Invalid YouTube URL")
+    if not blog_generator.prompt_registry.has_template(request.template):
+        raise HTTPException(status_code=400, detail=f"Unknown template: {request.template}")
+
+    queue_full = HTTPException(
+        status_code=429,
+        detail="Generation queue is full. Please retry shortly.",
+        headers={"Retry-After": "5"},
+    )
+    if not await asyncio.to_thread(job_manager.has_capacity):
+        raise queue_full
+
+    uid = user["uid"]
+    credit_snapshot = await _charge_credits(uid, amount=1, email=user.get("email"))
+    try:
+        job = await asyncio.to_thread(job_manager.submit, uid, request.model_dump(mode="json"))
+    except QueueFullError:
+        # Lost the race for the last queue slot; the job never ran.
+        await asyncio.to_thread(refund_credits, uid, 1)
+        raise queue_full
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "credits_used": 1,
+        "credits_remaining": credit_snapshot.credits_remaining,
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def get_generation_job(job_id: str, user: Dict[str, Any] = Depends(require_firebase_user)):
+    """Get the status of a generation job, with its result once it has succeeded"""
+    job = await asyncio.to_thread(job_manager.get, job_id)
+    if not job or job.user_id != user["uid"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_public_dict()
+
 @app.get("/api/templates")
 async def get_templates():
     """Get available blog templates"""
-    return {
-        "templates": [
-            {
-                "id": "article",
-                "name": "Article",
-                "description": "Standard blog article format with introduction, analysis, and conclusion"
-            },
-            {
-                "id": "tutorial", 
-                "name": "Tutorial",
-                "description": "Step-by-step guide format with structured learning approach"
-            },
-            {
-                "id": "review",
-                "name": "Review", 
-                "description": "Comprehensive review format with ratings and detailed analysis"
-            },
-            {
-                "id": "summary",
-                "name": "Summary",
-                "description": "Concise summary format with key highlights and takeaways"
-            }
-        ]
-    }
+    return {"templates": blog_generator.prompt_registry.templates_payload()}
 
 @app.get("/api/languages")
 async def get_languages():
     """Get available output languages"""
-    return {
-        "languages": [
-            {"code": "en", "name": "English", "flag": "🇺🇸"},
-            {"code": "hi", "name": "Hindi", "flag": "🇮🇳"},
-            {"code": "es", "name": "Spanish", "flag": "🇪🇸"},
-            {"code": "fr", "name": "French", "flag": "🇫🇷"},
-            {"code": "de", "name": "German", "flag": "🇩🇪"},
-            {"code": "pt", "name": "Portuguese", "flag": "🇵🇹"},
-            {"code": "ja", "name": "Japanese", "flag": "🇯🇵"},
-            {"code": "ko", "name": "Korean", "flag": "🇰🇷"}
-        ]
-    }
+    return {"languages": blog_generator.prompt_registry.languages_payload()}
 
 @app.get("/api/me")
 async def me(user: Dict[str, Any] = Depends(require_firebase_user)):
     uid = user["uid"]
-    ensure_user_exists(uid=uid, email=user.get("email"))
+    await asyncio.to_thread(ensure_user_exists, uid=uid, email=user.get("email"))
     return {
         "uid": uid,
         "email": user.get("email"),
@@ -314,8 +686,8 @@ async def me(user: Dict[str, Any] = Depends(require_firebase_user)):
 async def my_credits(user: Dict[str, Any] = Depends(require_firebase_user)):
     """Get logged-in user's remaining credits"""
     uid = user["uid"]
-    ensure_user_exists(uid=uid, email=user.get("email"))
-    snap = get_credits(uid)
+    # One cached lookup: creates the user on first sight and returns the balance.
+    snap = await asyncio.to_thread(get_credits, uid, user.get("email"))
     return {
         "user_id": uid,
         "credits_remaining": snap.credits_remaining,
@@ -360,19 +732,28 @@ async def get_user_credits_deprecated(user_id: str, user: Dict[str, Any] = Depen
     return await my_credits(user)
 
 @app.get("/api/me/projects")
-async def my_projects(user: Dict[str, Any] = Depends(require_firebase_user)):
-    """Get logged-in user's saved projects"""
-    uid = user["uid"]
-    ensure_user_exists(uid=uid, email=user.get("email"))
-    projects = list_projects_fs(uid)
-    return {"projects": projects}
+async def my_projects(
+    user: Dict[str, Any] = Depends(require_firebase_user),
+    limit: int = Query(20, ge=1, le=MAX_PROJECTS_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """
+    Get a page of the logged-in user's saved projects as summaries (no content;
+    fetch /api/me/projects/{project_id} for that). Pass `next_cursor` back as
+    `cursor` for the next page.
+    """
+    try:
+        projects, next_cursor = await asyncio.to_thread(
+            list_project_summaries, user["uid"], limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"projects": projects, "next_cursor": next_cursor}
 
 @app.get("/api/me/projects/{project_id}")
 async def get_my_project(project_id: str, user: Dict[str, Any] = Depends(require_firebase_user)):
     """Get a single project by ID for the logged-in user"""
-    uid = user["uid"]
-    ensure_user_exists(uid=uid, email=user.get("email"))
-    project = get_project_fs(uid, project_id)
+    project = await asyncio.to_thread(get_project_fs, user["uid"], project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return {"project": project}
@@ -381,10 +762,41 @@ async def get_my_project(project_id: str, user: Dict[str, Any] = Depends(require
 async def save_my_project(project_data: dict, user: Dict[str, Any] = Depends(require_firebase_user)):
     """Save a project for later access (scoped to logged-in user)"""
     uid = user["uid"]
-    ensure_user_exists(uid=uid, email=user.get("email"))
-    project_id = save_project_fs(uid, project_data)
+    await asyncio.to_thread(ensure_user_exists, uid=uid, email=user.get("email"))
+    try:
+        project_id = await asyncio.to_thread(save_project_fs, uid, project_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"project_id": project_id, "message": "Project saved successfully"}
 
+def _check_project_batch_size(count: int) -> None:
+    if not count:
+        raise HTTPException(status_code=400, detail="No projects provided")
+    if count > settings.PROJECTS_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {settings.PROJECTS_BATCH_MAX_ITEMS} projects per batch"
+        )
+
+@app.post("/api/me/projects/batch")
+async def save_my_projects(request: ProjectBatchSaveRequest, user: Dict[str, Any] = Depends(require_firebase_user)):
+    """Save several projects in one batched write, with a status per item"""
+    _check_project_batch_size(len(request.projects))
+    uid = user["uid"]
+    await asyncio.to_thread(ensure_user_exists, uid=uid, email=user.get("email"))
+    results = await asyncio.to_thread(save_projects_fs, uid, request.projects)
+    return {
+        "results": results,
+        "saved": sum(1 for result in results if result["status"] == "saved"),
+        "failed": sum(1 for result in results if result["status"] != "saved"),
+    }
+
+@app.post("/api/me/projects/batch-get")
+async def get_my_projects(request: ProjectBatchGetRequest, user: Dict[str, Any] = Depends(require_firebase_user)):
+    """Fetch several projects by ID in one read, with a status per ID"""
+    _check_project_batch_size(len(request.ids))
+    results = await asyncio.to_thread(get_projects_fs, user["uid"], request.ids)
+    return {"results": results}
+
 # Backward-compatible routes (deprecated): keep existing paths but require auth and ignore user_id
 @app.post("/api/projects")
 async def save_project_deprecated(project_data: dict, user: Dict[str, Any] = Depends(require_firebase_user)):
@@ -392,7 +804,7 @@ async def save_project_deprecated(project_data: dict, user: Dict[str, Any] = Dep
 
 @app.get("/api/projects/{user_id}")
 async def get_user_projects_deprecated(user_id: str, user: Dict[str, Any] = Depends(require_firebase_user)):
-    return await my_projects(user)
+    return await my_projects(user, limit=20, cursor=None)
 
 @app.get("/api/health")
 async def health_check():
@@ -410,9 +822,21 @@ async def health_check():
                 "fact_cleanup_mode", 
                 "humanize_output",
                 "code_detection",
+                "streaming_generation",
+                "background_jobs",
+                "batch_conversion",
                 "project_workspace",
                 "credit_system"
-            ]
+            ],
+            "caches": cache_stats(),
+            "single_flight": single_flight_stats(),
+            "auth_token_cache": token_cache.stats(),
+            "credit_leases": credit_leases.stats(),
+            "storage": settings.STORAGE_BACKEND,
+            "llm_limiter": llm_limiter.stats(),
+            "llm_usage": usage_tracker.stats(),
+            "llm_router": blog_generator.llm_service.router.stats() if blog_generator.llm_service else None,
+            "jobs": job_manager.stats()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
@@ -0,0 +1,170 @@
+"""
+Transparent compression of large text fields in stored projects.
+
+A project's generated blogs are by far its largest fields and are stored
+once but read back in full by every `get_project`. Text fields at least
+PROJECT_COMPRESSION_MIN_BYTES long (top-level strings and the strings of
+top-level maps such as `generated_content`) are stored as a small tagged
+map instead of a string:
+
+    {"__compressed__": 1, "codec": "zlib", "size": 48213, "data": "<base64>"}
+
+`__compressed__` is the encoding version and `size` the decoded length in
+bytes; decoding stops at that length (and never exceeds MAX_DECODED_BYTES),
+so a crafted blob cannot inflate without bound. Clients cannot store a
+marker of their own: compress_project rejects input shaped like one, and a
+marker that does not decode is returned as stored rather than failing the
+read. Fields stored as plain strings, including every project saved before
+compression existed, decode as themselves, so documents of both kinds can be
+read side by side. Base64 keeps the encoded value a string in both Firestore
+and SQLite's JSON column. zstd is used when PROJECT_COMPRESSION_CODEC asks for
+it and the `zstandard` package is installed; zlib otherwise.
+"""
+
+from __future__ import annotations
+
+import base64
+import zlib
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from backend.config import settings
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is used without it
+    zstandard = None
+
+ENCODING_VERSION = 1
+MARKER = "__compressed__"
+# Upper bound on one decoded field, whatever its marker claims
+MAX_DECODED_BYTES = 16 * 1024 * 1024
+
+# (compress, decompress(data, max_length)); decompress raises ValueError past max_length
+Codec = Tuple[Callable[[bytes], bytes], Callable[[bytes, int], bytes]]
+
+
+class ReservedFieldError(ValueError):
+    """A client-supplied project field has the shape of a compressed-field marker."""
+
+
+def _zlib_decompress(data: bytes, max_length: int) -> bytes:
+    decompressor = zlib.decompressobj()
+    raw = decompressor.decompress(data, max_length + 1)
+    if len(raw) > max_length or decompressor.unconsumed_tail:
+        raise ValueError("Compressed field exceeds its size limit")
+    return raw
+
+
+def _zstd_decompress(data: bytes, max_length: int) -> bytes:
+    try:
+        raw = zstandard.ZstdDecompressor().decompress(data, max_output_size=max_length)
+    except zstandard.ZstdError as e:
+        raise ValueError(str(e)) from e
+    if len(raw) > max_length:
+        raise ValueError("Compressed field exceeds its size limit")
+    return raw
+
+
+def _codecs() -> Dict[str, Codec]:
+    codecs: Dict[str, Codec] = {
+        "zlib": (lambda raw: zlib.compress(raw, 6), _zlib_decompress),
+    }
+    if zstandard is not None:
+        codecs["zstd"] = (lambda raw: zstandard.ZstdCompressor(level=3).compress(raw), _zstd_decompress)
+    return codecs
+
+
+CODECS = _codecs()
+
+
+def default_codec() -> Optional[str]:
+    """Codec for new writes, or None when compression is disabled."""
+    codec = settings.PROJECT_COMPRESSION_CODEC
+    if codec == "none":
+        return None
+    return codec if codec in CODECS else "zlib"
+
+
+def is_compressed(value: Any) -> bool:
+    return isinstance(value, dict) and MARKER in value
+
+
+def compress_text(text: str, codec: Optional[str] = None,
+                  min_bytes: Optional[int] = None) -> Any:
+    """Encode `text` if it is large enough and compression saves space; otherwise return it."""
+    codec = codec or default_codec()
+    min_bytes = settings.PROJECT_COMPRESSION_MIN_BYTES if min_bytes is None else min_bytes
+    raw = text.encode("utf-8")
+    if codec is None or len(raw) < min_bytes:
+        return text
+    data = base64.b64encode(CODECS[codec][0](raw)).decode("ascii")
+    if len(data) >= len(raw):
+        return text
+    return {MARKER: ENCODING_VERSION, "codec": codec, "size": len(raw), "data": data}
+
+
+def _decode(value: Dict[str, Any]) -> str:
+    if value[MARKER] != ENCODING_VERSION:
+        raise ValueError(f"Unsupported project encoding version: {value[MARKER]!r}")
+    codec = CODECS.get(value.get("codec"))
+    if codec is None:
+        raise ValueError(f"Unavailable codec: {value.get('codec')!r}")
+    size = value.get("size", MAX_DECODED_BYTES)
+    if not isinstance(size, int) or not 0 <= size <= MAX_DECODED_BYTES:
+        raise ValueError(f"Invalid decoded size: {size!r}")
+    data = value.get("data")
+    if not isinstance(data, str):
+        raise ValueError("Missing compressed data")
+    return codec[1](base64.b64decode(data, validate=True), size).decode("utf-8")
+
+
+def decompress_value(value: Any) -> Any:
+    """
+    Inverse of compress_text; values that are not encoded pass through
+    unchanged, and so does a marker that cannot be decoded (it is logged).
+    """
+    if not is_compressed(value):
+        return value
+    try:
+        return _decode(value)
+    except (ValueError, UnicodeDecodeError, zlib.error) as e:
+        print(f"Could not decode a compressed project field: {e}")
+        return value
+
+
+def _contains_marker(value: Any) -> bool:
+    return is_compressed(value) or (isinstance(value, dict) and any(is_compressed(v) for v in value.values()))
+
+
+def compress_project(project: Dict[str, Any], skip: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Copy of `project` with its large text fields encoded; fields in `skip` are
+    left as they are. Raises ReservedFieldError when the input already holds
+    something shaped like an encoded field, so only markers written here are
+    ever decoded.
+    """
+    skip = set(skip)
+    encoded: Dict[str, Any] = {}
+    for key, value in project.items():
+        if _contains_marker(value):
+            raise ReservedFieldError(f"Field '{key}' uses the reserved key '{MARKER}'")
+        if key in skip:
+            encoded[key] = value
+        elif isinstance(value, str):
+            encoded[key] = compress_text(value)
+        elif isinstance(value, dict):
+            encoded[key] = {k: compress_text(v) if isinstance(v, str) else v for k, v in value.items()}
+        else:
+            encoded[key] = value
+    return encoded
+
+
+def decompress_project(project: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a stored project with every encoded field decoded."""
+    decoded: Dict[str, Any] = {}
+    for key, value in project.items():
+        if isinstance(value, dict) and not is_compressed(value):
+            decoded[key] = {k: decompress_value(v) for k, v in value.items()}
+        else:
+            decoded[key] = decompress_value(value)
+    return decoded
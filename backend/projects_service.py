@@ -1,50 +1,165 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import json
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from backend.firebase_admin_client import get_db
+from backend.project_compression import compress_project, decompress_project
+from backend.storage import get_storage
+
+# Fields returned by list_project_summaries; full content loads only through get_project.
+# video_title/video_thumbnail cover projects saved before `title` was stored.
+PROJECT_SUMMARY_FIELDS = (
+    "title", "video_title", "video_thumbnail", "template", "language", "created_at", "word_count",
+)
+MAX_PROJECTS_PAGE_SIZE = 100
+# Longest document ID Firestore accepts, in UTF-8 bytes
+MAX_PROJECT_ID_BYTES = 1500
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def save_project(uid: str, project: Dict[str, Any]) -> str:
-    db = get_db()
-    ref = db.collection("users").document(uid).collection("projects").document()
+def word_count(project: Dict[str, Any]) -> int:
+    """Words of generated text in a project (every template's content, or `content`)."""
+    generated = project.get("generated_content")
+    texts = list(generated.values()) if isinstance(generated, dict) else [project.get("content")]
+    return sum(len(text.split()) for text in texts if isinstance(text, str))
+
+
+def _stored_payload(uid: str, project: Dict[str, Any]) -> Dict[str, Any]:
     payload = dict(project)
+    # Stored alongside the content so listings can be served from a projection.
+    payload["title"] = payload.get("title") or payload.get("video_title") or ""
+    payload["word_count"] = word_count(payload)
     payload["created_at"] = payload.get("created_at") or _now_iso()
     payload["updated_at"] = _now_iso()
     payload["user_id"] = uid
-    ref.set(payload, merge=True)
-    return ref.id
+    # Summary fields stay plain so listings can project them without decoding.
+    return compress_project(payload, skip=PROJECT_SUMMARY_FIELDS)
+
+
+def save_project(uid: str, project: Dict[str, Any]) -> str:
+    """Store a project and return its ID; raises ValueError for a field using the reserved marker key."""
+    return get_storage().save_project(uid, _stored_payload(uid, project))
+
+
+def save_projects(uid: str, projects: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Save several projects in one batched write. Returns one result per input,
+    in order: {"index", "status": "saved", "project_id"} or {"index",
+    "status": "error", "error"}. Invalid items fail on their own; a failed
+    write fails every item that was part of it.
+    """
+    results: List[Dict[str, Any]] = [{"index": index} for index in range(len(projects))]
+    valid: List[int] = []
+    payloads: List[Dict[str, Any]] = []
+    for index, project in enumerate(projects):
+        if not isinstance(project, dict):
+            results[index].update(status="error", error="Project must be a JSON object")
+            continue
+        try:
+            payloads.append(_stored_payload(uid, project))
+        except ValueError as e:
+            results[index].update(status="error", error=str(e))
+            continue
+        valid.append(index)
+    if not valid:
+        return results
+    try:
+        ids = get_storage().save_projects(uid, payloads)
+    except Exception as e:
+        print(f"Batch project save failed for {uid}: {e}")
+        for index in valid:
+            results[index].update(status="error", error="Failed to save project")
+        return results
+    for index, project_id in zip(valid, ids):
+        results[index].update(status="saved", project_id=project_id)
+    return results
 
 
 def get_project(uid: str, project_id: str) -> Dict[str, Any] | None:
     """Get a single project by ID for a user."""
-    db = get_db()
-    doc = db.collection("users").document(uid).collection("projects").document(project_id).get()
-    if not doc.exists:
-        return None
-    data = doc.to_dict() or {}
-    data["id"] = doc.id
-    return data
-
-
-def list_projects(uid: str, limit: int = 20) -> List[Dict[str, Any]]:
-    db = get_db()
-    q = (
-        db.collection("users")
-        .document(uid)
-        .collection("projects")
-        .order_by("created_at", direction="DESCENDING")
-        .limit(limit)
+    project = get_storage().get_project(uid, project_id)
+    return decompress_project(project) if project is not None else None
+
+
+def is_valid_project_id(project_id: Any) -> bool:
+    """True for strings usable as a document ID (Firestore rejects the rest outright)."""
+    return (
+        isinstance(project_id, str)
+        and project_id not in ("", ".", "..")
+        and "/" not in project_id
+        and not (project_id.startswith("__") and project_id.endswith("__"))
+        and len(project_id.encode("utf-8")) <= MAX_PROJECT_ID_BYTES
     )
+
+
+def get_projects(uid: str, project_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Fetch several projects by ID in one read. Returns one result per requested
+    ID, in order: {"id", "status": "ok", "project"}, {"id", "status":
+    "not_found"}, or {"id", "status": "error", "error"} for a malformed ID.
+    """
+    valid = [project_id for project_id in dict.fromkeys(project_ids) if is_valid_project_id(project_id)]
+    found = get_storage().get_projects(uid, valid) if valid else {}
     results: List[Dict[str, Any]] = []
-    for doc in q.stream():
-        data = doc.to_dict() or {}
-        data["id"] = doc.id
-        results.append(data)
+    for project_id in project_ids:
+        if project_id in found:
+            results.append({"id": project_id, "status": "ok", "project": decompress_project(found[project_id])})
+        elif is_valid_project_id(project_id):
+            results.append({"id": project_id, "status": "not_found"})
+        else:
+            results.append({"id": project_id, "status": "error", "error": "Invalid project ID"})
     return results
 
+
+def encode_cursor(created_at: str, project_id: str) -> str:
+    """Opaque page cursor for the position of a project in the listing order."""
+    raw = json.dumps([created_at, project_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of encode_cursor; raises ValueError for a cursor it did not produce."""
+    try:
+        created_at, project_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(created_at, str) or not isinstance(project_id, str):
+        raise ValueError("Invalid cursor")
+    return created_at, project_id
+
+
+def list_project_summaries(uid: str, limit: int = 20,
+                           cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of the user's projects, newest first, without their content.
+    Returns (summaries, next_cursor); pass next_cursor back to get the
+    following page. It is None on the last page. Raises ValueError for an
+    invalid cursor.
+    """
+    limit = max(1, min(limit, MAX_PROJECTS_PAGE_SIZE))
+    start_after = decode_cursor(cursor) if cursor else None
+    # One extra row tells whether another page exists without a second query.
+    rows = get_storage().list_projects(uid, limit + 1, start_after=start_after, fields=PROJECT_SUMMARY_FIELDS)
+    summaries = [
+        {
+            "id": row["id"],
+            "title": row.get("title") or row.get("video_title") or "",
+            "video_thumbnail": row.get("video_thumbnail") or "",
+            "template": row.get("template"),
+            "language": row.get("language"),
+            "created_at": row.get("created_at") or "",
+            "word_count": row.get("word_count"),
+        }
+        for row in rows[:limit]
+    ]
+    # (created_at, id) rather than created_at alone, so projects saved at the
+    # same instant (batch saves, client timestamps) are not skipped between pages.
+    last = summaries[-1] if len(rows) > limit else None
+    next_cursor = encode_cursor(last["created_at"], last["id"]) if last else None
+    return summaries, next_cursor
@@ -0,0 +1,54 @@
+"""
+Helpers for fitting source text into an LLM context budget.
+
+Token counts are estimated (about four characters per token for English text),
+which is accurate enough for budgeting without shipping a tokenizer.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import List
+
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def tokens_to_chars(tokens: int) -> int:
+    return tokens * CHARS_PER_TOKEN
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence for sentence in _SENTENCE_END.split(text.strip()) if sentence]
+
+
+def chunk_by_tokens(text: str, max_tokens: int) -> List[str]:
+    """
+    Split text into consecutive chunks of at most `max_tokens` (estimated),
+    breaking on sentence boundaries and hard-splitting only sentences that
+    are longer than a whole chunk.
+    """
+    max_chars = max(1, tokens_to_chars(max_tokens))
+    chunks: List[str] = []
+    current: List[str] = []
+    current_len = 0
+    for sentence in split_sentences(text):
+        while len(sentence) > max_chars:
+            if current:
+                chunks.append(" ".join(current))
+                current, current_len = [], 0
+            chunks.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and current_len + 1 + len(sentence) > max_chars:
+            chunks.append(" ".join(current))
+            current, current_len = [], 0
+        current.append(sentence)
+        current_len += len(sentence) + (1 if current_len else 0)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
@@ -0,0 +1,247 @@
+"""
+Declarative prompt template registry.
+
+Templates live as JSON files in PROMPT_TEMPLATES_DIR (one file per template
+plus `languages.json`). Each file is compiled once into a format string, and
+system prompts are memoized per (template, language, humanize), so building
+a prompt is a dict lookup plus one `str.format`. The same data generates the
+`/api/templates` and `/api/languages` payloads, and the registry's version
+hash changes whenever a template file does, which invalidates cached blogs.
+
+With PROMPT_TEMPLATES_HOT_RELOAD enabled, file modification times are checked
+at most every PROMPT_TEMPLATES_RELOAD_INTERVAL seconds and changed templates
+are recompiled without a restart; `reload()` forces it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.generation_profiles import GenerationProfile
+
+LANGUAGES_FILE = "languages.json"
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    id: str
+    name: str
+    description: str
+    public: bool
+    order: int
+    system: str
+    # Compiled user prompt with {title}, {channel}, {source_type}, {content_source}
+    # and {language_name} placeholders; literal braces in the file are escaped.
+    user_format: str
+    generation: GenerationProfile = GenerationProfile()
+    generation_by_language: Dict[str, GenerationProfile] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Language:
+    code: str
+    name: str
+    flag: str
+    instruction: str
+
+
+@dataclass
+class _Compiled:
+    templates: Dict[str, PromptTemplate]
+    languages: Dict[str, Language]
+    default_language: str
+    humanize_instruction: str
+    version: str
+    system_prompts: Dict[Tuple[str, str, bool], str] = field(default_factory=dict)
+
+
+def _escape(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _compile_user_format(spec: Dict[str, Any]) -> str:
+    parts = [
+        "\n",
+        _escape(spec["task"]),
+        "\n\n**Video Title:** {title}\n**Channel:** {channel}\n"
+        "**Content Source (from {source_type}):**\n---\n{content_source}\n---\n\n",
+    ]
+    for heading, lines in spec.get("sections", {}).items():
+        parts.append(f"**{_escape(heading)}:**\n")
+        parts.append(_escape("\n".join(lines)))
+        parts.append("\n\n")
+    parts.append("**Language:** {language_name}\n")
+    return "".join(parts)
+
+
+class PromptRegistry:
+    """Compiled prompt templates and languages loaded from a directory of JSON files."""
+
+    def __init__(self, directory: Optional[str] = None, hot_reload: Optional[bool] = None,
+                 reload_interval: Optional[float] = None):
+        self.directory = directory or settings.PROMPT_TEMPLATES_DIR
+        self.hot_reload = settings.PROMPT_TEMPLATES_HOT_RELOAD if hot_reload is None else hot_reload
+        self.reload_interval = (
+            settings.PROMPT_TEMPLATES_RELOAD_INTERVAL if reload_interval is None else reload_interval
+        )
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._seen_mtimes = self._scan()
+        self._compiled = self._load()
+
+    def _scan(self) -> Dict[str, float]:
+        return {
+            name: os.stat(os.path.join(self.directory, name)).st_mtime
+            for name in sorted(os.listdir(self.directory))
+            if name.endswith(".json")
+        }
+
+    def _load(self) -> _Compiled:
+        digest = hashlib.sha256()
+        specs: Dict[str, Dict[str, Any]] = {}
+        for name in self._scan():
+            with open(os.path.join(self.directory, name), "rb") as handle:
+                raw = handle.read()
+            digest.update(name.encode("utf-8") + b"\0" + raw)
+            specs[name] = json.loads(raw.decode("utf-8"))
+
+        language_spec = specs.pop(LANGUAGES_FILE)
+        languages = {
+            item["code"]: Language(item["code"], item["name"], item.get("flag", ""), item["instruction"])
+            for item in language_spec["languages"]
+        }
+        templates = {}
+        for spec in sorted(specs.values(), key=lambda spec: spec.get("order", 0)):
+            templates[spec["id"]] = PromptTemplate(
+                id=spec["id"],
+                name=spec["name"],
+                description=spec.get("description", ""),
+                public=spec.get("public", True),
+                order=spec.get("order", 0),
+                system=spec["system"],
+                user_format=_compile_user_format(spec),
+                generation=GenerationProfile.from_dict(spec.get("generation")),
+                generation_by_language={
+                    code: GenerationProfile.from_dict(profile)
+                    for code, profile in spec.get("generation_by_language", {}).items()
+                },
+            )
+        return _Compiled(
+            templates=templates,
+            languages=languages,
+            default_language=language_spec.get("default", "en"),
+            humanize_instruction=language_spec.get("humanize_instruction", ""),
+            version=digest.hexdigest()[:16],
+        )
+
+    def reload(self) -> bool:
+        """Recompile from disk. Returns True if any template file changed."""
+        with self._lock:
+            compiled = self._load()
+            changed = compiled.version != self._compiled.version
+            if changed:
+                self._compiled = compiled
+                print(f"Prompt templates reloaded (version {compiled.version})")
+            return changed
+
+    def _current(self) -> _Compiled:
+        if self.hot_reload and time.monotonic() >= self._next_check:
+            self._next_check = time.monotonic() + self.reload_interval
+            try:
+                mtimes = self._scan()
+                if mtimes != self._seen_mtimes:
+                    # Recorded before loading so an invalid file is reported once, not on every check.
+                    self._seen_mtimes = mtimes
+                    self.reload()
+            except (OSError, ValueError, KeyError) as e:
+                # Keep serving the last good templates while a file is mid-edit or invalid.
+                print(f"Prompt template reload failed: {e}")
+        return self._compiled
+
+    @property
+    def version(self) -> str:
+        return self._current().version
+
+    def has_template(self, template_id: str) -> bool:
+        """True for templates clients may request (internal variants are excluded)."""
+        template = self._current().templates.get(template_id)
+        return template is not None and template.public
+
+    def _language(self, compiled: _Compiled, code: str) -> Language:
+        return compiled.languages.get(code) or compiled.languages[compiled.default_language]
+
+    def language_name(self, code: str) -> str:
+        return self._language(self._current(), code).name
+
+    def language_instruction(self, code: str, humanize: bool) -> str:
+        compiled = self._current()
+        language = self._language(compiled, code)
+        if humanize:
+            return f"{language.instruction} {compiled.humanize_instruction}"
+        return language.instruction
+
+    def system_prompt(self, template_id: str, language: str, humanize: bool) -> str:
+        compiled = self._current()
+        # Unknown codes share the default language's entry so the memo stays bounded.
+        key = (template_id, self._language(compiled, language).code, humanize)
+        prompt = compiled.system_prompts.get(key)
+        if prompt is None:
+            instruction = self.language_instruction(language, humanize)
+            prompt = f"{compiled.templates[template_id].system} {instruction}"
+            compiled.system_prompts[key] = prompt
+        return prompt
+
+    def generation_profile(self, template_id: str, language: str) -> GenerationProfile:
+        """Model/max_tokens/temperature from the template file (empty for unknown ids)."""
+        template = self._current().templates.get(template_id)
+        if template is None:
+            return GenerationProfile()
+        by_language = template.generation_by_language.get(language)
+        return template.generation.merged(by_language) if by_language else template.generation
+
+    def render(self, template_id: str, video_data: Dict[str, Any], content_source: str, source_type: str,
+               language: str, humanize: bool) -> Tuple[str, str]:
+        """Build the (system, user) prompts for a template."""
+        template = self._current().templates[template_id]
+        user_prompt = template.user_format.format(
+            title=video_data.get("title"),
+            channel=video_data.get("channel_name"),
+            source_type=source_type,
+            content_source=content_source,
+            language_name=self.language_name(language),
+        )
+        return self.system_prompt(template_id, language, humanize), user_prompt
+
+    def templates_payload(self) -> List[Dict[str, str]]:
+        return [
+            {"id": t.id, "name": t.name, "description": t.description}
+            for t in self._current().templates.values()
+            if t.public
+        ]
+
+    def languages_payload(self) -> List[Dict[str, str]]:
+        return [
+            {"code": language.code, "name": language.name, "flag": language.flag}
+            for language in self._current().languages.values()
+        ]
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Process-wide registry, loaded on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PromptRegistry()
+    return _registry
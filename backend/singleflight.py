@@ -0,0 +1,151 @@
+"""
+Single-flight request coalescing.
+
+Concurrent calls that share a key wait for one in-flight upstream call and all
+receive its result (or its exception). The services are synchronous and run in
+worker threads, so coalescing is done with threads: the first caller (the
+leader) runs the call, the others block until it finishes.
+
+Cancellation: cancelling an asyncio task that awaits one of these calls via
+asyncio.to_thread does not stop the underlying thread. The leader always runs
+to completion, so followers are never left without a result when another
+caller goes away; a follower may pass `timeout` to stop waiting on its own.
+
+AsyncSingleFlight is the event-loop counterpart for coroutine calls, such as
+completions made with the async LLM client.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one upstream call."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[..., T], *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn(*args, **kwargs)
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                # Forget the call before waking followers so that later callers
+                # start a fresh upstream call instead of reusing a finished one.
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+
+        if not call.done.wait(timeout):
+            raise TimeoutError(f"Timed out waiting for in-flight '{self.name}' call")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight(),
+        }
+
+
+class AsyncSingleFlight:
+    """
+    Coalesce concurrent identical coroutine calls on one event loop.
+
+    The leader's call runs as its own task and callers await it through
+    `asyncio.shield`, so a caller that is cancelled stops waiting without
+    cancelling the upstream call the others are waiting on.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, "asyncio.Task[Any]"] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        self._calls.pop(key, None)
+        # Mark the outcome retrieved in case every caller was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight(),
+        }
+
+
+_groups: List[Any] = []
+
+
+def single_flight(name: str) -> SingleFlight:
+    """Create a SingleFlight group and register it for stats."""
+    group = SingleFlight(name)
+    _groups.append(group)
+    return group
+
+
+def async_single_flight(name: str) -> AsyncSingleFlight:
+    """Create an AsyncSingleFlight group and register it for stats."""
+    group = AsyncSingleFlight(name)
+    _groups.append(group)
+    return group
+
+
+def single_flight_stats() -> List[Dict[str, Any]]:
+    return [group.stats() for group in _groups]
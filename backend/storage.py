@@ -0,0 +1,400 @@
+"""
+Storage for user documents (plan and credits) and saved projects.
+
+`FirestoreStorage` keeps the existing layout (`users/{uid}` documents with a
+`projects` subcollection). `SQLiteStorage` keeps the same documents as JSON
+rows in a local SQLite file (WAL mode, so every worker process on the host
+can share it), for self-hosted deployments and offline benchmarks where a
+Firestore round trip would dominate the cost of a credit or project
+operation. STORAGE_BACKEND selects the implementation.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from backend.config import settings
+
+
+class InsufficientCreditsError(ValueError):
+    """Raised by withdraw_credits; `profile` is the user document that was checked."""
+
+    def __init__(self, profile: Dict[str, Any]):
+        super().__init__("INSUFFICIENT_CREDITS")
+        self.profile = profile
+
+
+class UserNotFoundError(LookupError):
+    """Raised by increment_credits when the user has no document to update."""
+
+
+def apply_withdrawal(data: Dict[str, Any], need: int, want: int, email: Optional[str],
+                     default_credits: int, updated_at: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Deduct at least `need` and at most max(need, `want`) credits from a user
+    document in place. Returns the changed fields and the credits taken.
+    """
+    remaining = int(data.get("credits_remaining", default_credits))
+    if remaining < need:
+        raise InsufficientCreditsError(dict(data))
+    taken = max(need, min(remaining, want))
+    changes: Dict[str, Any] = {"credits_remaining": remaining - taken, "updated_at": updated_at}
+    if email and not data.get("email"):
+        changes["email"] = email
+    data.update(changes)
+    return changes, taken
+
+
+class StorageBackend(ABC):
+    """User documents and projects; implementations must be thread-safe."""
+
+    @abstractmethod
+    def get_user(self, uid: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def merge_user(self, uid: str, fields: Dict[str, Any]) -> None:
+        """Set `fields` on the user document, creating it if needed."""
+
+    @abstractmethod
+    def increment_credits(self, uid: str, amount: int, updated_at: str) -> None:
+        """
+        Add `amount` to credits_remaining without reading the document first.
+        Raises UserNotFoundError when the user document does not exist.
+        """
+
+    @abstractmethod
+    def withdraw_credits(self, uid: str, need: int, want: int, new_user: Dict[str, Any],
+                         email: Optional[str], default_credits: int,
+                         updated_at: str) -> Tuple[Dict[str, Any], int]:
+        """
+        Atomically apply `apply_withdrawal` to the user document, creating it
+        from `new_user` if it does not exist. Returns the updated document and
+        the credits taken; raises InsufficientCreditsError.
+        """
+
+    @abstractmethod
+    def save_project(self, uid: str, payload: Dict[str, Any]) -> str:
+        """Store a new project and return its ID."""
+
+    @abstractmethod
+    def get_project(self, uid: str, project_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def save_projects(self, uid: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        """Store several new projects in one atomic write; returns their IDs in order."""
+
+    @abstractmethod
+    def get_projects(self, uid: str, project_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch several projects in one round trip; IDs that do not exist are absent."""
+
+    @abstractmethod
+    def list_projects(self, uid: str, limit: int, start_after: Optional[Tuple[str, str]] = None,
+                      fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        The user's projects ordered by (created_at, id), newest first, and
+        strictly after the `start_after` (created_at, id) position when given;
+        the ID breaks ties between projects created at the same instant. With
+        `fields`, each result holds only those fields (those the document has)
+        plus `id`.
+        """
+
+
+class FirestoreStorage(StorageBackend):
+    def __init__(self):
+        # Imported here so the SQLite backend works without firebase_admin credentials.
+        from firebase_admin import firestore as fb_firestore
+
+        from google.api_core.exceptions import NotFound
+
+        from backend.firebase_admin_client import get_db
+
+        self._fs = fb_firestore
+        self._not_found = NotFound
+        self._get_db = get_db
+
+    def _user_doc(self, uid: str):
+        return self._get_db().collection("users").document(uid)
+
+    def _projects(self, uid: str):
+        return self._user_doc(uid).collection("projects")
+
+    def get_user(self, uid: str) -> Optional[Dict[str, Any]]:
+        snap = self._user_doc(uid).get()
+        return (snap.to_dict() or {}) if snap.exists else None
+
+    def merge_user(self, uid: str, fields: Dict[str, Any]) -> None:
+        self._user_doc(uid).set(fields, merge=True)
+
+    def increment_credits(self, uid: str, amount: int, updated_at: str) -> None:
+        try:
+            self._user_doc(uid).update(
+                {"credits_remaining": self._fs.Increment(amount), "updated_at": updated_at}
+            )
+        except self._not_found as e:
+            raise UserNotFoundError(uid) from e
+
+    def withdraw_credits(self, uid: str, need: int, want: int, new_user: Dict[str, Any],
+                         email: Optional[str], default_credits: int,
+                         updated_at: str) -> Tuple[Dict[str, Any], int]:
+        ref = self._user_doc(uid)
+
+        @self._fs.transactional
+        def _txn(txn) -> Tuple[Dict[str, Any], int]:
+            snap = ref.get(transaction=txn)
+            data: Dict[str, Any] = (snap.to_dict() or {}) if snap.exists else dict(new_user)
+            changes, taken = apply_withdrawal(data, need, want, email, default_credits, updated_at)
+            if snap.exists:
+                txn.update(ref, changes)
+            else:
+                txn.set(ref, data, merge=True)
+            return data, taken
+
+        return _txn(self._get_db().transaction())
+
+    def save_project(self, uid: str, payload: Dict[str, Any]) -> str:
+        ref = self._projects(uid).document()
+        ref.set(payload, merge=True)
+        return ref.id
+
+    def get_project(self, uid: str, project_id: str) -> Optional[Dict[str, Any]]:
+        doc = self._projects(uid).document(project_id).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict() or {}
+        data["id"] = doc.id
+        return data
+
+    def save_projects(self, uid: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        batch = self._get_db().batch()
+        refs = [self._projects(uid).document() for _ in payloads]
+        for ref, payload in zip(refs, payloads):
+            batch.set(ref, payload, merge=True)
+        batch.commit()
+        return [ref.id for ref in refs]
+
+    def get_projects(self, uid: str, project_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        refs = [self._projects(uid).document(project_id) for project_id in project_ids]
+        results: Dict[str, Dict[str, Any]] = {}
+        for doc in self._get_db().get_all(refs):
+            if doc.exists:
+                data = doc.to_dict() or {}
+                data["id"] = doc.id
+                results[doc.id] = data
+        return results
+
+    def list_projects(self, uid: str, limit: int, start_after: Optional[Tuple[str, str]] = None,
+                      fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        projects = self._projects(uid)
+        # "__name__" is the document ID; a single-field index serves this ordering.
+        q = projects.order_by("created_at", direction="DESCENDING").order_by("__name__", direction="DESCENDING")
+        if fields is not None:
+            # Server-side projection: unselected fields (the blog content) are never sent.
+            q = q.select(list(fields))
+        if start_after:
+            created_at, project_id = start_after
+            q = q.start_after({"created_at": created_at, "__name__": projects.document(project_id)})
+        q = q.limit(limit)
+        results: List[Dict[str, Any]] = []
+        for doc in q.stream():
+            data = doc.to_dict() or {}
+            data["id"] = doc.id
+            results.append(data)
+        return results
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Users and projects in a SQLite file (WAL mode). Documents are JSON; credit
+    changes run in BEGIN IMMEDIATE transactions, which serialize writers
+    across processes the way a Firestore transaction does. Statements are
+    constant parameterized SQL, so sqlite3's statement cache reuses them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS users (uid TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS projects (
+                id TEXT PRIMARY KEY,
+                uid TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("DROP INDEX IF EXISTS idx_projects_uid_created")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_uid_created_id ON projects (uid, created_at, id)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _read_user(conn: sqlite3.Connection, uid: str) -> Optional[Dict[str, Any]]:
+        row = conn.execute("SELECT data FROM users WHERE uid = ?", (uid,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @staticmethod
+    def _write_user(conn: sqlite3.Connection, uid: str, data: Dict[str, Any]) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO users (uid, data) VALUES (?, ?)",
+            (uid, json.dumps(data, separators=(",", ":"))),
+        )
+
+    def get_user(self, uid: str) -> Optional[Dict[str, Any]]:
+        return self._read_user(self._conn(), uid)
+
+    def merge_user(self, uid: str, fields: Dict[str, Any]) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            data = self._read_user(conn, uid) or {}
+            data.update(fields)
+            self._write_user(conn, uid, data)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def increment_credits(self, uid: str, amount: int, updated_at: str) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            data = self._read_user(conn, uid)
+            if data is None:
+                # Same contract as Firestore's update(), which fails on a missing document.
+                raise UserNotFoundError(uid)
+            data["credits_remaining"] = int(data.get("credits_remaining", 0)) + amount
+            data["updated_at"] = updated_at
+            self._write_user(conn, uid, data)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def withdraw_credits(self, uid: str, need: int, want: int, new_user: Dict[str, Any],
+                         email: Optional[str], default_credits: int,
+                         updated_at: str) -> Tuple[Dict[str, Any], int]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            existing = self._read_user(conn, uid)
+            data = existing if existing is not None else dict(new_user)
+            _, taken = apply_withdrawal(data, need, want, email, default_credits, updated_at)
+            self._write_user(conn, uid, data)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return data, taken
+
+    @staticmethod
+    def _project_row(uid: str, payload: Dict[str, Any]) -> Tuple[str, str, str, str]:
+        return (uuid.uuid4().hex, uid, str(payload.get("created_at") or ""),
+                json.dumps(payload, separators=(",", ":")))
+
+    def save_project(self, uid: str, payload: Dict[str, Any]) -> str:
+        row = self._project_row(uid, payload)
+        self._conn().execute("INSERT INTO projects (id, uid, created_at, data) VALUES (?, ?, ?, ?)", row)
+        return row[0]
+
+    def save_projects(self, uid: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        rows = [self._project_row(uid, payload) for payload in payloads]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO projects (id, uid, created_at, data) VALUES (?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [row[0] for row in rows]
+
+    def get_projects(self, uid: str, project_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        # json_each turns the ID list into one bound parameter, keeping the statement constant.
+        rows = self._conn().execute(
+            "SELECT id, data FROM projects WHERE uid = ? AND id IN (SELECT value FROM json_each(?))",
+            (uid, json.dumps(list(project_ids))),
+        ).fetchall()
+        results: Dict[str, Dict[str, Any]] = {}
+        for project_id, payload in rows:
+            data = json.loads(payload)
+            data["id"] = project_id
+            results[project_id] = data
+        return results
+
+    def get_project(self, uid: str, project_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT data FROM projects WHERE id = ? AND uid = ?", (project_id, uid)
+        ).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        data["id"] = project_id
+        return data
+
+    def list_projects(self, uid: str, limit: int, start_after: Optional[Tuple[str, str]] = None,
+                      fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        # "\uffff" sorts after every ISO timestamp, so the first page needs no separate statement.
+        params = (uid, *(start_after or ("\uffff", "")), limit)
+        if fields is not None:
+            fields = tuple(fields)
+            columns = ", ".join("json_extract(data, ?)" for _ in fields)
+            rows = self._conn().execute(
+                f"SELECT id, {columns} FROM projects WHERE uid = ? AND (created_at, id) < (?, ?) "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                tuple(f'$."{name}"' for name in fields) + params,
+            ).fetchall()
+            return [
+                dict({k: v for k, v in zip(fields, values) if v is not None}, id=project_id)
+                for project_id, *values in rows
+            ]
+        rows = self._conn().execute(
+            "SELECT id, data FROM projects WHERE uid = ? AND (created_at, id) < (?, ?) "
+            "ORDER BY created_at DESC, id DESC LIMIT ?",
+            params,
+        ).fetchall()
+        results: List[Dict[str, Any]] = []
+        for project_id, payload in rows:
+            data = json.loads(payload)
+            data["id"] = project_id
+            results.append(data)
+        return results
+
+
+def create_storage_backend() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "sqlite":
+        return SQLiteStorage(settings.STORAGE_DB_PATH)
+    return FirestoreStorage()
+
+
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    """Process-wide storage backend, created on first use."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage_backend()
+    return _storage
@@ -0,0 +1,81 @@
+"""
+Cache of verified Firebase ID tokens.
+
+Verifying an ID token means checking its RSA signature against Google's
+signing certificates (fetched over HTTP whenever they drop out of the
+cache). A signed-in browser sends the same token on every request until it
+expires, so decoded tokens are kept in a bounded LRU until the token's own
+`exp`, turning repeat verification into a dictionary lookup. Entries are
+keyed by the token's SHA-256, so raw tokens are not held as keys, and a
+token that fails verification is never cached.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from backend.config import settings
+
+# Entries expire this many seconds before the token does, to absorb clock skew.
+EXPIRY_MARGIN_SECONDS = 5
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    """Thread-safe LRU of decoded token claims, each kept until its `exp`."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(0, int(max_entries))
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def set(self, token: str, claims: Dict[str, Any]) -> None:
+        exp = claims.get("exp")
+        if not self.max_entries or not isinstance(exp, (int, float)):
+            return
+        expires_at = exp - EXPIRY_MARGIN_SECONDS
+        if expires_at <= time.time():
+            return
+        key = token_key(token)
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+token_cache = TokenCache(settings.AUTH_TOKEN_CACHE_MAX_ENTRIES)
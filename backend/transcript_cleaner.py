@@ -0,0 +1,206 @@
+"""
+Single-pass transcript cleaning engine.
+
+All removal rules of a cleaner are folded into one precompiled trigger pattern
+made only of literals and word boundaries, so finding the next rule to apply is
+a linear scan. Rules that extend past their trigger ("... up to the end of the
+sentence", "... up to the next `subscribe`", "... up to the closing bracket")
+use forward-only finders that never rescan text they have already passed, so
+the whole clean is O(n) even on multi-hour auto-captions where the old
+`.*?` patterns backtracked.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Pattern, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    A removal rule.
+
+    `trigger` is a regex fragment (literals and `\\b` only) that starts the
+    match. `then` lists substrings that must follow, in order, anywhere later
+    in the text. `until` decides where the removed span ends:
+      - "trigger":  right after the trigger (or the last `then` substring)
+      - "sentence": before the next "." (or at the end of the text)
+      - a single character: through the next occurrence of that character
+    """
+    trigger: str
+    then: Tuple[str, ...] = ()
+    until: str = "trigger"
+
+
+# _span_end result for a rule whose end lies past the current window
+_UNDECIDED = -1
+
+
+class _ForwardFinder:
+    """Finds the next match at or after a position, reusing earlier scans."""
+
+    __slots__ = ("pattern", "text", "last", "exhausted_from")
+
+    def __init__(self, pattern: Pattern[str], text: str):
+        self.pattern = pattern
+        self.text = text
+        self.last: Optional[re.Match] = None
+        self.exhausted_from: Optional[int] = None
+
+    def find(self, start: int) -> Optional[re.Match]:
+        if self.exhausted_from is not None and start >= self.exhausted_from:
+            return None
+        if self.last is not None and self.last.start() >= start:
+            return self.last
+        match = self.pattern.search(self.text, start)
+        if match is None:
+            self.exhausted_from = start
+        else:
+            self.last = match
+        return match
+
+
+class TranscriptCleaner:
+    """A precompiled set of removal rules applied in one left-to-right pass."""
+
+    # Longer than any trigger match; a windowed scan leaves this much of the
+    # window's end undecided so a trigger cut by the window edge is not missed.
+    TRIGGER_MARGIN = 64
+
+    def __init__(self, rules: Sequence[Rule], dedupe_sentences: bool = False):
+        self.rules = tuple(rules)
+        self.dedupe_sentences = dedupe_sentences
+        self._trigger = re.compile(
+            "|".join(f"(?P<r{i}>{rule.trigger})" for i, rule in enumerate(self.rules)),
+            re.IGNORECASE,
+        )
+        needles = {needle for rule in self.rules for needle in rule.then}
+        needles.update(rule.until for rule in self.rules if rule.until not in ("trigger", "sentence"))
+        needles.add(".")
+        self._needles = {needle: re.compile(re.escape(needle), re.IGNORECASE) for needle in needles}
+
+    def clean(self, text: str) -> str:
+        if not text:
+            return text
+        # Captions carry arbitrary line breaks; work on single-spaced text.
+        text = " ".join(text.split())
+        cleaned = "".join(text[begin:end] for begin, end in self.kept_spans(text))
+
+        if self.dedupe_sentences:
+            cleaned = remove_repeated_sentences(cleaned)
+        return " ".join(cleaned.split())
+
+    def kept_spans(self, text: str) -> List[Tuple[int, int]]:
+        """
+        The (begin, end) ranges of `text` that survive the removal rules, in
+        order. `clean` joins them; callers that need to know where the kept
+        text came from (e.g. caption segments) map them back themselves.
+        """
+        return self.scan(text)[0]
+
+    def scan(self, text: str, pos: int = 0, final: bool = True,
+             force_before: int = 0) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Kept ranges of `text[pos:]` and the position up to which they are decided.
+
+        With final=False `text` is a window of a longer stream: the scan stops
+        at the first match whose extent depends on text past the window (an
+        unclosed bracket, a sentence without its period, a `then` substring
+        not seen yet, or a trigger within TRIGGER_MARGIN of the end), and the
+        returned position is where the next, longer window must resume.
+        Undecided matches starting before `force_before` are instead treated as
+        rules that could not complete, so a caller can bound its carry-over.
+        """
+        finders = {needle: _ForwardFinder(pattern, text) for needle, pattern in self._needles.items()}
+        spans: List[Tuple[int, int]] = []
+        keep_from = pos
+        limit = len(text) if final else max(pos, len(text) - self.TRIGGER_MARGIN)
+        while True:
+            match = self._trigger.search(text, pos)
+            if match is None or match.start() >= limit:
+                break
+            open_ended = "end" if final else "incomplete" if match.start() < force_before else "undecided"
+            end = self._span_end(self.rules[int(match.lastgroup[1:])], match.end(), finders, len(text), open_ended)
+            if end is _UNDECIDED:
+                limit = match.start()
+                break
+            if end is None:
+                # Rule could not complete here; keep scanning just past its start.
+                pos = match.start() + 1
+                continue
+            if match.start() > keep_from:
+                spans.append((keep_from, match.start()))
+            keep_from = pos = max(end, match.start() + 1)
+        if keep_from < limit:
+            spans.append((keep_from, limit))
+        return spans, max(keep_from, limit)
+
+    @staticmethod
+    def _span_end(rule: Rule, end: int, finders, length: int, open_ended: str = "end"):
+        """
+        Where a rule triggered at `end` stops removing. `open_ended` decides what
+        a rule whose stop lies past the text returns: "end" applies the
+        end-of-text behaviour below, "incomplete" gives None and "undecided"
+        gives _UNDECIDED.
+        """
+        for needle in rule.then:
+            found = finders[needle].find(end)
+            if found is None:
+                return _UNDECIDED if open_ended == "undecided" else None
+            end = found.end()
+        if rule.until == "trigger":
+            return end
+        if rule.until == "sentence":
+            found = finders["."].find(end)
+            if found is not None:
+                return found.start()
+            return {"end": length, "incomplete": None}.get(open_ended, _UNDECIDED)
+        found = finders[rule.until].find(end)
+        if found is not None:
+            return found.end()
+        return _UNDECIDED if open_ended == "undecided" else None
+
+
+def remove_repeated_sentences(text: str) -> str:
+    """Lowercase, drop duplicate and very short (<= 10 chars) sentences, and rejoin."""
+    unique_sentences = []
+    seen = set()
+    for sentence in text.split("."):
+        sentence = sentence.strip().lower()
+        if sentence and sentence not in seen and len(sentence) > 10:
+            seen.add(sentence)
+            unique_sentences.append(sentence)
+    return ". ".join(unique_sentences)
+
+
+def _words(*words: str) -> str:
+    return r"\b(?:" + "|".join(words) + r")\b"
+
+
+_BRACKETED = (Rule(r"\[", until="]"), Rule(r"\(", until=")"))
+
+# Rules of YouTubeService._clean_transcript: filler words and bracketed asides like [Music].
+BASIC_CLEANER = TranscriptCleaner([
+    Rule(_words("um", "uh", "like", "you know", "so basically", "okay", "alright")),
+    *_BRACKETED,
+])
+
+# Rules of BlogGenerator._clean_transcript_advanced: promotional segments, greetings,
+# fillers and bracketed asides, followed by removal of repeated sentences.
+ADVANCED_CLEANER = TranscriptCleaner([
+    Rule("this video is sponsored by", until="sentence"),
+    Rule("before we start", then=("subscribe",), until="sentence"),
+    Rule("don't forget to like and subscribe", until="sentence"),
+    Rule("check out the description", until="sentence"),
+    Rule("link in the description", until="sentence"),
+    Rule("thanks to", then=("for sponsoring",), until="sentence"),
+    Rule("use code", then=("for", "discount"), until="sentence"),
+    Rule(r"\A(?:hey|hi|hello|what's up)", until="sentence"),
+    Rule("welcome back to", until="sentence"),
+    Rule("in today's video", until="sentence"),
+    Rule(_words("um", "uh", "like", "you know", "so basically", "okay", "alright", "actually")),
+    Rule(_words("sort of", "kind of", "i mean", "you see", r"right\?")),
+    *_BRACKETED,
+], dedupe_sentences=True)
@@ -0,0 +1,182 @@
+"""
+Compact, timestamp-preserving transcript storage.
+
+Caption segments are appended one at a time into array-backed columns: start
+and duration as C doubles, and the text as one UTF-8 byte buffer with an
+offsets column. Nothing holds a per-segment Python object, the joined text is
+produced on demand, and any time range can be sliced without re-joining the
+whole transcript.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from backend.transcript_cleaner import TranscriptCleaner
+
+Segment = Tuple[float, float, str]
+
+
+class TranscriptSegments:
+    """Append-only column store of (start, duration, text) caption segments."""
+
+    def __init__(self, language: Optional[str] = None):
+        self.language = language
+        self._starts = array("d")
+        self._durations = array("d")
+        self._offsets = array("Q")
+        self._text = bytearray()
+
+    def append(self, start: float, duration: float, text: str) -> None:
+        # Segments are stored space-separated so the joined view is a single decode.
+        if self._offsets:
+            self._text += b" "
+        self._offsets.append(len(self._text))
+        self._text += text.encode("utf-8")
+        self._starts.append(start)
+        self._durations.append(duration)
+
+    def extend(self, segments: Iterable[Segment]) -> "TranscriptSegments":
+        for start, duration, text in segments:
+            self.append(start, duration, text)
+        return self
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @property
+    def text(self) -> str:
+        """All segments joined with single spaces."""
+        return self._text.decode("utf-8")
+
+    @property
+    def duration(self) -> float:
+        if not self._starts:
+            return 0.0
+        return self._starts[-1] + self._durations[-1]
+
+    def _byte_range(self, first: int, last: int) -> Tuple[int, int]:
+        end = self._offsets[last] - 1 if last < len(self._offsets) else len(self._text)
+        return self._offsets[first], end
+
+    def slice(self, start_time: float, end_time: float) -> str:
+        """Joined text of the segments that overlap [start_time, end_time) seconds."""
+        if not self._offsets or end_time <= start_time:
+            return ""
+        first = max(0, bisect_right(self._starts, start_time) - 1)
+        if self._starts[first] + self._durations[first] <= start_time:
+            first += 1
+        last = bisect_left(self._starts, end_time)
+        if first >= last:
+            return ""
+        begin, end = self._byte_range(first, last)
+        return self._text[begin:end].decode("utf-8")
+
+    def __iter__(self) -> Iterator[Segment]:
+        for i in range(len(self._offsets)):
+            begin, end = self._byte_range(i, i + 1)
+            yield self._starts[i], self._durations[i], self._text[begin:end].decode("utf-8")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "language": self.language,
+            "starts": self._starts.tolist(),
+            "durations": self._durations.tolist(),
+            "offsets": self._offsets.tolist(),
+            "text": self.text,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "TranscriptSegments":
+        segments = cls(language=data.get("language"))
+        segments._starts = array("d", data["starts"])
+        segments._durations = array("d", data["durations"])
+        segments._offsets = array("Q", data["offsets"])
+        segments._text = bytearray(data["text"].encode("utf-8"))
+        return segments
+
+
+def iter_raw_segments(items: Iterable[Union[Mapping[str, Any], Any]]) -> Iterator[Segment]:
+    """Normalize youtube-transcript-api segments (dicts or snippet objects) to tuples, lazily."""
+    for item in items:
+        if isinstance(item, Mapping):
+            yield float(item.get("start", 0.0)), float(item.get("duration", 0.0)), item.get("text", "")
+        else:
+            yield float(item.start), float(item.duration), item.text
+
+
+# Joined text gathered between windowed scans of the transcript
+CLEAN_WINDOW_CHARS = 4096
+# Undecided text carried across windows before open rules are given up on
+MAX_CARRY_CHARS = 64 * 1024
+
+
+def iter_cleaned_segments(segments: Iterable[Segment], cleaner: TranscriptCleaner) -> Iterator[Segment]:
+    """
+    Clean the transcript as one text, so asides and filler phrases split across
+    caption segments ("[Mus" / "ic]", "you" / "know") are still removed, then
+    give each segment the kept text that came from it. Segments that clean
+    down to nothing are dropped.
+
+    The text is scanned in windows of about CLEAN_WINDOW_CHARS. A rule still
+    open at the end of a window (an unclosed bracket, a sentence without its
+    period) is carried into the next one, so peak memory is bounded by the
+    window plus that carry. A rule left open for more than MAX_CARRY_CHARS is
+    treated as not completing, where cleaning the whole text at once would
+    still have removed it once it closed. Sentence de-duplication is not
+    applied here.
+    """
+    parts: List[str] = []       # joined text from absolute offset `base`
+    base = 0
+    length = 0                  # absolute length of the joined text so far
+    resume = 0                  # absolute offset the next scan starts from
+    scanned = 0                 # `length` at the last scan
+    pending: Deque[Tuple[float, float, int, int]] = deque()  # start, duration, begin, end
+    kept: Deque[Tuple[int, int]] = deque()                    # decided kept ranges, absolute
+
+    def advance(final: bool) -> List[Segment]:
+        nonlocal base, resume, scanned
+        text = "".join(parts)
+        pos = resume - base
+        force_before = len(text) if not final and len(text) - pos > MAX_CARRY_CHARS else 0
+        spans, decided = cleaner.scan(text, pos, final=final, force_before=force_before)
+        kept.extend((base + begin, base + end) for begin, end in spans)
+        resume, scanned = base + decided, length
+
+        done: List[Segment] = []
+        while pending and (final or pending[0][3] <= resume):
+            start, duration, begin, end = pending.popleft()
+            while kept and kept[0][1] <= begin:
+                kept.popleft()
+            pieces = []
+            for span_begin, span_end in kept:
+                if span_begin >= end:
+                    break
+                pieces.append(text[max(span_begin, begin) - base:min(span_end, end) - base])
+            cleaned = " ".join("".join(pieces).split())
+            if cleaned:
+                done.append((start, duration, cleaned))
+
+        # Keep the unfinished segments, plus one character before `resume` so
+        # the next scan sees the word boundary there and never the text start.
+        new_base = min(pending[0][2] if pending else length, max(resume - 1, 0))
+        parts[:] = [text[new_base - base:]]
+        base = new_base
+        return done
+
+    for start, duration, text in segments:
+        text = " ".join(text.split())
+        if not text:
+            continue
+        if length:
+            parts.append(" ")  # the joining space belongs to neither segment
+            length += 1
+        pending.append((start, duration, length, length + len(text)))
+        parts.append(text)
+        length += len(text)
+        if length - scanned >= CLEAN_WINDOW_CHARS:
+            yield from advance(final=False)
+    yield from advance(final=True)
@@ -1,6 +1,8 @@
 import os
 import re
-from typing import Optional, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Sequence
 from datetime import datetime
 import json
 from pytube import YouTube
@@ -8,12 +10,41 @@ from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound, Tran
 import requests
 from xml.etree.ElementTree import ParseError
 
+from backend.cache import TieredCache, build_cache
+from backend.config import settings
+from backend.singleflight import single_flight
+from backend.transcript_cleaner import BASIC_CLEANER
+from backend.transcript_segments import TranscriptSegments, iter_cleaned_segments, iter_raw_segments
+
+# Caption languages tried in order before falling back to any available transcript
+DEFAULT_TRANSCRIPT_LANGUAGES = ('en', 'en-US', 'en-GB')
+
 class YouTubeService:
     """Service for handling YouTube video operations"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, transcript_cache: Optional[TieredCache] = None,
+                 metadata_cache: Optional[TieredCache] = None):
         self.api_key = api_key or os.getenv('YOUTUBE_API_KEY')
         self.base_url = 'https://www.googleapis.com/youtube/v3'
+        self.transcript_cache = transcript_cache or build_cache(
+            "transcripts",
+            ttl_seconds=settings.TRANSCRIPT_CACHE_TTL_SECONDS,
+            max_entries=settings.TRANSCRIPT_CACHE_MAX_ENTRIES,
+            max_bytes=settings.TRANSCRIPT_CACHE_MAX_BYTES,
+        )
+        # Metadata entries stay servable until they are stale-expired; anything
+        # older than METADATA_CACHE_FRESH_SECONDS is refreshed in the background.
+        self.metadata_cache = metadata_cache or build_cache(
+            "video_metadata",
+            ttl_seconds=settings.METADATA_CACHE_STALE_SECONDS,
+            max_entries=settings.METADATA_CACHE_MAX_ENTRIES,
+            max_bytes=settings.METADATA_CACHE_MAX_BYTES,
+        )
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="metadata-refresh")
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        self._metadata_flight = single_flight("video_metadata")
+        self._transcript_flight = single_flight("transcripts")
         
         # Debug logging (avoid emoji for Windows terminals)
         print("YouTubeService initialized")
@@ -49,9 +80,56 @@ class YouTubeService:
         return self.extract_video_id(url) is not None
     
     def get_video_metadata(self, video_id: str) -> Dict[str, Any]:
-        """Get video metadata from YouTube Data API or PyTube as fallback"""
+        """
+        Get video metadata, serving cached entries immediately (stale-while-revalidate).
+        Falls back to mock metadata, which is never cached, when every backend fails.
+        """
         print(f"Getting metadata for video ID: {video_id}")
         
+        cached = self.metadata_cache.get(video_id)
+        if cached is not None:
+            if cached.age > settings.METADATA_CACHE_FRESH_SECONDS:
+                print(f"Serving stale metadata for {video_id}, refreshing in background")
+                self._schedule_metadata_refresh(video_id)
+            else:
+                print(f"Metadata cache hit for {video_id}")
+            return dict(cached.value)
+        
+        # Concurrent requests for the same video share one upstream walk
+        return dict(self._metadata_flight.do(video_id, self._load_video_metadata, video_id))
+    
+    def _load_video_metadata(self, video_id: str) -> Dict[str, Any]:
+        result = self._fetch_video_metadata(video_id)
+        if result is None:
+            print("Using mock data as final fallback")
+            return self._get_mock_metadata(video_id)
+        
+        self.metadata_cache.set(video_id, result)
+        return result
+    
+    def _schedule_metadata_refresh(self, video_id: str) -> None:
+        """Refresh a stale metadata entry in the background, at most once at a time per video"""
+        with self._refreshing_lock:
+            if video_id in self._refreshing:
+                return
+            self._refreshing.add(video_id)
+        self._refresh_executor.submit(self._refresh_metadata, video_id)
+    
+    def _refresh_metadata(self, video_id: str) -> None:
+        try:
+            result = self._fetch_video_metadata(video_id)
+            if result is not None:
+                self.metadata_cache.set(video_id, result)
+            else:
+                print(f"Background metadata refresh failed for {video_id}, keeping stale entry")
+        except Exception as e:
+            print(f"Background metadata refresh error for {video_id}: {type(e).__name__}: {e}")
+        finally:
+            with self._refreshing_lock:
+                self._refreshing.discard(video_id)
+    
+    def _fetch_video_metadata(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """Walk YouTube Data API -> PyTube -> yt-dlp; returns None if all of them fail"""
         # Try YouTube Data API first if API key is available
         if self.api_key and self.api_key.strip():
             print("Trying YouTube Data API...")
@@ -83,8 +161,7 @@ class YouTubeService:
                 except Exception as ytdlp_error:
                     print(f"yt-dlp also failed: {ytdlp_error}")
             
-            print("Using mock data as final fallback")
-            return self._get_mock_metadata(video_id)
+            return None
     
     def _get_metadata_from_api(self, video_id: str) -> Dict[str, Any]:
         """Get metadata using YouTube Data API"""
@@ -244,14 +321,34 @@ class YouTubeService:
             'video_id': video_id
         }
     
-    def get_transcript(self, video_id: str) -> str:
-        """Get video transcript using youtube-transcript-api"""
+    def get_transcript(self, video_id: str, languages: Sequence[str] = DEFAULT_TRANSCRIPT_LANGUAGES) -> Optional[str]:
+        """Get the cleaned video transcript as one string (see get_transcript_segments for timestamps)"""
+        segments = self.get_transcript_segments(video_id, languages)
+        return segments.text if segments is not None else None
+    
+    def get_transcript_segments(self, video_id: str,
+                                languages: Sequence[str] = DEFAULT_TRANSCRIPT_LANGUAGES) -> Optional[TranscriptSegments]:
+        """
+        Get cleaned, timestamped transcript segments using youtube-transcript-api,
+        served from the transcript cache when possible. Returns None when no
+        transcript is available.
+        """
         print(f"Getting transcript for video ID: {video_id}")
         
+        cache_key = f"segments:{video_id}:{','.join(languages)}"
+        cached = self.transcript_cache.get(cache_key)
+        if cached is not None:
+            print(f"Transcript cache hit for {video_id} (language: {cached.value['cleaned']['language']})")
+            return TranscriptSegments.from_dict(cached.value['cleaned'])
+        
+        # Concurrent requests for the same video share one upstream fetch
+        return self._transcript_flight.do(cache_key, self._fetch_transcript, video_id, languages, cache_key)
+    
+    def _fetch_transcript(self, video_id: str, languages: Sequence[str], cache_key: str) -> Optional[TranscriptSegments]:
+        """Fetch, clean and cache a transcript; returns None when no transcript is available"""
         try:
-            # Try to get transcript in different languages
-            languages = ['en', 'en-US', 'en-GB']  # Try English variants first
             transcript_list = None
+            language_code = None
             
             # Find available transcripts to be more robust
             available_transcripts = YouTubeTranscriptApi.list_transcripts(video_id)
@@ -260,6 +357,7 @@ class YouTubeService:
                 try:
                     transcript = available_transcripts.find_transcript([lang])
                     transcript_list = transcript.fetch()
+                    language_code = transcript.language_code
                     print(f"Got transcript in language: {lang}")
                     break
                 except NoTranscriptFound:
@@ -269,18 +367,27 @@ class YouTubeService:
             if not transcript_list:
                 for transcript in available_transcripts:
                     transcript_list = transcript.fetch()
+                    language_code = transcript.language_code
                     print(f"Got auto-generated transcript in language: {transcript.language_code}")
                     break
 
             if not transcript_list:
                 raise NoTranscriptFound("No suitable transcript found for this video.")
 
-            # Combine all transcript segments
-            full_transcript = ' '.join([item['text'] for item in transcript_list])
+            # Clean in bounded windows into compact column storage, keeping
+            # timestamps and never building the full transcript as one string.
+            raw = TranscriptSegments(language=language_code).extend(iter_raw_segments(transcript_list))
+            cleaned = TranscriptSegments(language=language_code).extend(
+                iter_cleaned_segments(raw, BASIC_CLEANER)
+            )
+            print(f"Transcript: {len(cleaned)} segments, {cleaned.duration:.0f}s")
             
-            # Clean up the transcript
-            cleaned = self._clean_transcript(full_transcript)
-            print(f"Transcript length: {len(cleaned)} characters")
+            # Keep the raw segments alongside the cleaned ones so neither the
+            # fetch nor the cleaning has to be repeated by any worker.
+            self.transcript_cache.set(cache_key, {
+                'raw': raw.to_dict(),
+                'cleaned': cleaned.to_dict(),
+            })
             
             return cleaned
             
@@ -298,24 +405,8 @@ class YouTubeService:
             return self._get_sample_transcript()
     
     def _clean_transcript(self, transcript: str) -> str:
-        """Clean and format transcript text"""
-        # Remove extra whitespace and normalize text
-        cleaned = re.sub(r'\s+', ' ', transcript.strip())
-        
-        # Remove common filler words and phrases (optional)
-        filler_patterns = [
-            r'\b(um|uh|like|you know|so basically|okay|alright)\b',
-            r'\[.*?\]',  # Remove bracketed content like [Music]
-            r'\(.*?\)'   # Remove parenthetical content
-        ]
-        
-        for pattern in filler_patterns:
-            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
-        
-        # Clean up extra spaces
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-        
-        return cleaned
+        """Clean and format transcript text (whitespace, filler words, bracketed asides like [Music])"""
+        return BASIC_CLEANER.clean(transcript)
     
     def _get_sample_transcript(self) -> None:
         """
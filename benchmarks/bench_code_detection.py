@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark code-content detection on 100k-word transcripts.
+
+Compares the single-pass token matcher against the previous approach (one
+substring scan of the lowercased transcript per indicator), and shows the
+false positives the substring approach produced on ordinary speech.
+
+Usage: python benchmarks/bench_code_detection.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.code_detection import INDICATORS, analyze_code_content  # noqa: E402
+
+WORDS = 100_000
+
+# Indicator strings exactly as the substring scan used them.
+LEGACY_INDICATORS = [
+    'javascript', 'python', 'java', 'react', 'node', 'html', 'css',
+    'typescript', 'angular', 'vue', 'php', 'ruby', 'go', 'rust',
+    'function', 'class', 'import', 'export', 'console.log', 'print(',
+    'def ', 'var ', 'let ', 'const ', 'if (', 'for (', 'while (',
+    'git', 'github', 'npm', 'yarn', 'pip', 'docker', 'kubernetes',
+    'api', 'database', 'sql', 'mongodb', 'postgresql',
+    'tutorial', 'coding', 'programming', 'development', 'build',
+    'create', 'install', 'setup', 'configure', 'deploy',
+]
+
+
+def legacy_detect(transcript: str) -> int:
+    lowered = transcript.lower()
+    return sum(1 for indicator in LEGACY_INDICATORS if indicator in lowered)
+
+
+def _transcript(vocabulary, n: int) -> str:
+    rng = random.Random(7)
+    return " ".join(rng.choice(vocabulary) for _ in range(n))
+
+
+def _best_of(fn, text: str, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    everyday = ("we went to a good restaurant near the capital and let everyone order something "
+                "delicious before the concert started classes begin again next week").split()
+    technical = everyday + [w for indicators in INDICATORS.values() for w in indicators if " " not in w]
+
+    for name, vocabulary in (("everyday speech", everyday), ("technical talk", technical)):
+        text = _transcript(vocabulary, WORDS)
+        legacy_seconds = _best_of(legacy_detect, text)
+        new_seconds = _best_of(analyze_code_content, text)
+        detection = analyze_code_content(text)
+        print(f"{name} ({WORDS:,} words, {len(text):,} chars)")
+        print(f"  substring scans: {legacy_seconds * 1000:8.1f} ms, "
+              f"{legacy_detect(text)} indicators matched -> code={legacy_detect(text) >= 3}")
+        print(f"  token matcher:   {new_seconds * 1000:8.1f} ms, "
+              f"score {detection.total:.2f} {detection.scores} -> code={detection.is_code}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark extractive prompt compression time versus transcript length.
+
+Each transcript is compressed into the default prompt budget. Ranking should
+scale linearly with length; the run fails if the cost per word grows by more
+than MAX_SCALING between the shortest and the longest transcript. Pass
+--pure-python to time the fallback used when NumPy is not installed.
+
+Usage: python benchmarks/bench_extractive_compression.py [--pure-python]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend import extractive_compression  # noqa: E402
+from backend.extractive_compression import compress_extractive, split_units  # noqa: E402
+from backend.prompt_budget import tokens_to_chars  # noqa: E402
+
+MINUTES = [10, 30, 60, 180]
+WORDS_PER_MINUTE = 150
+BUDGET_CHARS = tokens_to_chars(1000)
+MAX_SCALING = 3.0
+
+
+def _transcript(minutes: int) -> str:
+    rng = random.Random(minutes)
+    topics = [
+        "python functions return values to the caller".split(),
+        "docker containers isolate each process from the host".split(),
+        "the database stores every record in an indexed table".split(),
+        "so yeah um let me just check the chat real quick".split(),
+        "make sure to like and subscribe to the channel".split(),
+    ]
+    sentences = []
+    words = 0
+    while words < minutes * WORDS_PER_MINUTE:
+        sentence = rng.choice(topics)[:] + [rng.choice(("today", "again", "here", "now"))]
+        rng.shuffle(sentence)
+        sentences.append(" ".join(sentence).capitalize() + ".")
+        words += len(sentence)
+    return " ".join(sentences)
+
+
+def _best_of(fn, text: str, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> int:
+    if "--pure-python" in sys.argv:
+        extractive_compression.np = None
+    backend = "numpy" if extractive_compression.np is not None else "pure python"
+    print(f"ranking backend: {backend}, budget {BUDGET_CHARS:,} chars\n")
+
+    per_word = []
+    for minutes in MINUTES:
+        text = _transcript(minutes)
+        n_words = len(text.split())
+        seconds = _best_of(lambda t: compress_extractive(t, BUDGET_CHARS), text)
+        per_word.append(seconds / n_words)
+        print(f"{minutes:>4} min {n_words:>8,} words {len(split_units(text)):>6,} sentences "
+              f"{seconds * 1000:>9.1f} ms  {len(text):>9,} -> {BUDGET_CHARS:,} chars")
+
+    scaling = per_word[-1] / per_word[0]
+    verdict = "ok" if scaling <= MAX_SCALING else "NOT LINEAR"
+    print(f"\nper-word cost x{scaling:.2f} from shortest to longest: {verdict}")
+    return 0 if scaling <= MAX_SCALING else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Drive the LLM router against local stand-in endpoints.
+
+Three stand-ins are started in-process: a fast one, a slower one, and a fast
+one with a heavy tail and errors. The same request load runs twice, once
+without and once with hedging. For each run the script prints latency
+percentiles, how requests were spread, and the breaker state. Halfway through
+each run the fast endpoint goes down, to show ejection and recovery.
+
+Usage: python benchmarks/bench_llm_router.py [--requests 300] [--concurrency 8]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from llm_standin_server import start_standin  # noqa: E402
+
+STANDINS = {
+    "fast": dict(median=0.05, sigma=0.3, error_rate=0.0),
+    "slow": dict(median=0.15, sigma=0.3, error_rate=0.0),
+    "flaky": dict(median=0.04, sigma=1.2, error_rate=0.1),
+}
+
+
+def run(service, servers, hedge: bool, requests: int, concurrency: int) -> None:
+    from backend.llm_limiter import llm_limiter
+    from backend.llm_router import LLMRouter, endpoint_configs_from_settings
+    from backend.llm_service import LLMUnavailableError
+
+    service.router = LLMRouter(endpoint_configs_from_settings(), hedge=hedge, hedge_min_delay=0.05,
+                               cooldown_seconds=1.0, limiter=llm_limiter)
+    latencies, errors = [], 0
+
+    def one(i: int):
+        if i == requests // 2:
+            servers["fast"][1].down = True
+        if i == requests * 3 // 4:
+            servers["fast"][1].down = False
+        started = time.perf_counter()
+        try:
+            service.generate_content("system", f"request {i}")
+        except LLMUnavailableError:
+            return time.perf_counter() - started, True
+        return time.perf_counter() - started, False
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for seconds, failed in pool.map(one, range(requests)):
+            latencies.append(seconds)
+            errors += failed
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000  # noqa: E731
+    stats = service.router.stats()
+    print(f"hedging={'on ' if hedge else 'off'}  p50 {pct(0.5):6.1f} ms  p95 {pct(0.95):6.1f} ms  "
+          f"p99 {pct(0.99):6.1f} ms  mean {statistics.mean(latencies) * 1000:6.1f} ms  "
+          f"errors {errors}/{requests}  hedged {stats['hedged']} (won {stats['hedge_wins']})")
+    for endpoint in stats["endpoints"]:
+        print(f"    {endpoint['name']:<6} requests {endpoint['requests']:>4}  failures {endpoint['failures']:>3}  "
+              f"ewma {endpoint['latency_ewma_ms']} ms  errors {endpoint['error_rate_ewma']}  {endpoint['state']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    servers = {name: start_standin(seed=i, **spec) for i, (name, spec) in enumerate(STANDINS.items())}
+    os.environ["LLM_ENDPOINTS"] = json.dumps([
+        {"name": name, "base_url": f"http://127.0.0.1:{server.server_port}/v1/", "api_key": "standin"}
+        for name, (server, _) in servers.items()
+    ])
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.concurrency)
+    # Settings are read at import time, so import after configuring the environment.
+    from backend.llm_service import LLMService
+
+    service = LLMService()
+    for hedge in (False, True):
+        run(service, servers, hedge, args.requests, args.concurrency)
+    for server, _ in servers.values():
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
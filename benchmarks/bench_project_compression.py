@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Compare stored size and CPU cost of the project compression codecs.
+
+Each input is treated as one generated blog: it is encoded the way
+save_project stores it (compressed, then base64) and decoded again, and the
+stored size and the best-of-N encode/decode times are reported per codec.
+Pass Markdown files of real blog output (e.g. exported from saved projects);
+without arguments the repository's own Markdown documents stand in. zstd is
+included when the `zstandard` package is installed.
+
+Usage: python benchmarks/bench_project_compression.py [blog.md ...] [--repeats 20]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backend.project_compression import CODECS, compress_text, decompress_value  # noqa: E402
+
+
+def _best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="*", type=Path)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(ROOT.glob("*.md"))
+    texts = [path.read_text(encoding="utf-8") for path in paths]
+    raw_bytes = sum(len(text.encode("utf-8")) for text in texts)
+    print(f"{len(texts)} document(s), {raw_bytes / 1024:.1f} KiB of text")
+    print(f"{'codec':<6} {'stored KiB':>10} {'ratio':>7} {'encode MB/s':>12} {'decode MB/s':>12}")
+
+    for codec in CODECS:
+        encoded = [compress_text(text, codec=codec, min_bytes=0) for text in texts]
+        stored = sum(len(value["data"]) if isinstance(value, dict) else len(value.encode("utf-8"))
+                     for value in encoded)
+        assert [decompress_value(value) for value in encoded] == texts
+        encode = _best_of(lambda: [compress_text(text, codec=codec, min_bytes=0) for text in texts], args.repeats)
+        decode = _best_of(lambda: [decompress_value(value) for value in encoded], args.repeats)
+        megabytes = raw_bytes / 1e6
+        print(f"{codec:<6} {stored / 1024:>10.1f} {stored / raw_bytes:>7.2f} "
+              f"{megabytes / encode:>12.1f} {megabytes / decode:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
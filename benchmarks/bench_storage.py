@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Time credit and project operations on the SQLite storage backend.
+
+Runs offline against a temporary database: credit charges from several
+threads (one transaction per charge, then with credit leasing), followed by
+project saves and listings. Compare the per-operation latency with a
+Firestore round trip (typically 20-100 ms) to size the gain.
+
+Usage: python benchmarks/bench_storage.py [--ops 2000] [--threads 8] [--lease 10]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def timed(label: str, ops: int, threads: int, fn) -> None:
+    def one(i: int) -> float:
+        started = time.perf_counter()
+        fn(i)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(one, range(ops)))
+    seconds = time.perf_counter() - started
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000  # noqa: E731
+    print(f"{label:<34} {ops / seconds:>8.0f} ops/s  p50 {pct(0.5):6.2f} ms  p99 {pct(0.99):6.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--lease", type=int, default=10)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="yt2blog-bench-")
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+    os.environ["STORAGE_DB_PATH"] = os.path.join(directory, "storage.sqlite3")
+    os.environ["CACHE_DISK_ENABLED"] = "False"
+    # Settings are read at import time, so import after configuring the environment.
+    from backend import credits_service, projects_service
+    from backend.storage import get_storage
+
+    users = [f"user-{i}" for i in range(args.threads * 4)]
+    for uid in users:
+        get_storage().merge_user(uid, {"credits_remaining": args.ops * 2, "credits_total": args.ops * 2})
+
+    timed("consume_credits (transaction)", args.ops, args.threads,
+          lambda i: credits_service.consume_credits(users[i % len(users)], 1))
+    credits_service.credit_leases.size = args.lease
+    timed(f"consume_credits (lease of {args.lease})", args.ops, args.threads,
+          lambda i: credits_service.consume_credits(users[i % len(users)], 1))
+    credits_service.credit_leases.release_all()
+    timed("refund_credits", args.ops, args.threads,
+          lambda i: credits_service.refund_credits(users[i % len(users)], 1))
+    timed("save_project", args.ops, args.threads,
+          lambda i: projects_service.save_project(users[i % len(users)], {"title": f"Project {i}", "content": "x" * 2000}))
+    timed("save_projects (batch of 20)", args.ops // 20, args.threads,
+          lambda i: projects_service.save_projects(
+              users[i % len(users)], [{"title": f"Project {i}.{j}", "content": "x" * 2000} for j in range(20)]))
+    timed("list_project_summaries (20)", args.ops, args.threads,
+          lambda i: projects_service.list_project_summaries(users[i % len(users)]))
+    recent = {uid: [row["id"] for row in projects_service.list_project_summaries(uid)[0]] for uid in users}
+    timed("get_projects (batch of 20)", args.ops, args.threads,
+          lambda i: projects_service.get_projects(users[i % len(users)], recent[users[i % len(users)]]))
+
+
+if __name__ == "__main__":
+    main()
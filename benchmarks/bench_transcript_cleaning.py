@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark the transcript cleaning engine on realistic and pathological input.
+
+Pathological inputs (an opening trigger repeated thousands of times with no
+closing match) made the old `.*?` patterns quadratic. The run fails if the
+cost per character grows by more than MAX_SCALING between the smallest and
+the largest input, i.e. if cleaning stops being linear.
+
+Usage: python benchmarks/bench_transcript_cleaning.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.transcript_cleaner import ADVANCED_CLEANER, BASIC_CLEANER  # noqa: E402
+
+SIZES = [10_000, 40_000, 160_000]  # repetitions of the unit string
+MAX_SCALING = 3.0
+
+
+def _realistic(n: int) -> str:
+    rng = random.Random(42)
+    words = ("so today we will look at how the python function works and why it matters "
+             "um like you know [Music] (laughs) okay this video is sponsored by acme. ").split()
+    return " ".join(rng.choice(words) for _ in range(n))
+
+
+CASES = {
+    "realistic captions": _realistic,
+    "unclosed '('": lambda n: "( word " * n,
+    "unclosed '['": lambda n: "[ word " * n,
+    "'before we start' without 'subscribe'": lambda n: "before we start " * n,
+    "'use code' without 'discount'": lambda n: "use code for " * n,
+}
+
+
+def _best_of(fn, text: str, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> int:
+    failed = False
+    for name, make in CASES.items():
+        per_char = []
+        for size in SIZES:
+            text = make(size)
+            seconds = _best_of(lambda t: ADVANCED_CLEANER.clean(BASIC_CLEANER.clean(t)), text)
+            per_char.append(seconds / len(text))
+            print(f"{name:<40} {len(text):>10,} chars {seconds * 1000:>9.1f} ms "
+                  f"{len(text) / seconds / 1e6:>6.1f} MB/s")
+        scaling = per_char[-1] / per_char[0]
+        verdict = "ok" if scaling <= MAX_SCALING else "NOT LINEAR"
+        failed = failed or scaling > MAX_SCALING
+        print(f"{'':<40} per-char cost x{scaling:.2f} from smallest to largest: {verdict}\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
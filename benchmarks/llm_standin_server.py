@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+OpenAI-compatible stand-in server with a configurable latency distribution.
+
+Serves POST /v1/chat/completions (plain and streaming) with canned content.
+Each response waits for a lognormal delay (median and sigma), and a fraction
+of requests fail with HTTP 503. Use it to exercise the LLM router without
+real providers, as a standalone process:
+
+    python benchmarks/llm_standin_server.py --port 9001 --median 0.8 --sigma 0.6 --error-rate 0.05
+
+or in-process via `start_standin(...)` (see bench_llm_router.py).
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+class StandinConfig:
+    def __init__(self, median: float, sigma: float, error_rate: float, seed: int = 0):
+        self.median = median
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.down = False
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> Tuple[float, bool]:
+        with self._lock:
+            self.requests += 1
+            delay = self.median * self._rng.lognormvariate(0.0, self.sigma)
+            failed = self.down or self._rng.random() < self.error_rate
+        return delay, failed
+
+
+def _handler(config: StandinConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Send each response in one segment so keep-alive requests don't stall on delayed ACKs.
+        wbufsize = -1
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            delay, failed = config.sample()
+            time.sleep(delay)
+            if failed:
+                self._send(503, json.dumps({"error": {"message": "stand-in overloaded"}}).encode())
+                return
+            content = f"Stand-in reply after {delay * 1000:.0f} ms."
+            model = request.get("model", "standin")
+            if request.get("stream"):
+                chunks = [
+                    {"id": "standin", "object": "chat.completion.chunk", "created": 0, "model": model,
+                     "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+                    for word in content.split()
+                ]
+                body = "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + "data: [DONE]\n\n"
+                self._send(200, body.encode(), "text/event-stream")
+                return
+            self._send(200, json.dumps({
+                "id": "standin", "object": "chat.completion", "created": 0, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": len(content.split()), "total_tokens": 10 + len(content.split())},
+            }).encode())
+
+    return Handler
+
+
+def start_standin(median: float, sigma: float = 0.5, error_rate: float = 0.0, port: int = 0,
+                  seed: int = 0) -> Tuple[ThreadingHTTPServer, StandinConfig]:
+    """Start a stand-in in a daemon thread; its base URL is http://127.0.0.1:<server.server_port>/v1/."""
+    config = StandinConfig(median, sigma, error_rate, seed)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, config
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--median", type=float, default=0.8, help="median latency in seconds")
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal sigma (tail heaviness)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server, _ = start_standin(args.median, args.sigma, args.error_rate, args.port)
+    print(f"Stand-in LLM listening on http://127.0.0.1:{server.server_port}/v1/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,30 @@
-from typing import Dict, Any, List, Tuple, Optional
-import re
-from backend.llm_service import LLMService
+from typing import Dict, Any, AsyncIterator, Iterator, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import asyncio
+import hashlib
+import inspect
+import json
+from backend.cache import build_cache
+from backend.config import settings
+from backend.llm_service import LLMService, LLMUnavailableError
+from backend.extractive_compression import compress_extractive, select_units
+from backend.prompt_registry import get_prompt_registry
+from backend.generation_profiles import GenerationProfile, resolve_profile
+from backend.prompt_budget import chunk_by_tokens, estimate_tokens, tokens_to_chars
+from backend.code_detection import CodeDetection, analyze_code_content
+from backend.transcript_cleaner import ADVANCED_CLEANER, remove_repeated_sentences
+
+# Templates that fall back to a local extractive summary when the LLM is unavailable
+EXTRACTIVE_FALLBACK_TEMPLATES = frozenset({"summary"})
+
+
+@dataclass
+class BlogResult:
+    content: str
+    # True when the content is a local fallback because the LLM was unavailable
+    degraded: bool = False
+
 
 class BlogGenerator:
     """
@@ -19,147 +43,241 @@ class BlogGenerator:
             self.llm_enabled = False
             print("⚠️ WARNING: LLM Service not initialized. NEBIUS_API_KEY may be missing.")
 
-        self.templates = {
-            "article": self._create_article_prompt,
-            "tutorial": self._create_tutorial_prompt,
-            "review": self._create_review_prompt,
-            "summary": self._create_summary_prompt
-        }
-        
-        # Language configurations
-        self.languages = {
-            "en": {"name": "English", "instruction": "Write in clear, professional English."},
-            "hi": {"name": "Hindi", "instruction": "Write in clear, professional Hindi. Use Devanagari script."},
-            "es": {"name": "Spanish", "instruction": "Write in clear, professional Spanish."},
-            "fr": {"name": "French", "instruction": "Write in clear, professional French."},
-            "de": {"name": "German", "instruction": "Write in clear, professional German."},
-            "pt": {"name": "Portuguese", "instruction": "Write in clear, professional Portuguese."},
-            "ja": {"name": "Japanese", "instruction": "Write in clear, professional Japanese."},
-            "ko": {"name": "Korean", "instruction": "Write in clear, professional Korean."}
-        }
+        self.prompt_registry = get_prompt_registry()
+        self._code_version = self._compute_code_version()
+        self.result_cache = None
+        if settings.BLOG_CACHE_SCOPE in ("global", "user"):
+            self.result_cache = build_cache(
+                "blog_results",
+                ttl_seconds=settings.BLOG_CACHE_TTL_SECONDS,
+                max_entries=settings.BLOG_CACHE_MAX_ENTRIES,
+                max_bytes=settings.BLOG_CACHE_MAX_BYTES,
+            )
     
     def generate_blog(self, video_data: Dict[str, Any], template: str, transcript: Optional[str], 
                      language: str = "en", fact_cleanup: bool = True, humanize: bool = True,
-                     is_code_tutorial: bool = False) -> str:
-        """Generate blog content based on template and video data using an LLM."""
-        if not self.llm_enabled:
-            return "## LLM Service Not Available\n\nPlease ensure your `NEBIUS_API_KEY` is correctly set in your `.env` file and restart the server."
+                     is_code_tutorial: bool = False, user_id: Optional[str] = None,
+                     regenerate: bool = False) -> BlogResult:
+        """
+        Generate blog content based on template and video data using an LLM.
+        Results are cached by the full set of generation parameters; pass
+        `regenerate=True` to skip the lookup and replace the cached entry.
+
+        When the LLM is unavailable, templates in EXTRACTIVE_FALLBACK_TEMPLATES
+        return a local extractive summary marked `degraded` (never cached);
+        other templates raise LLMUnavailableError.
+        """
+        cache_key = self.result_cache_key(video_data, template, transcript, language,
+                                          fact_cleanup, humanize, is_code_tutorial, user_id)
+        if not regenerate:
+            cached = self.get_cached_blog(cache_key)
+            if cached is not None:
+                return BlogResult(cached)
+        
+        try:
+            if not self.llm_enabled:
+                raise LLMUnavailableError("LLM service is not configured (NEBIUS_API_KEY is missing)")
+            system_prompt, user_prompt = self.build_prompts(video_data, template, transcript, language,
+                                                            fact_cleanup, humanize, is_code_tutorial)
+            content = self.llm_service.generate_content(
+                system_prompt, user_prompt,
+                profile=self.generation_profile(template, language, is_code_tutorial),
+                usage_tag=self.effective_template(template, is_code_tutorial),
+            )
+        except LLMUnavailableError as e:
+            return self.degraded_blog(video_data, template, transcript, e)
+        return BlogResult(self.finalize_blog(content, cache_key))
+
+    async def agenerate_blog(self, video_data: Dict[str, Any], template: str, transcript: Optional[str],
+                             language: str = "en", fact_cleanup: bool = True, humanize: bool = True,
+                             is_code_tutorial: bool = False, user_id: Optional[str] = None,
+                             regenerate: bool = False) -> BlogResult:
+        """
+        Event-loop version of `generate_blog`: cache access and prompt building run
+        in worker threads, and the completion itself is awaited on the async client.
+        """
+        cache_key = self.result_cache_key(video_data, template, transcript, language,
+                                          fact_cleanup, humanize, is_code_tutorial, user_id)
+        if not regenerate:
+            cached = await asyncio.to_thread(self.get_cached_blog, cache_key)
+            if cached is not None:
+                return BlogResult(cached)
+
+        try:
+            if not self.llm_enabled:
+                raise LLMUnavailableError("LLM service is not configured (NEBIUS_API_KEY is missing)")
+            system_prompt, user_prompt = await asyncio.to_thread(
+                self.build_prompts, video_data, template, transcript, language,
+                fact_cleanup, humanize, is_code_tutorial
+            )
+            content = await self.llm_service.agenerate_content(
+                system_prompt, user_prompt,
+                profile=self.generation_profile(template, language, is_code_tutorial),
+                usage_tag=self.effective_template(template, is_code_tutorial),
+            )
+        except LLMUnavailableError as e:
+            return await asyncio.to_thread(self.degraded_blog, video_data, template, transcript, e)
+        return BlogResult(await asyncio.to_thread(self.finalize_blog, content, cache_key))
+
+    def degraded_blog(self, video_data: Dict[str, Any], template: str, transcript: Optional[str],
+                      error: LLMUnavailableError) -> BlogResult:
+        """Local fallback for an unavailable LLM; re-raises `error` when the template has none."""
+        if template in EXTRACTIVE_FALLBACK_TEMPLATES:
+            content = self.extractive_summary(video_data, transcript)
+            if content:
+                print(f"LLM unavailable, serving an extractive summary instead: {error}")
+                return BlogResult(content, degraded=True)
+        raise error
+
+    def extractive_summary(self, video_data: Dict[str, Any], transcript: Optional[str]) -> Optional[str]:
+        """Markdown summary made of the transcript's highest-ranked sentences (no LLM involved)."""
+        # The raw transcript keeps its casing (the cleaner lowercases); repeats are dropped when ranking.
+        if transcript and len(transcript.strip()) > 100:
+            source = transcript
+        else:
+            source = video_data.get('description', '')
+        if not source or not source.strip():
+            return None
+        points = select_units(source, tokens_to_chars(settings.DEGRADED_SUMMARY_MAX_TOKENS))
+        if not points:
+            return None
+        bullets = "\n".join(f"- {point}" for point in points)
+        return (
+            f"# {video_data.get('title') or 'Video Summary'}\n\n"
+            "*The AI writer is temporarily unavailable, so this summary lists the key sentences "
+            "from the video in the order they appear.*\n\n"
+            f"## Key Points\n\n{bullets}\n"
+        )
+
+    def stream_blog(self, system_prompt: str, user_prompt: str, template: str, language: str = "en",
+                    is_code_tutorial: bool = False) -> Iterator[str]:
+        """Stream raw LLM output for prompts built with `build_prompts`; pass the joined text to `finalize_blog`."""
+        return self.llm_service.stream_content(
+            system_prompt, user_prompt,
+            profile=self.generation_profile(template, language, is_code_tutorial),
+            usage_tag=self.effective_template(template, is_code_tutorial),
+        )
+
+    def astream_blog(self, system_prompt: str, user_prompt: str, template: str, language: str = "en",
+                     is_code_tutorial: bool = False) -> AsyncIterator[str]:
+        """Async counterpart of `stream_blog`."""
+        return self.llm_service.astream_content(
+            system_prompt, user_prompt,
+            profile=self.generation_profile(template, language, is_code_tutorial),
+            usage_tag=self.effective_template(template, is_code_tutorial),
+        )
 
-        if template not in self.templates:
+    def effective_template(self, template: str, is_code_tutorial: bool = False) -> str:
+        """The template actually rendered: tutorials of code content use the code variant."""
+        if is_code_tutorial and template == "tutorial":
+            return "code_tutorial"
+        return template
+
+    def generation_profile(self, template: str, language: str = "en",
+                           is_code_tutorial: bool = False) -> GenerationProfile:
+        """Model, max_tokens and temperature for a template and language."""
+        return resolve_profile(self.prompt_registry, self.effective_template(template, is_code_tutorial), language)
+
+    def build_prompts(self, video_data: Dict[str, Any], template: str, transcript: Optional[str],
+                      language: str = "en", fact_cleanup: bool = True, humanize: bool = True,
+                      is_code_tutorial: bool = False) -> Tuple[str, str]:
+        """Clean the transcript and build the (system, user) prompts for a template."""
+        if not self.prompt_registry.has_template(template):
             raise ValueError(f"Unknown template: {template}")
         
         # Clean transcript if fact cleanup is enabled
         if transcript and fact_cleanup:
             transcript = self._clean_transcript_advanced(transcript)
         
-        # Detect if it's a code tutorial and adjust template accordingly
-        if is_code_tutorial and template == "tutorial":
-            system_prompt, user_prompt = self._create_code_tutorial_prompt(video_data, transcript, language, humanize)
-        else:
-            system_prompt, user_prompt = self.templates[template](video_data, transcript, language, humanize)
-        
-        content = self.llm_service.generate_content(system_prompt, user_prompt)
+        content_source, source_type = self._resolve_content_source(video_data, transcript)
         
+        # Detect if it's a code tutorial and adjust template accordingly
+        template = self.effective_template(template, is_code_tutorial)
+        return self.prompt_registry.render(template, video_data, content_source, source_type, language, humanize)
+
+    def finalize_blog(self, content: str, cache_key: Optional[str] = None) -> str:
+        """Post-process raw LLM output and store it in the result cache."""
         # Apply content gap filling
         content = self._fill_content_gaps(content)
         
+        if cache_key is not None and content.strip():
+            self.result_cache.set(cache_key, content)
+        
         return content
 
+    def get_cached_blog(self, cache_key: Optional[str]) -> Optional[str]:
+        if cache_key is None:
+            return None
+        cached = self.result_cache.get(cache_key)
+        if cached is None:
+            return None
+        print(f"Blog cache hit ({cache_key[:12]})")
+        return cached.value
+
+    def result_cache_key(self, video_data: Dict[str, Any], template: str, transcript: Optional[str],
+                         language: str, fact_cleanup: bool, humanize: bool, is_code_tutorial: bool,
+                         user_id: Optional[str]) -> Optional[str]:
+        """Build the result cache key from every input that can change the generated blog (None when caching is off)."""
+        if self.result_cache is None:
+            return None
+        source_digest = hashlib.sha256(
+            f"{transcript or ''}\x00{video_data.get('title', '')}\x00{video_data.get('description', '')}".encode("utf-8")
+        ).hexdigest()
+        params = {
+            "video_id": video_data.get("video_id"),
+            "template": template,
+            "language": language,
+            "fact_cleanup": fact_cleanup,
+            "humanize": humanize,
+            "is_code_tutorial": is_code_tutorial,
+            "prompt_version": self.prompt_version,
+            "long_input_strategy": settings.LONG_INPUT_STRATEGY,
+            "generation": self.generation_profile(template, language, is_code_tutorial).to_dict(),
+            "source": source_digest,
+            "user_id": user_id if settings.BLOG_CACHE_SCOPE == "user" else None,
+        }
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @property
+    def prompt_version(self) -> str:
+        """Changes whenever a template file or the prompt-building code does, invalidating cached blogs."""
+        return f"{self._code_version}-{self.prompt_registry.version}"
+
+    def _compute_code_version(self) -> str:
+        """Hash the prompt-building code and model (template text is versioned by the registry)."""
+        builders = [
+            self._get_content_source, self._resolve_content_source, self._clean_transcript_advanced,
+            self._remove_repetitions, self._fill_content_gaps, self._create_map_prompt,
+        ]
+        digest = hashlib.sha256()
+        for builder in builders:
+            try:
+                digest.update(inspect.getsource(builder).encode("utf-8"))
+            except (OSError, TypeError):
+                digest.update(builder.__name__.encode("utf-8"))
+        digest.update((self.llm_service.model if self.llm_service else "").encode("utf-8"))
+        return digest.hexdigest()[:16]
+
     def detect_code_content(self, transcript: Optional[str]) -> bool:
         """Detect if the video content is related to coding or tutorials."""
-        if not transcript:
-            return False
-            
-        code_indicators = [
-            # Programming languages
-            'javascript', 'python', 'java', 'react', 'node', 'html', 'css',
-            'typescript', 'angular', 'vue', 'php', 'ruby', 'go', 'rust',
-            
-            # Code-related terms
-            'function', 'class', 'import', 'export', 'console.log', 'print(',
-            'def ', 'var ', 'let ', 'const ', 'if (', 'for (', 'while (',
-            
-            # Development tools
-            'git', 'github', 'npm', 'yarn', 'pip', 'docker', 'kubernetes',
-            'api', 'database', 'sql', 'mongodb', 'postgresql',
-            
-            # Tutorial indicators
-            'tutorial', 'coding', 'programming', 'development', 'build',
-            'create', 'install', 'setup', 'configure', 'deploy'
-        ]
-        
-        transcript_lower = transcript.lower()
-        code_mentions = sum(1 for indicator in code_indicators if indicator in transcript_lower)
-        
-        # If more than 3 code-related terms are mentioned, consider it a code tutorial
-        return code_mentions >= 3
+        return self.score_code_content(transcript).is_code
+
+    def score_code_content(self, transcript: Optional[str]) -> CodeDetection:
+        """Weighted code-indicator scores per category (language, syntax, tooling, tutorial)."""
+        return analyze_code_content(transcript)
 
     def _clean_transcript_advanced(self, transcript: str) -> str:
-        """Advanced transcript cleaning to remove filler content and promotional segments."""
+        """
+        Advanced transcript cleaning to remove filler content and promotional segments.
+        All rules run in a single linear-time pass (see backend.transcript_cleaner).
+        """
         if not transcript:
             return transcript
-            
-        # Remove promotional content patterns
-        promo_patterns = [
-            r'this video is sponsored by.*?(?=\.|$)',
-            r'before we start.*?subscribe.*?(?=\.|$)',
-            r'don\'t forget to like and subscribe.*?(?=\.|$)',
-            r'check out the description.*?(?=\.|$)',
-            r'link in the description.*?(?=\.|$)',
-            r'thanks to.*?for sponsoring.*?(?=\.|$)',
-            r'use code.*?for.*?discount.*?(?=\.|$)',
-        ]
-        
-        # Remove greeting patterns
-        greeting_patterns = [
-            r'^(hey|hi|hello|what\'s up).*?(?=\.|$)',
-            r'welcome back to.*?(?=\.|$)',
-            r'in today\'s video.*?(?=\.|$)',
-        ]
-        
-        # Remove filler words and phrases
-        filler_patterns = [
-            r'\b(um|uh|like|you know|so basically|okay|alright|actually)\b',
-            r'\b(sort of|kind of|i mean|you see|right\?)\b',
-            r'\[.*?\]',  # Remove bracketed content like [Music]
-            r'\(.*?\)'   # Remove parenthetical content
-        ]
-        
-        cleaned = transcript
-        
-        # Apply promotional content removal
-        for pattern in promo_patterns:
-            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
-        
-        # Apply greeting removal (only at the beginning)
-        for pattern in greeting_patterns:
-            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
-        
-        # Apply filler removal
-        for pattern in filler_patterns:
-            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
-        
-        # Remove repetitive phrases
-        cleaned = self._remove_repetitions(cleaned)
-        
-        # Clean up extra spaces and normalize
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-        
-        return cleaned
+        return ADVANCED_CLEANER.clean(transcript)
 
     def _remove_repetitions(self, text: str) -> str:
         """Remove repetitive phrases and sentences."""
-        sentences = text.split('.')
-        unique_sentences = []
-        seen = set()
-        
-        for sentence in sentences:
-            sentence = sentence.strip().lower()
-            if sentence and sentence not in seen and len(sentence) > 10:
-                seen.add(sentence)
-                unique_sentences.append(sentence)
-        
-        return '. '.join(unique_sentences)
+        return remove_repeated_sentences(text)
 
     def _fill_content_gaps(self, content: str) -> str:
         """Intelligently fill content gaps and add explanations where needed."""
@@ -194,208 +312,69 @@ class BlogGenerator:
     def _get_content_source(self, video_data: Dict[str, Any], transcript: Optional[str]) -> Tuple[str, str]:
         """Determines the best content source (transcript or description) to use for the prompt."""
         description = video_data.get('description', '')
+        budget = tokens_to_chars(settings.PROMPT_SOURCE_MAX_TOKENS)
         if transcript and len(transcript.strip()) > 100:
-            return transcript, "video transcript"
-        return description, "video description"
-
-    def _get_language_instruction(self, language: str, humanize: bool) -> str:
-        """Get language-specific instructions for the LLM."""
-        lang_config = self.languages.get(language, self.languages["en"])
-        instruction = lang_config["instruction"]
-        
-        if humanize:
-            instruction += " Use a natural, conversational tone that sounds human-written, not AI-generated."
-        
-        return instruction
-
-    def _create_code_tutorial_prompt(self, video_data: Dict[str, Any], transcript: Optional[str], 
-                                   language: str, humanize: bool) -> Tuple[str, str]:
-        """Create specialized prompt for code tutorials."""
+            if settings.LONG_INPUT_STRATEGY == "extractive" and len(transcript) > budget:
+                return compress_extractive(transcript, budget), "key sentences from the full video transcript"
+            return transcript[:budget], "video transcript"
+        return description[:budget], "video description"
+
+    def _resolve_content_source(self, video_data: Dict[str, Any], transcript: Optional[str]) -> Tuple[str, str]:
+        """Pick the content source, condensing transcripts that exceed the prompt budget when enabled."""
+        if (settings.LONG_INPUT_STRATEGY == "map_reduce" and transcript
+                and estimate_tokens(transcript) > settings.PROMPT_SOURCE_MAX_TOKENS):
+            notes = self._map_transcript_chunks(video_data, transcript)
+            if notes:
+                return notes, "condensed notes covering the full video transcript"
+        return self._get_content_source(video_data, transcript)
+
+    def _map_transcript_chunks(self, video_data: Dict[str, Any], transcript: str) -> Optional[str]:
+        """
+        Map step of long-input generation: summarize token-budgeted transcript chunks
+        in parallel (at most MAP_REDUCE_CONCURRENCY calls in flight) and join the
+        notes in order. The template prompt built from the notes is the reduce step.
+        Returns None if every chunk failed, so the caller falls back to truncation.
+        """
+        chunks = chunk_by_tokens(transcript, settings.MAP_REDUCE_CHUNK_TOKENS)
+        # Size each chunk's notes so that all of them together fit the reduce prompt.
+        notes_tokens = max(128, min(1024, settings.LONG_INPUT_SOURCE_MAX_TOKENS // len(chunks)))
+        print(f"Long transcript: summarizing {len(chunks)} chunks ({notes_tokens} tokens each)")
+
+        def summarize(index: int, chunk: str) -> Optional[str]:
+            system_prompt, user_prompt = self._create_map_prompt(video_data, chunk, index, len(chunks))
+            try:
+                notes = self.llm_service.generate_content(
+                    system_prompt, user_prompt, max_tokens=notes_tokens,
+                    profile=resolve_profile(self.prompt_registry, "map_reduce", ""), usage_tag="map_reduce",
+                )
+            except LLMUnavailableError:
+                notes = None
+            if not notes:
+                print(f"Chunk {index + 1}/{len(chunks)} could not be summarized")
+                return None
+            return notes.strip()
+
+        workers = max(1, min(settings.MAP_REDUCE_CONCURRENCY, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="map-reduce") as pool:
+            notes = list(pool.map(summarize, range(len(chunks)), chunks))
+        if not any(notes):
+            return None
+        sections = [f"[Part {i + 1}/{len(chunks)}]\n{part}" for i, part in enumerate(notes) if part]
+        return "\n\n".join(sections)[:tokens_to_chars(settings.LONG_INPUT_SOURCE_MAX_TOKENS)]
+
+    def _create_map_prompt(self, video_data: Dict[str, Any], chunk: str, index: int, total: int) -> Tuple[str, str]:
         system_prompt = (
-            "You are an expert technical writer who creates detailed coding tutorials from video content. "
-            "Format code properly with syntax highlighting, include copy buttons, and structure content "
-            "with Prerequisites, Steps, Code Blocks, and Expected Output sections. "
-            f"{self._get_language_instruction(language, humanize)}"
+            "You condense part of a video transcript into dense, factual notes for a writer who will "
+            "turn the notes for the whole video into a blog post. Keep every key point, step, example, "
+            "name and number. Do not add introductions, opinions or information that is not in the text."
         )
-        
-        content_source, source_type = self._get_content_source(video_data, transcript)
-
         user_prompt = f"""
-Create a comprehensive coding tutorial in Markdown format based on the video information below.
-
-**Video Title:** {video_data.get('title')}
-**Channel:** {video_data.get('channel_name')}
-**Content Source (from {source_type}):**
----
-{content_source[:4000]}
----
-
-**Instructions:**
-1. Create an engaging tutorial title
-2. Add a brief overview of what will be built/learned
-3. List Prerequisites (tools, knowledge, dependencies)
-4. Break down into clear, numbered steps
-5. For each code section, use proper markdown code blocks with language specification
-6. Include expected output or results after code blocks
-7. Add troubleshooting tips where relevant
-8. Conclude with next steps or additional resources
-
-**Code Block Format:**
-```language
-// Your code here
-```
-
-**Language:** {self.languages.get(language, {}).get('name', 'English')}
-"""
-        return system_prompt, user_prompt
-
-    # --------------------------------------------------------
-    # ARTICLE PROMPT (Enhanced with multi-language and humanization)
-    # --------------------------------------------------------
-    def _create_article_prompt(self, video_data: Dict[str, Any], transcript: Optional[str], 
-                              language: str = "en", humanize: bool = True) -> Tuple[str, str]:
-        system_prompt = (
-            "You are an expert blog writer who turns video content into rich, well-structured, SEO-friendly articles. "
-            "Write with clarity, depth, and flow. Use Markdown formatting, including headings, subheadings, bold, "
-            "lists, and examples when useful. Maintain an informative but engaging tone throughout. "
-            f"{self._get_language_instruction(language, humanize)}"
-        )
-        
-        content_source, source_type = self._get_content_source(video_data, transcript)
-
-        user_prompt = f"""
-Please generate a comprehensive blog article in Markdown format based on the video information below.
-
-**Video Title:** {video_data.get('title')}
-**Channel:** {video_data.get('channel_name')}
-**Content Source (from {source_type}):**
----
-{content_source[:4000]}
----
-
-**Instructions:**
-1. Create a compelling headline inspired by the video title.
-2. Write an introduction that explains the topic, why it matters, and what readers will learn.
-3. Identify the 3–6 main themes or takeaways from the content.
-4. For each theme, create a detailed section with a descriptive subheading. Expand clearly with explanations, insights, and helpful context.
-5. Add examples or clarifications when they improve reader understanding.
-6. Conclude with a meaningful summary and final insight.
-7. Produce a polished Markdown article with no meta commentary.
-
-**Language:** {self.languages.get(language, {}).get('name', 'English')}
-"""
-        return system_prompt, user_prompt
-
-    # --------------------------------------------------------
-    # TUTORIAL PROMPT (Enhanced)
-    # --------------------------------------------------------
-    def _create_tutorial_prompt(self, video_data: Dict[str, Any], transcript: Optional[str], 
-                               language: str = "en", humanize: bool = True) -> Tuple[str, str]:
-        system_prompt = (
-            "You are a technical writer who creates clear, structured, deeply detailed tutorials from video content. "
-            "Write step-by-step, with explanations that make each step easy to follow. Use Markdown formatting, "
-            "numbered steps, subheadings, and code blocks when helpful. "
-            f"{self._get_language_instruction(language, humanize)}"
-        )
-        
-        content_source, source_type = self._get_content_source(video_data, transcript)
-
-        user_prompt = f"""
-Please generate a detailed step-by-step tutorial in Markdown format using the information below.
-
 **Video Title:** {video_data.get('title')}
-**Channel:** {video_data.get('channel_name')}
-**Content Source (from {source_type}):**
+**Transcript part {index + 1} of {total}:**
 ---
-{content_source[:4000]}
+{chunk}
 ---
 
-**Instructions:**
-1. Create an action-focused headline.
-2. Write an overview explaining what the tutorial teaches and the final result.
-3. Add prerequisites if necessary (tools, software, knowledge).
-4. Break the process into a sequence of detailed, logical steps.
-5. For each step:
-   - Add a subheading.
-   - Explain what to do and why it matters.
-   - Add warnings, notes, or tips where useful.
-   - Include code blocks if applicable.
-6. Conclude with what the user accomplished and optional next steps.
-7. Output the whole tutorial in clean Markdown.
-
-**Language:** {self.languages.get(language, {}).get('name', 'English')}
-"""
-        return system_prompt, user_prompt
-
-    # --------------------------------------------------------
-    # REVIEW PROMPT (Enhanced)
-    # --------------------------------------------------------
-    def _create_review_prompt(self, video_data: Dict[str, Any], transcript: Optional[str], 
-                             language: str = "en", humanize: bool = True) -> Tuple[str, str]:
-        system_prompt = (
-            "You are a professional reviewer who writes balanced, in-depth evaluations of products, tools, or content "
-            "explained in videos. Your reviews should feel structured, fair, and insightful. Use Markdown formatting, "
-            "with sections like Overview, Pros, Cons, Performance, and Final Verdict. "
-            f"{self._get_language_instruction(language, humanize)}"
-        )
-
-        content_source, source_type = self._get_content_source(video_data, transcript)
-
-        user_prompt = f"""
-Please generate a detailed and balanced review in Markdown format based on the video content.
-
-**Video Title:** {video_data.get('title')}
-**Channel:** {video_data.get('channel_name')}
-**Content Source (from {source_type}):**
----
-{content_source[:4000]}
----
-
-**Instructions:**
-1. Create a strong review headline.
-2. Begin with an overview of the product/topic and what it aims to achieve.
-3. Provide a deeper analysis covering features, performance, usability, strengths, and weaknesses.
-4. Add the following sections:
-   - **Pros:** meaningful positive points in bullets.
-   - **Cons:** realistic drawbacks, not generic filler.
-5. Include a **Final Verdict** summarizing who it is for and whether it is worth considering.
-6. Add a star rating out of 5 with a one-line justification.
-7. Output the result as a clean Markdown review.
-
-**Language:** {self.languages.get(language, {}).get('name', 'English')}
-"""
-        return system_prompt, user_prompt
-
-    # --------------------------------------------------------
-    # SUMMARY PROMPT (Enhanced)
-    # --------------------------------------------------------
-    def _create_summary_prompt(self, video_data: Dict[str, Any], transcript: Optional[str], 
-                              language: str = "en", humanize: bool = True) -> Tuple[str, str]:
-        system_prompt = (
-            "You are an efficient summarizer who extracts the most important insights from video content. "
-            "Write summaries that are short but meaningful, structured, and easy to skim. Use Markdown headings and bullet points. "
-            f"{self._get_language_instruction(language, humanize)}"
-        )
-
-        content_source, source_type = self._get_content_source(video_data, transcript)
-
-        user_prompt = f"""
-Please produce a clear and slightly detailed summary in Markdown format.
-
-**Video Title:** {video_data.get('title')}
-**Channel:** {video_data.get('channel_name')}
-**Content Source (from {source_type}):**
----
-{content_source[:4000]}
----
-
-**Instructions:**
-1. Use the video title as the main heading.
-2. Write a one-paragraph overview explaining the main idea and purpose of the video.
-3. Provide a bulleted list of the 6–10 most important insights, lessons, or events.
-4. Keep the language simple, clear, and direct.
-5. Deliver the final result as a complete Markdown summary.
-
-**Language:** {self.languages.get(language, {}).get('name', 'English')}
+Write concise bullet-point notes covering everything important in this part, in the order it is discussed.
 """
         return system_prompt, user_prompt